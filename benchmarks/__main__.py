@@ -0,0 +1,106 @@
+"""Run the benchmark suites and write results as a JSON document.
+
+Results include versions of the server and its dependencies, so they
+could be compared across versions. Run with:
+
+    python -m benchmarks --output results.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tensorflow as tf
+import time
+
+import tensorcraft
+
+from benchmarks import archive
+from benchmarks import cache
+from benchmarks import listing
+from benchmarks import loading
+from benchmarks import predict
+from benchmarks import transfer
+
+
+MB = 1024**2
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="file to write results to, stdout by default")
+    parser.add_argument("--suite", metavar="SUITE", action="append",
+                        choices=["predict", "transfer", "listing", "loading",
+                                 "cache", "archive"],
+                        help="suite to run, all suites by default")
+    parser.add_argument("--batch-size", metavar="SIZE", type=int,
+                        action="append",
+                        help="batch size of predictions")
+    parser.add_argument("--concurrency", metavar="COUNT", type=int,
+                        action="append",
+                        help="number of concurrent predictions")
+    parser.add_argument("--requests", metavar="COUNT", type=int, default=500,
+                        help="number of predictions per run")
+    parser.add_argument("--archive-size", metavar="MEGABYTES", type=int,
+                        action="append",
+                        help="size of pushed and exported archives")
+    parser.add_argument("--archive-workers", metavar="COUNT", type=int,
+                        default=4,
+                        help="number of workers of the parallel archives")
+    parser.add_argument("--entries", metavar="COUNT", type=int,
+                        default=10000,
+                        help="number of metadata entries for listing")
+    return parser.parse_args()
+
+
+async def run_suites(args):
+    suites = args.suite or ["predict", "transfer", "listing", "loading",
+                            "cache", "archive"]
+    results = []
+
+    if "predict" in suites:
+        results.extend(await predict.run(
+            batch_sizes=args.batch_size or (1, 8, 64),
+            concurrencies=args.concurrency or (1, 8, 32),
+            requests=args.requests))
+    if "transfer" in suites:
+        sizes = [s * MB for s in args.archive_size or (10, 100, 1024, 2048)]
+        results.extend(await transfer.run(sizes=sizes))
+    if "listing" in suites:
+        results.extend(await listing.run(entries=args.entries))
+    if "loading" in suites:
+        results.extend(await loading.run())
+    if "cache" in suites:
+        for cache_class in (cache.GlobalLockCache, cache.model.Cache):
+            result = await cache.run(cache_class, hot=10, cold=10,
+                                     lookups=10000, delay=0.05)
+            results.append(dict(result, benchmark="cache"))
+    if "archive" in suites:
+        sizes = [s * MB for s in args.archive_size or (100, 1024)]
+        results.extend(await archive.run(sizes=sizes,
+                                         workers=args.archive_workers))
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    started_at = time.time()
+
+    report = dict(version=tensorcraft.__version__,
+                  api_version=tensorcraft.__apiversion__,
+                  python_version=platform.python_version(),
+                  tensorflow_version=tf.__version__,
+                  platform=platform.platform(),
+                  started_at=started_at,
+                  results=asyncio.run(run_suites(args)))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark of the sequential and parallel TAR extraction and creation.
+
+Model of variable shards of the given total size is archived and extracted
+by the sequential implementation and by the pool of workers. Run with:
+
+    python -m benchmarks.archive
+"""
+import asyncio
+import io
+import json
+import os
+import pathlib
+import tempfile
+import time
+
+from typing import Dict, Sequence
+
+from tensorcraft import asynclib
+from tensorcraft import tarlib
+
+
+MB = 1024**2
+
+
+def make_model(path: pathlib.Path, size: int, shards: int) -> None:
+    """Create the model directory with variables split into shards."""
+    variables_path = path.joinpath("variables")
+    variables_path.mkdir(parents=True)
+    path.joinpath("saved_model.pb").write_bytes(os.urandom(64 * 1024))
+
+    for i in range(shards):
+        name = f"variables.data-{i:05d}-of-{shards:05d}"
+        with open(str(variables_path.joinpath(name)), "wb") as f:
+            remaining = size // shards
+            while remaining > 0:
+                chunk = os.urandom(min(remaining, MB))
+                f.write(chunk)
+                remaining -= len(chunk)
+
+
+def timed(func, *args, **kwargs) -> float:
+    started_at = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - started_at
+
+
+def run_one(workdir: pathlib.Path, size: int, shards: int,
+            workers: int) -> Sequence[Dict]:
+    model_path = workdir.joinpath("model")
+    make_model(model_path, size, shards)
+
+    engines = dict(
+        sequential=(lambda f, p: asynclib.run(asynclib.create_tar(f, p)),
+                    lambda f, p: asynclib.run(asynclib.extract_tar(f, p))),
+        parallel=(lambda f, p: tarlib.create(f, p, workers=workers),
+                  lambda f, p: tarlib.extract(f, p, workers=workers)))
+
+    results = []
+    for engine, (create, extract) in engines.items():
+        tar_path = workdir.joinpath(f"{engine}.tar")
+        dest_path = workdir.joinpath(engine)
+
+        with open(str(tar_path), "wb") as f:
+            create_elapsed = timed(create, f, str(model_path))
+        with open(str(tar_path), "rb") as f:
+            extract_elapsed = timed(extract, f, str(dest_path))
+
+        for name, elapsed in (("create", create_elapsed),
+                              ("extract", extract_elapsed)):
+            results.append(dict(benchmark=f"archive_{name}",
+                                engine=engine, size=size, shards=shards,
+                                workers=workers, elapsed=elapsed,
+                                megabytes_per_second=size / MB / elapsed))
+    return results
+
+
+async def run(sizes: Sequence[int] = (100*MB, 1024*MB),
+              shards: Sequence[int] = (1, 16, 128),
+              workers: int = tarlib.WORKERS) -> Sequence[Dict]:
+    loop = asyncio.get_event_loop()
+    results = []
+
+    for size in sizes:
+        for count in shards:
+            with tempfile.TemporaryDirectory() as workdir:
+                results.extend(await loop.run_in_executor(
+                    None, run_one, pathlib.Path(workdir), size, count,
+                    workers))
+    return results
+
+
+def main() -> None:
+    for result in asyncio.run(run()):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
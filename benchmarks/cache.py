@@ -0,0 +1,104 @@
+"""Benchmark of concurrent model lookups in the cache.
+
+Measures the latency of lookups of already loaded models,
+while other models are being loaded from the storage. Run with:
+
+    python -m benchmarks.cache
+"""
+import aiorwlock
+import asyncio
+import json
+import time
+import unittest.mock
+
+from tensorcraft.backend import model
+from tensorcraft.signal import Signal
+from tests import kerastest
+
+
+class SlowStorage:
+    """Storage that loads models with the given delay.
+
+    Metadata of models is resolved instantly, only the load of the
+    execution model is delayed.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.on_save = Signal()
+        self.on_delete = Signal()
+        self.models = {}
+
+    async def load_from_meta(self, name: str, tag: str) -> model.Model:
+        # Each lookup returns a new instance of the same model, like the
+        # metadata backends of the storage do.
+        if (name, tag) not in self.models:
+            self.models[(name, tag)] = kerastest.new_model(name, tag)
+        return self.models[(name, tag)].copy()
+
+    async def load_model(self, m: model.Model) -> model.Model:
+        await asyncio.sleep(self.delay)
+        m.model = unittest.mock.Mock()
+        return m
+
+    async def load(self, name: str, tag: str) -> model.Model:
+        return await self.load_model(await self.load_from_meta(name, tag))
+
+
+class GlobalLockCache(model.Cache):
+    """Cache that serializes all lookups through the global writer lock.
+
+    Both the resolution of the model and the load of the execution model
+    happen under the lock, so concurrent loads are not deduplicated, but
+    serialized.
+    """
+
+    lock = None
+
+    async def load(self, name: str, tag: str) -> model.Model:
+        if self.lock is None:
+            self.lock = aiorwlock.RWLock()
+
+        async with self.lock.writer_lock:
+            return await self.unsafe_load(name, tag)
+
+
+async def run(cache_class, hot: int, cold: int, lookups: int,
+              delay: float) -> dict:
+    cache = await cache_class.new(storage=SlowStorage(delay))
+
+    hot_keys = [("hot", str(i)) for i in range(hot)]
+    for name, tag in hot_keys:
+        await cache.load(name, tag)
+
+    latencies = []
+
+    async def lookup(name, tag):
+        started_at = time.perf_counter()
+        await cache.load(name, tag)
+        latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *[cache.load("cold", str(i)) for i in range(cold)],
+        *[lookup(*hot_keys[i % hot]) for i in range(lookups)])
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return dict(cache=cache_class.__name__,
+                lookups=lookups,
+                elapsed=elapsed,
+                lookups_per_second=lookups / elapsed,
+                p50=latencies[len(latencies) // 2],
+                p99=latencies[int(len(latencies) * 0.99)])
+
+
+def main(hot: int = 10, cold: int = 10, lookups: int = 10000,
+         delay: float = 0.05) -> None:
+    for cache_class in (GlobalLockCache, model.Cache):
+        result = asyncio.run(run(cache_class, hot, cold, lookups, delay))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Common helpers of the server benchmarks."""
+import aiohttp.test_utils
+import os
+import pathlib
+import statistics
+import tarfile
+import tempfile
+
+from typing import Dict, Sequence
+
+from tensorcraft import asynclib
+from tensorcraft import server
+from tests import kerastest
+
+
+class RandomReader:
+    """File-like object that reads the given number of random bytes.
+
+    Random bytes are not compressible, so the archive size is not affected
+    by compression of the transferred data.
+    """
+
+    def __init__(self, size: int):
+        self.remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        self.remaining -= size
+        return os.urandom(size)
+
+
+@asynclib.asynccontextmanager
+async def model_tar(size: int = 0):
+    """Create an archive of the generated model padded to the given size.
+
+    Args:
+        size -- size of the archive in bytes, the archive is not padded
+                when it is less than the size of the model
+    """
+    m = kerastest.new_model()
+    async with kerastest.crossentropy_model_tar(m.name, m.tag) as tarpath:
+        padding = size - tarpath.stat().st_size
+        if padding > 0:
+            with tarfile.open(str(tarpath), mode="a") as tar:
+                info = tarfile.TarInfo("assets.extra/padding.bin")
+                info.size = padding
+                tar.addfile(info, RandomReader(padding))
+        yield tarpath
+
+
+@asynclib.asynccontextmanager
+async def serve(data_root: pathlib.Path = None, **kwargs):
+    """Run the server and yield the client connected to it."""
+    with tempfile.TemporaryDirectory() as workdir:
+        data_root = data_root or pathlib.Path(workdir)
+        s = await server.Server.new(
+            strategy="no",
+            pidfile=str(pathlib.Path(workdir, "tensorcraft.pid")),
+            data_root=str(data_root),
+            **kwargs)
+
+        async with aiohttp.test_utils.TestServer(s.app) as test_server:
+            async with aiohttp.test_utils.TestClient(test_server) as client:
+                yield client
+
+
+async def push(client, tarpath: pathlib.Path, name: str, tag: str) -> None:
+    url = "/models/{0}/{1}".format(name, tag)
+    resp = await client.put(url, data=asynclib.reader(tarpath))
+    if resp.status != 201:
+        raise RuntimeError(f"failed to push model {name}:{tag}, "
+                           f"{resp.status} {await resp.text()}")
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Dict:
+    """Summarize latencies of the requests in seconds."""
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return dict(requests=len(latencies),
+                elapsed=elapsed,
+                requests_per_second=len(latencies) / elapsed,
+                mean=statistics.mean(latencies),
+                p50=percentile(0.50),
+                p90=percentile(0.90),
+                p99=percentile(0.99),
+                max=latencies[-1])
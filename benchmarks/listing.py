@@ -0,0 +1,72 @@
+"""Benchmark of the models listing and server status latency.
+
+Metadata database is populated with the given number of documents before
+the server start, model files are not created. Run with:
+
+    python -m benchmarks.listing
+"""
+import asyncio
+import json
+import pathlib
+import tempfile
+import time
+import tinydb
+
+from typing import Dict, Sequence
+
+from benchmarks import harness
+from tests import kerastest
+
+
+def populate(data_root: pathlib.Path, entries: int) -> None:
+    """Write metadata documents of the models with 10 tags each."""
+    documents = [kerastest.new_model(f"model-{i // 10}", str(i % 10))
+                 for i in range(entries)]
+
+    # SQLite backend migrates documents from the JSON database on start.
+    db = tinydb.TinyDB(path=data_root.joinpath("metadata.json"),
+                       default_table="metadata")
+    db.insert_multiple(m.to_dict() for m in documents)
+    db.close()
+
+
+async def run_one(client, url: str, requests: int) -> Dict:
+    latencies = []
+
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        request_started_at = time.perf_counter()
+        resp = await client.get(url)
+        await resp.read()
+        latencies.append(time.perf_counter() - request_started_at)
+    elapsed = time.perf_counter() - started_at
+
+    return harness.summarize(latencies, elapsed)
+
+
+async def run(entries: int = 10000, requests: int = 50,
+              backends: Sequence[str] = ("json", "sqlite"),
+              **server_args) -> Sequence[Dict]:
+    results = []
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as workdir:
+            data_root = pathlib.Path(workdir)
+            populate(data_root, entries)
+
+            async with harness.serve(data_root, metadata_backend=backend,
+                                     **server_args) as client:
+                for name, url in (("list", "/models"), ("status", "/status")):
+                    result = await run_one(client, url, requests)
+                    results.append(dict(result, benchmark=name,
+                                        entries=entries,
+                                        metadata_backend=backend))
+    return results
+
+
+def main() -> None:
+    for result in asyncio.run(run()):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
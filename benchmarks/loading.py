@@ -0,0 +1,60 @@
+"""Benchmark of the cold and warm model load time.
+
+Cold load reads the model from the storage into a new cache, warm load
+returns the model already loaded into the cache. Run with:
+
+    python -m benchmarks.loading
+"""
+import asyncio
+import json
+import pathlib
+import tempfile
+import time
+
+from typing import Dict, Sequence
+
+from benchmarks import harness
+from tensorcraft.backend import model
+from tensorcraft.backend import saving
+
+
+async def run(repeats: int = 10,
+              warmup_batch_sizes: Sequence[int] = ()) -> Sequence[Dict]:
+    with tempfile.TemporaryDirectory() as workdir:
+        loader = model.Loader("no", warmup_batch_sizes=warmup_batch_sizes)
+        storage = saving.FsModelsStorage.new(path=pathlib.Path(workdir),
+                                             loader=loader)
+
+        async with harness.model_tar() as tarpath:
+            with open(str(tarpath), "rb") as stream:
+                await storage.save("bench", "1", stream)
+
+        cold, warm, warmup = [], [], []
+        for _ in range(repeats):
+            cache = await model.Cache.new(storage=storage)
+
+            started_at = time.perf_counter()
+            m = await cache.load("bench", "1")
+            cold.append(time.perf_counter() - started_at)
+            warmup.append(m.warmup_time)
+
+            started_at = time.perf_counter()
+            await cache.load("bench", "1")
+            warm.append(time.perf_counter() - started_at)
+
+            m.release()
+
+        await storage.close()
+
+    return [dict(harness.summarize(cold, sum(cold)), benchmark="cold_load",
+                 warmup_time=sum(warmup) / repeats),
+            dict(harness.summarize(warm, sum(warm)), benchmark="warm_load")]
+
+
+def main() -> None:
+    for result in asyncio.run(run()):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
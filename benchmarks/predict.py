@@ -0,0 +1,71 @@
+"""Benchmark of the predictions throughput and latency.
+
+Sends concurrent predictions of the given batch sizes to the server with
+the generated model. Run with:
+
+    python -m benchmarks.predict
+"""
+import asyncio
+import json
+import numpy
+import time
+
+from typing import Dict, Sequence
+
+from benchmarks import harness
+from tensorcraft import tensorlib
+
+
+async def run_one(client, url: str, batch_size: int, concurrency: int,
+                  requests: int) -> Dict:
+    headers = {"Content-Type": tensorlib.NPY_CONTENT_TYPE,
+               "Accept": tensorlib.NPY_CONTENT_TYPE}
+    body = tensorlib.dumps(numpy.random.uniform(size=(batch_size, 1)))
+
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for _ in counter:
+            started_at = time.perf_counter()
+            resp = await client.post(url, data=body, headers=headers)
+            await resp.read()
+            latencies.append(time.perf_counter() - started_at)
+
+            if resp.status != 200:
+                raise RuntimeError(f"prediction failed with {resp.status}")
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started_at
+
+    result = harness.summarize(latencies, elapsed)
+    return dict(result, benchmark="predict",
+                batch_size=batch_size,
+                concurrency=concurrency,
+                samples_per_second=result["requests_per_second"] * batch_size)
+
+
+async def run(batch_sizes: Sequence[int] = (1, 8, 64),
+              concurrencies: Sequence[int] = (1, 8, 32),
+              requests: int = 500, **server_args) -> Sequence[Dict]:
+    results = []
+    async with harness.serve(**server_args) as client:
+        async with harness.model_tar() as tarpath:
+            await harness.push(client, tarpath, "bench", "1")
+
+        url = "/models/bench/1/predict"
+        for batch_size in batch_sizes:
+            for concurrency in concurrencies:
+                results.append(await run_one(client, url, batch_size,
+                                             concurrency, requests))
+    return results
+
+
+def main() -> None:
+    for result in asyncio.run(run()):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark of the models push and export throughput.
+
+Pushes archives of the given sizes to the server and exports them back.
+Run with:
+
+    python -m benchmarks.transfer
+"""
+import asyncio
+import json
+import time
+
+from typing import Dict, Sequence
+
+from benchmarks import harness
+
+
+MB = 1024**2
+
+
+async def run_one(client, size: int, tag: str) -> Sequence[Dict]:
+    async with harness.model_tar(size) as tarpath:
+        size = tarpath.stat().st_size
+
+        started_at = time.perf_counter()
+        await harness.push(client, tarpath, "bench", tag)
+        push_elapsed = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    resp = await client.get("/models/bench/{0}".format(tag))
+    async for _ in resp.content.iter_chunked(64*1024):
+        pass
+    export_elapsed = time.perf_counter() - started_at
+
+    await client.delete("/models/bench/{0}".format(tag))
+
+    return [dict(benchmark=name, size=size, elapsed=elapsed,
+                 megabytes_per_second=size / MB / elapsed)
+            for name, elapsed in (("push", push_elapsed),
+                                  ("export", export_elapsed))]
+
+
+async def run(sizes: Sequence[int] = (10*MB, 100*MB, 1024*MB, 2048*MB),
+              **server_args) -> Sequence[Dict]:
+    results = []
+    async with harness.serve(**server_args) as client:
+        for i, size in enumerate(sizes):
+            results.extend(await run_one(client, size, str(i)))
+    return results
+
+
+def main() -> None:
+    for result in asyncio.run(run()):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
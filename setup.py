@@ -27,7 +27,11 @@ setuptools.setup(
       "License :: OSI Approved :: MIT License",
     ],
 
-    packages=setuptools.find_packages(exclude=["tests"]),
+    # Tracing relies on the context variables propagated through asyncio
+    # tasks (3.7), archives are copied with the "copybufsize" (3.8).
+    python_requires=">=3.8",
+
+    packages=setuptools.find_packages(exclude=["tests", "benchmarks"]),
     tests_require=[
         "pytest-aiohttp>=0.3.0",
         "cryptography>=2.7",
@@ -46,6 +50,9 @@ setuptools.setup(
         "tensorflow>=2.0.0a0",
         "tinydb>=3.13.0",
     ],
+    extras_require={
+        "zstd": ["zstandard>=0.11.0"],
+    },
 
     entry_points={
         "console_scripts": ["tensorcraft = tensorcraft.shell.main:main"],
@@ -1,11 +1,12 @@
 import aiofiles
 import asyncio
 import io
+import logging
 import pathlib
 import tarfile
 import shutil
 
-from typing import IO
+from typing import AsyncIterable, IO
 
 
 def run(main):
@@ -36,6 +37,70 @@ class AsyncIO:
         return self.io.write(b)
 
 
+class SyncWriter:
+    """Synchronous writer to the asynchronous writer.
+
+    Writer is used by threads to write data into the writer running within
+    the event loop. Each write blocks the thread until the data is written,
+    so the thread does not produce data faster than it's consumed.
+    """
+
+    def __init__(self, writer, loop: asyncio.AbstractEventLoop):
+        self.writer = writer
+        self.loop = loop
+
+    def write(self, b) -> int:
+        coro = self.writer.write(bytes(b))
+        asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+        return len(b)
+
+    def flush(self) -> None:
+        pass
+
+
+class SyncReader:
+    """Synchronous reader of the asynchronous stream of chunks.
+
+    Reader is used by threads to read chunks produced within the event
+    loop. Each read blocks the thread until the next chunk is received and
+    returns the whole chunk, an empty chunk means the end of the stream.
+    """
+
+    def __init__(self, chunks: AsyncIterable[bytes],
+                 loop: asyncio.AbstractEventLoop):
+        self.chunks = chunks.__aiter__()
+        self.loop = loop
+
+    async def next_chunk(self) -> bytes:
+        async for chunk in self.chunks:
+            if chunk:
+                return chunk
+        return b""
+
+    def read(self, size=-1) -> bytes:
+        coro = self.next_chunk()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+async def spool(chunks: AsyncIterable[bytes], fileobj: IO,
+                digest=None) -> None:
+    """Write the stream of chunks into the file.
+
+    Writes are executed within the default executor, so the event loop is
+    not blocked by the disk operations.
+
+    Args:
+        chunks -- stream of chunks
+        fileobj -- destination file
+        digest -- hash object updated with each chunk
+    """
+    loop = asyncio.get_event_loop()
+    async for chunk in chunks:
+        if digest is not None:
+            digest.update(chunk)
+        await loop.run_in_executor(None, fileobj.write, chunk)
+
+
 async def extract_tar(fileobj: io.IOBase, dest: str) -> None:
     """Extract content of the TAR archive into the given directory."""
     with tarfile.open(fileobj=fileobj, mode="r") as tf:
@@ -43,8 +108,12 @@ async def extract_tar(fileobj: io.IOBase, dest: str) -> None:
 
 
 async def create_tar(fileobj: io.IOBase, path: str) -> None:
-    """Create TAR archive with the data specified by path."""
-    with tarfile.open(fileobj=fileobj, mode="w") as tf:
+    """Create TAR archive with the data specified by path.
+
+    Archive is written as a stream, so the file object is not required
+    to be seekable.
+    """
+    with tarfile.open(fileobj=fileobj, mode="w|") as tf:
         tf.add(path, arcname="")
 
 
@@ -75,6 +144,64 @@ def asynccontextmanager(func):
     return _f
 
 
+class SingleFlight:
+    """Deduplicate concurrent calls with the same key.
+
+    The first caller executes the call, while other callers with the same key
+    await the result of the first call. Neither result nor failure is
+    remembered after the call completes.
+    """
+
+    def __init__(self):
+        self.futures = {}
+
+    def __len__(self):
+        return len(self.futures)
+
+    async def do(self, key, func, *args, **kwargs):
+        future = self.futures.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self.futures[key] = future
+
+            def done(f):
+                if self.futures.get(key) is f:
+                    del self.futures[key]
+            future.add_done_callback(done)
+
+        # Cancellation of a single caller must not cancel the call awaited
+        # by the other callers.
+        return await asyncio.shield(future)
+
+
 # Prefer the run function from the standard library over the custom
 # implementation.
 run = asyncio.run if hasattr(asyncio, "run") else run
+
+
+class TaskSet:
+    """Set of tasks running in background.
+
+    Event loop keeps only weak references to the tasks, so the set keeps
+    the tasks until they complete and logs their failures, which otherwise
+    are never retrieved.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.tasks = set()
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def spawn(self, coro) -> asyncio.Future:
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.done)
+        return task
+
+    def done(self, task: asyncio.Future) -> None:
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error("Background task failed, %s", task.exception(),
+                              exc_info=task.exception())
@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import pathlib
+import re
+import shutil
+import stat
+import tarfile
+import tempfile
+import threading
+
+from typing import Dict, IO, Iterable, Sequence, Set
+
+
+# Algorithm used to address blobs by their content.
+HASH_NAME = "sha256"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_digest(s: str) -> bool:
+    """Return true when the string is a hex digest of the blob."""
+    return isinstance(s, str) and bool(_DIGEST_RE.match(s))
+
+
+def digest_file(fileobj: IO, chunk_size: int = 1024 * 1024) -> str:
+    """Return the hex digest of the file content."""
+    h = hashlib.new(HASH_NAME)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def member_path(root: pathlib.Path, name: str) -> pathlib.Path:
+    """Return the path of the named file within the root directory.
+
+    Raises ValueError when the path is outside of the root directory.
+    """
+    root = pathlib.Path(root).resolve()
+    path = root.joinpath(name).resolve()
+    if path != root and root not in path.parents:
+        raise ValueError(f"{name} is outside of the model directory")
+    return path
+
+
+class Manifest:
+    """List of files of the model and digests of their content.
+
+    Attributes:
+        files -- mapping of relative file paths to the digest and size
+    """
+
+    @classmethod
+    def from_dict(cls, **kwargs) -> "Manifest":
+        """Create manifest from the (untrusted) document.
+
+        Raises ValueError when the document is malformed.
+        """
+        files = kwargs.get("files", {})
+        if not isinstance(files, dict):
+            raise ValueError("manifest files must be an object")
+
+        self = cls()
+        for name, f in files.items():
+            if not isinstance(f, dict) or not is_digest(f.get("digest")):
+                raise ValueError(f"invalid digest of {name}")
+            self.add(name, f["digest"], int(f.get("size", 0)))
+        return self
+
+    @classmethod
+    def from_dir(cls, path: pathlib.Path) -> "Manifest":
+        """Create manifest of the regular files within the directory."""
+        path = pathlib.Path(path)
+        self = cls()
+        for file_path in sorted(path.rglob("*")):
+            if not file_path.is_file():
+                continue
+            with open(str(file_path), "rb") as f:
+                digest = digest_file(f)
+            self.add(file_path.relative_to(path).as_posix(),
+                     digest, file_path.stat().st_size)
+        return self
+
+    def __init__(self, files: Dict[str, Dict] = None):
+        self.files = files or {}
+
+    def add(self, name: str, digest: str, size: int) -> None:
+        self.files[name] = dict(digest=digest, size=size)
+
+    def digests(self) -> Sequence[str]:
+        return sorted(set(f["digest"] for f in self.files.values()))
+
+    def size(self) -> int:
+        return sum(f["size"] for f in self.files.values())
+
+    def asdict(self) -> Dict:
+        return dict(algorithm=HASH_NAME, files=self.files)
+
+
+class BlobStore:
+    """Content-addressed store of files.
+
+    Each unique file is stored once under its digest, models reference
+    blobs with hard links, so repeated pushes of the same (or partially
+    the same) model do not consume disk space. Blob is removed when it's
+    not listed in any manifest and not linked by any model.
+
+    When the file system does not support hard links, blobs are copied,
+    so the manifests remain the only source of references.
+
+    Blobs are read-only, since the content is shared between models.
+
+    Attributes:
+        path -- root directory of the store
+    """
+
+    @classmethod
+    def new(cls, path: pathlib.Path) -> "BlobStore":
+        self = cls()
+        self.path = pathlib.Path(path)
+        self.blobs_path = self.path.joinpath(HASH_NAME)
+        self.manifests_path = self.path.joinpath("manifests")
+        self.tmp_path = self.path.joinpath("tmp")
+
+        for path in (self.blobs_path, self.manifests_path, self.tmp_path):
+            path.mkdir(parents=True, exist_ok=True)
+
+        # Lock guards the blob between the existence check and linking,
+        # so the blob is not collected in the meantime.
+        self.lock = threading.Lock()
+
+        # Remove blobs partially written before the restart, and blobs
+        # uploaded for models that have never been assembled.
+        for path in self.tmp_path.iterdir():
+            path.unlink()
+        self.collect(p.name for p in self.blobs_path.glob("*/*"))
+        return self
+
+    def blob_path(self, digest: str) -> pathlib.Path:
+        if not is_digest(digest):
+            raise ValueError(f"invalid digest {digest}")
+        return self.blobs_path.joinpath(digest[:2], digest)
+
+    def manifest_path(self, uid: str) -> pathlib.Path:
+        return self.manifests_path.joinpath(f"{uid}.json")
+
+    def missing(self, digests: Iterable[str]) -> Sequence[str]:
+        """Return digests of blobs absent in the store."""
+        return [d for d in digests if not self.blob_path(d).exists()]
+
+    def put(self, fileobj: IO, dest: pathlib.Path = None,
+            chunk_size: int = 1024 * 1024) -> str:
+        """Write content of the file into the store, return its digest."""
+        h = hashlib.new(HASH_NAME)
+        with tempfile.NamedTemporaryFile(dir=self.tmp_path,
+                                         delete=False) as tmp:
+            try:
+                for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+                    h.update(chunk)
+                    tmp.write(chunk)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+
+        return self.commit(tmp.name, h.hexdigest(), dest)
+
+    def commit(self, tmp_name: str, digest: str,
+               dest: pathlib.Path = None) -> str:
+        """Move the temporary file with the given digest into the store.
+
+        The temporary file has to be created within the temporary directory
+        of the store. When the destination is given, it's linked to the
+        stored blob before the blob could be collected.
+        """
+        blob_path = self.blob_path(digest)
+
+        with self.lock:
+            if blob_path.exists():
+                os.unlink(tmp_name)
+            else:
+                os.chmod(tmp_name,
+                         stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                blob_path.parent.mkdir(exist_ok=True)
+                os.replace(tmp_name, str(blob_path))
+
+            if dest is not None:
+                self._link(blob_path, dest)
+        return digest
+
+    def link(self, digest: str, dest: pathlib.Path) -> None:
+        """Create the file referencing the blob with the given digest."""
+        with self.lock:
+            blob_path = self.blob_path(digest)
+            if not blob_path.exists():
+                raise FileNotFoundError(f"blob {digest} not found")
+            self._link(blob_path, dest)
+
+    def _link(self, blob_path: pathlib.Path, dest: pathlib.Path) -> None:
+        try:
+            os.link(str(blob_path), str(dest))
+        except OSError:
+            # File system does not support hard links, so fallback to the
+            # copy of the blob.
+            shutil.copyfile(str(blob_path), str(dest))
+
+    def extract_tar(self, fileobj: IO, dest: pathlib.Path,
+                    manifest: Manifest) -> None:
+        """Extract the TAR archive into the directory through the store.
+
+        Regular files are replaced with the links to blobs and added to the
+        manifest, other members are extracted as is.
+        """
+        dest = pathlib.Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+
+        with tarfile.open(fileobj=fileobj, mode="r") as tf:
+            for member in tf:
+                path = member_path(dest, member.name)
+
+                if not (member.isfile() or member.islnk()):
+                    tf.extract(member, str(dest))
+                    continue
+
+                path.parent.mkdir(parents=True, exist_ok=True)
+                digest = self.put(tf.extractfile(member), dest=path)
+
+                name = path.relative_to(dest.resolve()).as_posix()
+                manifest.add(name, digest, member.size)
+
+    def assemble(self, manifest: Manifest, dest: pathlib.Path) -> None:
+        """Create the directory of files linked to the stored blobs."""
+        for name, f in manifest.files.items():
+            path = member_path(dest, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.link(f["digest"], path)
+
+    def save_manifest(self, uid: str, manifest: Manifest) -> None:
+        manifest_path = self.manifest_path(uid)
+        tmp_path = manifest_path.with_suffix(".tmp")
+
+        with open(str(tmp_path), "w") as f:
+            json.dump(manifest.asdict(), f)
+        os.replace(str(tmp_path), str(manifest_path))
+
+    def load_manifest(self, uid: str) -> Manifest:
+        with open(str(self.manifest_path(uid))) as f:
+            return Manifest.from_dict(**json.load(f))
+
+    def remove_manifest(self, uid: str) -> None:
+        """Remove the manifest and blobs not referenced by other models.
+
+        Model directory must be removed before, so the links to blobs are
+        released.
+        """
+        try:
+            manifest = self.load_manifest(uid)
+        except FileNotFoundError:
+            return
+
+        self.manifest_path(uid).unlink()
+        self.collect(manifest.digests())
+
+    def referenced(self) -> Set[str]:
+        """Return digests of blobs listed in the manifests of models."""
+        digests = set()
+        for manifest_path in self.manifests_path.glob("*.json"):
+            try:
+                digests.update(self.load_manifest(manifest_path.stem)
+                               .digests())
+            except FileNotFoundError:
+                continue
+        return digests
+
+    def collect(self, digests: Iterable[str]) -> int:
+        """Remove blobs that are not referenced by any model.
+
+        Blob is referenced when it's listed in the manifest or linked by
+        the model being assembled. Returns number of removed blobs.
+        """
+        removed, referenced = 0, self.referenced()
+        for digest in digests:
+            if digest in referenced:
+                continue
+
+            blob_path = self.blob_path(digest)
+            with self.lock:
+                try:
+                    if os.stat(str(blob_path)).st_nlink > 1:
+                        continue
+                    blob_path.unlink()
+                except FileNotFoundError:
+                    continue
+            removed += 1
+        return removed
@@ -1,6 +1,9 @@
 from .model import ModelView
 from .server import ServerView
 from .experiment import ExperimentView
+from .job import JobView
+from .blob import BlobView
 
 
-__all__ = ["ModelView", "ServerView", "ExperimentView"]
+__all__ = ["ModelView", "ServerView", "ExperimentView", "JobView",
+           "BlobView"]
@@ -0,0 +1,95 @@
+import json
+
+from aiohttp import web
+
+from tensorcraft import errors
+from tensorcraft.backend import blobs
+from tensorcraft.backend import model
+from tensorcraft.backend import saving
+from tensorcraft.backend.httpapi import routing
+from tensorcraft.backend.httpapi.model import make_bad_request_response
+from tensorcraft.backend.httpapi.model import make_conflict_response
+
+
+class BlobView:
+    """View to handle delta pushes of models.
+
+    Model is pushed in three steps: the client asks which blobs of the
+    model manifest are missing, uploads only missing blobs, and then saves
+    the manifest, so the model is assembled from the stored blobs.
+
+    Attributes:
+        storage -- content-addressed storage of models
+        models -- container of models
+    """
+
+    # Size of the chunks used to stream blobs.
+    chunk_size = 64 * 1024
+
+    def __init__(self, storage: saving.ContentAddressedModelsStorage,
+                 models: model.Cache) -> None:
+        self.storage = storage
+        self.models = models
+
+    @routing.urlto("/blobs/missing")
+    async def missing(self, req: web.Request) -> web.Response:
+        """HTTP handler to return digests of the missing blobs.
+
+        Args:
+            req -- request with JSON document {"digests": [...]}
+        """
+        try:
+            body = await req.json()
+            digests = body["digests"]
+            if not all(map(blobs.is_digest, digests)):
+                raise ValueError("invalid digest")
+        except (json.decoder.JSONDecodeError,
+                KeyError, TypeError, ValueError) as e:
+            raise make_bad_request_response(text=f"invalid body, {e}")
+
+        missing = await self.storage.missing(digests)
+        return web.json_response(dict(missing=missing))
+
+    @routing.urlto("/blobs/{digest}")
+    async def save(self, req: web.Request) -> web.Response:
+        """HTTP handler to save the blob, the digest of content is verified.
+
+        Args:
+            req -- request with a blob content
+        """
+        digest = req.match_info.get("digest")
+        if not blobs.is_digest(digest):
+            raise make_bad_request_response(text=f"invalid digest {digest}")
+
+        chunks = req.content.iter_chunked(self.chunk_size)
+        try:
+            await self.storage.save_blob(digest, chunks)
+        except ValueError as e:
+            raise make_bad_request_response(text=str(e))
+
+        return web.Response(status=web.HTTPCreated.status_code)
+
+    @routing.urlto("/models/{name}/{tag}/manifest")
+    async def save_manifest(self, req: web.Request) -> web.Response:
+        """HTTP handler to save the model assembled from the stored blobs.
+
+        Args:
+            req -- request with a manifest of model files
+        """
+        name = req.match_info.get("name")
+        tag = req.match_info.get("tag")
+
+        try:
+            manifest = blobs.Manifest.from_dict(**await req.json())
+        except (json.decoder.JSONDecodeError, TypeError, ValueError) as e:
+            raise make_bad_request_response(text=f"invalid manifest, {e}")
+
+        try:
+            await self.models.save_manifest(name, tag, manifest)
+        except (errors.BlobsNotFoundError, ValueError) as e:
+            raise make_bad_request_response(text=str(e))
+        except errors.ModelError as e:
+            raise make_conflict_response(reason=e)
+
+        routing.resolved(req, name, tag)
+        return web.Response(status=web.HTTPCreated.status_code)
@@ -0,0 +1,123 @@
+import json
+import pathlib
+
+from aiohttp import web
+
+from tensorcraft import asynclib
+from tensorcraft import errors
+from tensorcraft import tensorlib
+from tensorcraft.backend import jobs
+from tensorcraft.backend import model
+from tensorcraft.backend.httpapi import routing
+from tensorcraft.backend.httpapi.model import make_bad_request_response
+from tensorcraft.backend.httpapi.model import make_not_found_response
+from tensorcraft.backend.httpapi.model import make_unavailable_response
+
+
+class JobView:
+    """View to handle actions related to offline scoring jobs.
+
+    Attributes:
+        jobs -- manager of the scoring jobs
+        models -- container of models
+    """
+
+    # Size of the chunks used to stream features and predictions.
+    chunk_size = 64 * 1024
+
+    def __init__(self, jobs: jobs.JobManager,
+                 models: model.AbstractStorage) -> None:
+        self.jobs = jobs
+        self.models = models
+
+    @routing.urlto("/models/{name}/{tag}/jobs")
+    async def create(self, req: web.Request) -> web.Response:
+        """HTTP handler to create the scoring job.
+
+        Features are either uploaded as NumPy binary file (when content
+        type is "application/x-npy"), or referenced with JSON document
+        {"path": "..."} relative to the server data root.
+
+        Args:
+            req -- request with features
+        """
+        name = req.match_info.get("name")
+        tag = req.match_info.get("tag")
+
+        if not req.can_read_body:
+            raise make_bad_request_response(text="request has no body")
+
+        # Ensure the model exists before accepting the job, the model is
+        # loaded into the cache anyway to calculate predictions.
+        try:
+            await self.models.load(name, tag)
+        except errors.NotFoundError as e:
+            raise make_not_found_response(reason=e)
+        routing.resolved(req, name, tag)
+
+        chunks, input_path = None, None
+        if req.content_type == tensorlib.NPY_CONTENT_TYPE:
+            chunks = req.content.iter_chunked(self.chunk_size)
+        else:
+            input_path = await self.read_input_path(req)
+
+        try:
+            job = await self.jobs.create(name, tag, chunks, input_path)
+        except errors.QueueFullError as e:
+            raise make_unavailable_response(reason=e)
+
+        return web.json_response(job.asdict(),
+                                 status=web.HTTPAccepted.status_code,
+                                 headers={"Location": f"/jobs/{job.id.hex}"})
+
+    async def read_input_path(self, req: web.Request) -> pathlib.Path:
+        """Read location of the features file within the data root."""
+        try:
+            body = await req.json()
+            path = pathlib.Path(body["path"])
+        except (json.decoder.JSONDecodeError, KeyError, TypeError) as e:
+            raise make_bad_request_response(text=f"invalid body, {e}")
+
+        # Paths outside of the data root are forbidden.
+        data_root = self.jobs.path.parent.resolve()
+        path = data_root.joinpath(path).resolve()
+
+        if data_root not in path.parents or not path.is_file():
+            raise make_bad_request_response(text=f"{path} is not found")
+        return path
+
+    @routing.urlto("/jobs/{id}")
+    async def get(self, req: web.Request) -> web.Response:
+        """HTTP handler to return status and progress of the job."""
+        try:
+            job = self.jobs.get(req.match_info.get("id"))
+        except errors.JobNotFoundError as e:
+            raise web.HTTPNotFound(text=str(e))
+        return web.json_response(job.asdict())
+
+    @routing.urlto("/jobs/{id}/result")
+    async def result(self, req: web.Request) -> web.StreamResponse:
+        """HTTP handler to stream predictions of the completed job.
+
+        Predictions are returned as NumPy binary file.
+        """
+        try:
+            job = self.jobs.get(req.match_info.get("id"))
+        except errors.JobNotFoundError as e:
+            raise web.HTTPNotFound(text=str(e))
+
+        if job.status != jobs.Status.Completed:
+            raise web.HTTPConflict(text=f"Job {job.id.hex} is "
+                                        f"{job.status.value}")
+
+        resp = web.StreamResponse()
+        resp.content_type = tensorlib.NPY_CONTENT_TYPE
+        resp.enable_chunked_encoding()
+        await resp.prepare(req)
+
+        result_path = self.jobs.result_path(job)
+        async for chunk in asynclib.reader(result_path, self.chunk_size):
+            await resp.write(chunk)
+
+        await resp.write_eof()
+        return resp
@@ -1,10 +1,20 @@
-import io
+import asyncio
+import base64
+import hashlib
 import json
+import numpy
+import tempfile
+import time
 
 from aiohttp import web
 from typing import Union
 
+from tensorcraft import asynclib
+from tensorcraft import compression
 from tensorcraft import errors
+from tensorcraft import metrics
+from tensorcraft import tensorlib
+from tensorcraft import tracing
 from tensorcraft.backend import model
 from tensorcraft.backend.httpapi import routing
 
@@ -37,15 +47,61 @@ def make_not_found_response(reason: errors.NotFoundError) -> web.HTTPException:
     return make_error_response(web.HTTPNotFound, reason, str(reason))
 
 
+def make_unsupported_media_type_response(
+        content_type: str) -> web.HTTPException:
+    """Return HTTP "unsupported media type" exception."""
+    text = f"unsupported content type {content_type}"
+    return make_error_response(web.HTTPUnsupportedMediaType, text=text)
+
+
+def make_unavailable_response(
+        reason: errors.QueueFullError) -> web.HTTPException:
+    """Return HTTP "service unavailable" exception."""
+    return make_error_response(web.HTTPServiceUnavailable, reason, str(reason))
+
+
+class ResponseWriter:
+    """Writer of the streamed response.
+
+    Response is prepared on the first write, so the handler is able to
+    return an error until any data is written.
+    """
+
+    def __init__(self, req: web.Request, resp: web.StreamResponse) -> None:
+        self.req = req
+        self.resp = resp
+
+    async def write(self, b: bytes) -> None:
+        if not self.resp.prepared:
+            await self.resp.prepare(self.req)
+        await self.resp.write(b)
+
+
 class ModelView:
     """View to handle actions related to models.
 
     Attributes:
         models -- container of models
+        batching -- batching of concurrent predictions
+        compression_level -- compression level of exported models, default
+                             level of the encoding when not set
     """
 
-    def __init__(self, models: model.AbstractStorage) -> None:
+    # Size of the chunks used to stream models.
+    chunk_size = 64 * 1024
+
+    # Default number of rows predicted at once within the stream.
+    stream_batch_size = 256
+
+    # Maximum size of the binary frame within the stream.
+    max_frame_size = 64 * 1024**2
+
+    def __init__(self, models: model.AbstractStorage,
+                 batching: model.Batching = None,
+                 compression_level: int = None) -> None:
         self.models = models
+        self.batching = batching or model.Batching()
+        self.compression_level = compression_level
 
     @routing.urlto("/models/{name}/{tag}")
     async def save(self, req: web.Request) -> web.Response:
@@ -60,19 +116,57 @@ class ModelView:
         if not req.can_read_body:
             raise make_bad_request_response(text="request has no body")
 
-        try:
-            model_stream = io.BytesIO(await req.read())
-            await self.models.save(name, tag, model_stream)
-        except errors.ModelError as e:
-            raise make_conflict_response(reason=e)
-
+        # Stream the archive into the temporary file within the storage
+        # root, so the memory consumption does not depend on the model size.
+        with tempfile.TemporaryFile(dir=self.models.root_path) as spool:
+            digest = hashlib.sha256()
+            chunks = req.content.iter_chunked(self.chunk_size)
+
+            # Compressed archives are decompressed as they arrive, so the
+            # digest is verified over the uncompressed archive.
+            try:
+                await asynclib.spool(compression.decompress(chunks),
+                                     spool, digest)
+            except compression.DecompressionError as e:
+                raise make_bad_request_response(text=str(e))
+            except ValueError as e:
+                raise make_error_response(web.HTTPUnsupportedMediaType,
+                                          text=str(e))
+
+            self.verify_digest(req, digest)
+            spool.seek(0)
+
+            try:
+                await self.models.save(name, tag, spool)
+            except errors.ModelError as e:
+                raise make_conflict_response(reason=e)
+
+        routing.resolved(req, name, tag)
         return web.Response(status=web.HTTPCreated.status_code)
 
+    def verify_digest(self, req: web.Request, digest) -> None:
+        """Compare the digest of the body with the "Digest" header.
+
+        Only SHA-256 digest is verified, other algorithms are ignored.
+        """
+        checksum = base64.b64encode(digest.digest()).decode()
+        for value in req.headers.getall("Digest", []):
+            for item in value.split(","):
+                algorithm, _, expected = item.strip().partition("=")
+                if algorithm.lower() != "sha-256":
+                    continue
+                if expected != checksum:
+                    text = f"digest mismatch, body sha-256 is {checksum}"
+                    raise make_bad_request_response(text=text)
+
     @routing.urlto("/models/{name}/{tag}/predict")
     async def predict(self, req: web.Request) -> web.Response:
         """HTTP handler to calculate model predictions.
 
-        Feed model with feature vectors and calculate predictions.
+        Feed model with feature vectors and calculate predictions. Feature
+        vectors are accepted either as JSON document or as NumPy binary
+        array (when content type is "application/x-npy"), the same format
+        is used for predictions when requested with "Accept" header.
 
         Args:
             req -- request with a list of feature-vectors
@@ -83,17 +177,181 @@ class ModelView:
         if not req.can_read_body:
             raise make_bad_request_response(text="request has no body")
 
+        # Inference time is tracked apart from the time spent on decoding
+        # of features and encoding of predictions. Durations are labeled
+        # once the model is found, see "routing.resolved".
+        model_label = "{0}:{1}".format(name, tag)
+
         try:
-            body = await req.json()
+            started_at = time.monotonic()
+            with tracing.span("predict.decode"):
+                x = await self.read_features(req)
+            decode_duration = time.monotonic() - started_at
+
             model = await self.models.load(name, tag)
+            routing.resolved(req, name, tag)
+
+            decode = metrics.predict_decode_duration.labels(model_label)
+            decode.observe(decode_duration)
 
-            predictions = model.predict(x=body["x"])
-        except (errors.InputShapeError, json.decoder.JSONDecodeError) as e:
+            inference = metrics.predict_inference_duration.labels(model_label)
+            with inference.time():
+                predictions = await self.batching.predict(model, x)
+        except (errors.InputShapeError,
+                json.decoder.JSONDecodeError,
+                KeyError, ValueError) as e:
             raise make_bad_request_response(text=str(e))
         except errors.NotFoundError as e:
             raise make_not_found_response(reason=e)
+        except errors.QueueFullError as e:
+            raise make_unavailable_response(reason=e)
+
+        encode = metrics.predict_encode_duration.labels(model_label)
+        with encode.time(), tracing.span("predict.encode"):
+            return self.encode_predictions(req, predictions)
+
+    def encode_predictions(self, req: web.Request, predictions):
+        """Encode predictions in the format requested with "Accept"."""
+        if tensorlib.accepts(req.headers.get("Accept", "")):
+            return web.Response(body=tensorlib.dumps(predictions),
+                                content_type=tensorlib.NPY_CONTENT_TYPE)
+        return web.json_response(dict(y=predictions.tolist()))
+
+    async def read_features(self, req: web.Request):
+        """Read feature vectors from the JSON or NumPy encoded body."""
+        if req.content_type == tensorlib.NPY_CONTENT_TYPE:
+            return tensorlib.loads(await req.read())
+
+        body = await req.json()
+        return body["x"]
+
+    @routing.urlto("/models/{name}/{tag}/predict/stream")
+    async def predict_stream(self, req: web.Request) -> web.StreamResponse:
+        """HTTP handler to calculate predictions of the streamed features.
+
+        Feature vectors are accepted either as newline-delimited JSON
+        records, or as length-prefixed NumPy binary frames (when content
+        type is "application/x-npy-frames"). Features are predicted in
+        batches of "batch_size" rows as they arrive, and predictions are
+        streamed back in the same format, so the memory used by the request
+        does not depend on the number of features.
+
+        Errors that happen after the first predictions are sent are
+        reported with an error record for JSON stream, and by terminating
+        the connection for binary stream.
+        """
+        name = req.match_info.get("name")
+        tag = req.match_info.get("tag")
+
+        try:
+            batch_size = int(req.query.get("batch_size",
+                                           self.stream_batch_size))
+            if batch_size <= 0:
+                raise ValueError(f"invalid batch size {batch_size}")
+        except ValueError as e:
+            raise make_bad_request_response(text=str(e))
 
-        return web.json_response(dict(y=predictions))
+        if req.content_type == tensorlib.NPY_FRAMES_CONTENT_TYPE:
+            reader, encode = self.read_frames(req), tensorlib.dumps_frame
+        elif req.content_type == tensorlib.NDJSON_CONTENT_TYPE:
+            reader, encode = self.read_records(req), self.dumps_records
+        else:
+            raise make_unsupported_media_type_response(req.content_type)
+
+        try:
+            model = await self.models.load(name, tag)
+        except errors.NotFoundError as e:
+            raise make_not_found_response(reason=e)
+        routing.resolved(req, name, tag)
+
+        resp = web.StreamResponse()
+        resp.content_type = req.content_type
+        resp.enable_chunked_encoding()
+        writer = ResponseWriter(req, resp)
+
+        # Next batch is read from the request while the previous batch
+        # is predicted, only these two batches are kept in the memory.
+        rebatcher = tensorlib.Rebatcher(batch_size)
+        pending = None
+
+        async def predict(x):
+            nonlocal pending
+            if pending is not None:
+                await writer.write(encode(await pending))
+            pending = asyncio.ensure_future(self.batching.predict(model, x))
+
+        # Model is used by the stream until the last batch is predicted,
+        # so it is not unloaded in between of the batches.
+        try:
+            with model.using():
+                async for x in reader:
+                    for batch in rebatcher.push(x):
+                        await predict(batch)
+
+                batch = rebatcher.flush()
+                if batch is not None:
+                    await predict(batch)
+                if pending is not None:
+                    await writer.write(encode(await pending))
+        except (errors.InputShapeError,
+                errors.QueueFullError,
+                json.decoder.JSONDecodeError,
+                KeyError, ValueError) as e:
+            if pending is not None:
+                pending.cancel()
+
+            if not resp.prepared:
+                if isinstance(e, errors.QueueFullError):
+                    raise make_unavailable_response(reason=e)
+                raise make_bad_request_response(text=str(e))
+            if encode != self.dumps_records:
+                raise
+
+            error = json.dumps(dict(error=str(e)))
+            await writer.write(error.encode() + b"\n")
+
+        if not resp.prepared:
+            await resp.prepare(req)
+        await resp.write_eof()
+        return resp
+
+    async def read_records(self, req: web.Request):
+        """Read feature vectors from newline-delimited JSON records.
+
+        Record is either a feature vector or an object with "x" attribute.
+        """
+        async for line in req.content:
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+            if isinstance(record, dict):
+                record = record["x"]
+            yield numpy.asarray([record])
+
+    async def read_frames(self, req: web.Request):
+        """Read feature vectors from length-prefixed NumPy binary frames."""
+        size = tensorlib.FRAME_HEADER.size
+        while True:
+            try:
+                header = await req.content.readexactly(size)
+            except asyncio.IncompleteReadError as e:
+                if e.partial:
+                    raise ValueError("truncated frame header")
+                return
+
+            length, = tensorlib.FRAME_HEADER.unpack(header)
+            if length > self.max_frame_size:
+                raise ValueError(f"frame exceeds {self.max_frame_size} bytes")
+
+            try:
+                yield tensorlib.loads(await req.content.readexactly(length))
+            except asyncio.IncompleteReadError:
+                raise ValueError("truncated frame")
+
+    def dumps_records(self, y: numpy.ndarray) -> bytes:
+        lines = (json.dumps(row) for row in y.tolist())
+        return "".join(line + "\n" for line in lines).encode()
 
     @routing.urlto("/models")
     async def list(self, req: web.Request) -> web.Response:
@@ -117,17 +375,43 @@ class ModelView:
             await self.models.delete(name, tag)
         except errors.NotFoundError as e:
             raise make_not_found_response(reason=e)
+        except errors.LatestTagError as e:
+            raise make_conflict_response(reason=e)
+
+        routing.resolved(req, name, tag)
         return web.Response(status=web.HTTPOk.status_code)
 
     @routing.urlto("/models/{name}/{tag}")
-    async def export(self, req: web.Request) -> web.Response:
+    async def export(self, req: web.Request) -> web.StreamResponse:
+        """HTTP handler to export the model.
+
+        The model archive is streamed to the client as it's created.
+        """
         name = req.match_info.get("name")
         tag = req.match_info.get("tag")
 
+        resp = web.StreamResponse()
+        resp.content_type = "application/x-tar"
+        resp.enable_chunked_encoding()
+
+        # Archive is compressed on the fly with the encoding accepted by
+        # the client, when any.
+        encoding = compression.negotiate(req.headers.get("Accept-Encoding",
+                                                         ""))
+        if encoding != compression.Encoding.Identity:
+            resp.headers["Content-Encoding"] = encoding.value
+
+        writer = compression.CompressWriter(ResponseWriter(req, resp),
+                                            encoding, self.compression_level)
         try:
-            writer = io.BytesIO()
             await self.models.export(name, tag, writer)
-
-            return web.Response(body=writer.getvalue())
         except errors.NotFoundError as e:
             raise make_not_found_response(reason=e)
+        routing.resolved(req, name, tag)
+
+        await writer.close()
+
+        if not resp.prepared:
+            await resp.prepare(req)
+        await resp.write_eof()
+        return resp
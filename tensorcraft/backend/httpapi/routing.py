@@ -1,8 +1,31 @@
 from typing import Callable
 
 
+# Label of the model used for requests to the models that do not exist.
+UNRESOLVED_MODEL = "unresolved"
+
+# Key of the request that holds the label of the resolved model.
+MODEL_LABEL_KEY = "model_label"
+
+
 def urlto(path: str) -> Callable:
     def _to(func):
         func.url = path
         return func
     return _to
+
+
+def resolved(req, name: str, tag: str) -> None:
+    """Label the request with the model that exists in the storage.
+
+    Only existing models are labeled, so requests to arbitrary model URLs
+    do not create an unbounded number of metric label values.
+    """
+    req[MODEL_LABEL_KEY] = "{0}:{1}".format(name, tag)
+
+
+def model_label(req) -> str:
+    """Return the label of the model resolved by the request handler."""
+    if "name" not in req.match_info:
+        return ""
+    return req.get(MODEL_LABEL_KEY, UNRESOLVED_MODEL)
@@ -2,6 +2,8 @@ import tensorcraft
 
 from aiohttp import web
 
+from tensorcraft import metrics
+from tensorcraft import tracing
 from tensorcraft.backend import model
 from tensorcraft.backend.httpapi import routing
 
@@ -9,8 +11,12 @@ from tensorcraft.backend.httpapi import routing
 class ServerView:
     """Server view to handle actions related to server."""
 
-    def __init__(self, models: model.AbstractStorage) -> None:
+    def __init__(self, models: model.AbstractStorage,
+                 batching: model.Batching = None,
+                 tracer: tracing.Tracer = None) -> None:
         self.models = models
+        self.batching = batching or model.Batching()
+        self.tracer = tracer or tracing.Tracer()
 
     @routing.urlto("/status")
     async def status(self, req: web.Request) -> web.Response:
@@ -20,4 +26,18 @@ class ServerView:
             server_version=tensorcraft.__version__,
             api_version=tensorcraft.__apiversion__,
             root_path=str(self.models.root_path),
+            batching=self.batching.stats.to_dict(),
         ))
+
+    @routing.urlto("/metrics")
+    async def metrics(self, req: web.Request) -> web.Response:
+        """Handler that returns metrics in Prometheus text format."""
+        resp = web.Response(text=metrics.default_registry.expose())
+        resp.headers["Content-Type"] = metrics.CONTENT_TYPE
+        return resp
+
+    @routing.urlto("/debug/traces")
+    async def traces(self, req: web.Request) -> web.Response:
+        """Handler that returns the most recent sampled traces."""
+        traces = [t.to_dict() for t in self.tracer.recent()]
+        return web.json_response(dict(traces=traces))
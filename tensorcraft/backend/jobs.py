@@ -0,0 +1,340 @@
+import aiojobs
+import asyncio
+import enum
+import json
+import logging
+import numpy
+import os
+import pathlib
+import shutil
+import time
+import uuid
+
+from datetime import datetime
+from numpy.lib import format as npyformat
+from typing import AsyncIterable, Dict, Sequence, Union
+
+from tensorcraft import asynclib
+from tensorcraft import errors
+from tensorcraft.backend import model
+from tensorcraft.logging import internal_logger
+
+
+class Status(enum.Enum):
+    """Status of the scoring job."""
+
+    Pending = "pending"
+    Running = "running"
+    Completed = "completed"
+    Failed = "failed"
+
+
+class Job:
+    """Offline scoring job of the features file.
+
+    Attributes:
+        id -- unique job identifier
+        name -- name of the model
+        tag -- tag of the model
+        input_path -- location of the features file, uploaded features are
+                      kept within the job directory when not set
+        status -- status of the job
+        total -- number of feature vectors
+        processed -- number of predicted feature vectors
+        error -- reason of the job failure
+        created_at -- time of the job creation
+        started_at -- time of the job start
+        finished_at -- time of the job completion (or failure)
+    """
+
+    @classmethod
+    def new(cls, name: str, tag: str, input_path: str = None) -> "Job":
+        return cls(uid=uuid.uuid4(), name=name, tag=tag,
+                   input_path=input_path,
+                   created_at=datetime.utcnow().timestamp())
+
+    @classmethod
+    def from_dict(cls, **kwargs) -> "Job":
+        return cls(uid=kwargs.pop("id"), **kwargs)
+
+    def __init__(self, uid: Union[uuid.UUID, str],
+                 name: str, tag: str,
+                 input_path: str = None,
+                 status: str = Status.Pending.value,
+                 total: int = 0, processed: int = 0, error: str = None,
+                 created_at: float = None, started_at: float = None,
+                 finished_at: float = None):
+        self.id = uuid.UUID(str(uid))
+        self.name = name
+        self.tag = tag
+        self.input_path = input_path
+        self.status = Status(status)
+        self.total = total
+        self.processed = processed
+        self.error = error
+        self.created_at = created_at
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    def __repr__(self) -> str:
+        return (f"<Job {self.id.hex} model={self.name}:{self.tag} "
+                f"status={self.status.value}>")
+
+    @property
+    def done(self) -> bool:
+        return self.status in (Status.Completed, Status.Failed)
+
+    def asdict(self) -> Dict:
+        return dict(id=self.id.hex,
+                    name=self.name,
+                    tag=self.tag,
+                    input_path=self.input_path,
+                    status=self.status.value,
+                    total=self.total,
+                    processed=self.processed,
+                    error=self.error,
+                    created_at=self.created_at,
+                    started_at=self.started_at,
+                    finished_at=self.finished_at)
+
+
+class JobManager:
+    """Run scoring jobs in a bounded pool of workers.
+
+    Each job is kept within its own directory with the state of the job
+    and the predictions, so the results survive restarts of the server.
+    Progress of the job is saved periodically, unfinished jobs are resumed
+    from the saved progress on the server start.
+
+    Jobs share the inference queue with online predictions, when the queue
+    is full, the job waits for the free space instead of failing.
+
+    Attributes:
+        path -- root directory of the jobs
+        models -- container of models
+        batching -- batching of predictions
+        batch_size -- number of feature vectors predicted at once
+        max_pending -- maximum number of jobs waiting for a worker
+    """
+
+    job_filename = "job.json"
+    input_filename = "input.npy"
+    result_filename = "result.npy"
+
+    # Interval (in seconds) of saving the progress of the running job.
+    save_interval = 10.0
+
+    # Delays (in seconds) of the retries of predictions rejected by the
+    # full inference queue, the delay doubles up to the maximum.
+    retry_delay = 0.05
+    max_retry_delay = 2.0
+
+    @classmethod
+    async def new(cls, path: pathlib.Path,
+                  models: model.AbstractStorage,
+                  batching: model.Batching = None,
+                  max_workers: int = 1,
+                  max_pending: int = 100,
+                  batch_size: int = 1024,
+                  logger: logging.Logger = internal_logger):
+        self = cls()
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.models = models
+        self.batching = batching or model.Batching()
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.logger = logger
+
+        self.scheduler = await aiojobs.create_scheduler(
+            limit=max_workers, pending_limit=max_pending)
+        self.jobs = {}
+
+        # Number of jobs with features being uploaded, they are accounted
+        # as pending, so concurrent uploads do not overshoot the limit.
+        self.creating = 0
+        self.tasks = asynclib.TaskSet(logger)
+
+        interrupted = []
+        for job_path in self.path.glob(f"*/{self.job_filename}"):
+            with open(str(job_path)) as f:
+                job = Job.from_dict(**json.load(f))
+            self.jobs[job.id] = job
+
+            if not job.done:
+                job.status = Status.Pending
+                interrupted.append(job)
+
+        # Submission waits for the free space in the queue of jobs, so
+        # the interrupted jobs are resumed in background, otherwise the
+        # server does not start until all jobs but the last queued are done.
+        if interrupted:
+            self.tasks.spawn(self.resume(interrupted))
+
+        return self
+
+    async def close(self) -> None:
+        for task in list(self.tasks.tasks):
+            task.cancel()
+        await self.scheduler.close()
+
+    async def resume(self, interrupted: Sequence[Job]) -> None:
+        for job in interrupted:
+            self.logger.info("Resuming interrupted job %s from %d of %d",
+                             job, job.processed, job.total)
+            await self.submit(job)
+
+    def job_path(self, job: Job) -> pathlib.Path:
+        return self.path.joinpath(job.id.hex)
+
+    def input_path(self, job: Job) -> pathlib.Path:
+        if job.input_path is not None:
+            return pathlib.Path(job.input_path)
+        return self.job_path(job).joinpath(self.input_filename)
+
+    def result_path(self, job: Job) -> pathlib.Path:
+        return self.job_path(job).joinpath(self.result_filename)
+
+    def get(self, uid: Union[uuid.UUID, str]) -> Job:
+        try:
+            return self.jobs[uuid.UUID(str(uid))]
+        except (KeyError, ValueError):
+            raise errors.JobNotFoundError(uid)
+
+    async def create(self, name: str, tag: str,
+                     chunks: AsyncIterable[bytes] = None,
+                     input_path: pathlib.Path = None) -> Job:
+        """Create the job of features, either uploaded or stored locally.
+
+        Raises QueueFullError when too many jobs are waiting for a worker.
+        """
+        if self.scheduler.pending_count + self.creating >= self.max_pending:
+            raise errors.QueueFullError(name, tag)
+
+        job = Job.new(name, tag, str(input_path) if input_path else None)
+        self.job_path(job).mkdir()
+
+        self.creating += 1
+        try:
+            if chunks is not None:
+                with open(str(self.input_path(job)), "wb") as fileobj:
+                    await asynclib.spool(chunks, fileobj)
+
+            self.jobs[job.id] = job
+            await self.submit(job)
+        except BaseException:
+            self.jobs.pop(job.id, None)
+            shutil.rmtree(str(self.job_path(job)), ignore_errors=True)
+            raise
+        finally:
+            self.creating -= 1
+        return job
+
+    async def submit(self, job: Job) -> None:
+        self.save(job)
+        await self.scheduler.spawn(self.run(job))
+
+    def save(self, job: Job) -> None:
+        """Persist the state of the job."""
+        job_path = self.job_path(job).joinpath(self.job_filename)
+        tmp_path = job_path.with_suffix(".tmp")
+
+        with open(str(tmp_path), "w") as f:
+            json.dump(job.asdict(), f)
+        os.replace(str(tmp_path), str(job_path))
+
+    async def run(self, job: Job) -> None:
+        loop = asyncio.get_event_loop()
+
+        job.status = Status.Running
+        job.started_at = datetime.utcnow().timestamp()
+        self.save(job)
+        self.logger.info("Started job %s", job)
+
+        try:
+            m = await self.models.load(job.name, job.tag)
+
+            # Features are memory-mapped, so only predicted batches are
+            # read into the memory.
+            x = numpy.load(str(self.input_path(job)), mmap_mode="r")
+            job.total = len(x)
+
+            with m.using():
+                await self.predict(job, m, x, loop)
+
+            job.status = Status.Completed
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.info("Job %s failed, %s", job, e)
+            job.status, job.error = Status.Failed, str(e)
+        finally:
+            job.finished_at = datetime.utcnow().timestamp()
+            self.save(job)
+
+        self.logger.info("Finished job %s", job)
+
+    async def predict_batch(self, m: model.Model,
+                            x: numpy.ndarray) -> numpy.ndarray:
+        """Predict the batch, wait while the inference queue is full.
+
+        Online predictions are rejected by the full queue, while the job
+        retries the batch later, so it does not fail on the load spikes.
+        """
+        delay = self.retry_delay
+        while True:
+            try:
+                return await self.batching.predict(m, x)
+            except errors.QueueFullError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+    def open_result(self, job: Job, total: int):
+        """Open the predictions saved by the interrupted run of the job.
+
+        Returns None when the job has to be started from the beginning.
+        """
+        result_path = self.result_path(job)
+        if not job.processed or not result_path.exists():
+            return None
+
+        try:
+            y = npyformat.open_memmap(str(result_path), mode="r+")
+        except ValueError:
+            return None
+        return y if len(y) == total else None
+
+    async def predict(self, job: Job, m: model.Model, x: numpy.ndarray,
+                      loop: asyncio.AbstractEventLoop) -> None:
+        result_path = str(self.result_path(job))
+        y = self.open_result(job, len(x))
+        if y is None:
+            job.processed = 0
+
+        saved_at = time.monotonic()
+        for i in range(job.processed, len(x), self.batch_size):
+            x_batch = await loop.run_in_executor(
+                None, numpy.array, x[i:i+self.batch_size])
+            y_batch = await self.predict_batch(m, x_batch)
+
+            # Shape of predictions is known only after the first batch.
+            if y is None:
+                y = npyformat.open_memmap(
+                    result_path, mode="w+", dtype=y_batch.dtype,
+                    shape=(len(x),) + y_batch.shape[1:])
+
+            y[i:i+len(y_batch)] = y_batch
+            job.processed += len(y_batch)
+
+            # Predictions are flushed before the progress is saved, so the
+            # resumed job never skips unsaved predictions.
+            if time.monotonic() - saved_at >= self.save_interval:
+                await loop.run_in_executor(None, y.flush)
+                self.save(job)
+                saved_at = time.monotonic()
+
+        if y is None:
+            numpy.save(result_path, numpy.empty((0,)))
+        else:
+            await loop.run_in_executor(None, y.flush)
@@ -1,20 +1,30 @@
-import aiorwlock
+import asyncio
+import collections
+import concurrent.futures
 import enum
 import contextlib
 import copy
 import io
 import logging
+import multiprocessing
 import numpy
+import os
 import pathlib
 import tensorflow as tf
+import threading
+import time
 import uuid
+import weakref
 
 from abc import ABCMeta, abstractmethod
 from datetime import datetime
-from typing import Sequence, Union
+from typing import Dict, Sequence, Union
 
+from tensorcraft import asynclib
 from tensorcraft import errors
+from tensorcraft import metrics
 from tensorcraft import signal
+from tensorcraft import tracing
 from tensorcraft.logging import internal_logger
 
 
@@ -32,6 +42,11 @@ class Tag(enum.Enum):
     Latest = "latest"
 
 
+def load_model(path: Union[str, pathlib.Path]):
+    """Load the model from the SavedModel directory."""
+    return tf.keras.experimental.load_from_saved_model(str(path))
+
+
 class NoStrategy:
     """A strategy that does nothing additional to the loaded model.
 
@@ -43,7 +58,17 @@ class NoStrategy:
 
 
 class Loader:
-    """Load the model with the specific computation strategy."""
+    """Load the model with the specific computation strategy.
+
+    Loaded model is warmed up before the use, so the first prediction does
+    not pay for the graph tracing. Model is warmed up with the sample inputs
+    shipped within the model archive as "assets.extra/warmup.npy", or with
+    generated inputs of the given batch sizes, when samples are missing.
+
+    When the executor of a process pool is given, models are loaded within
+    the worker processes instead of the current process, and every worker
+    is warmed up.
+    """
 
     strategies = {
         Strategy.No: NoStrategy,
@@ -52,7 +77,12 @@ class Loader:
             tf.distribute.experimental.MultiWorkerMirroredStrategy),
     }
 
+    # Location of the warm-up samples within the model directory.
+    warmup_path = pathlib.Path("assets.extra", "warmup.npy")
+
     def __init__(self, strategy: str,
+                 warmup_batch_sizes: Sequence[int] = (),
+                 executor: "Executor" = None,
                  logger: logging.Logger = internal_logger):
         if Strategy(strategy) not in self.strategies:
             raise ValueError("unknown strategy {0}".format(strategy))
@@ -62,14 +92,61 @@ class Loader:
 
         self.logger = logger
         self.strategy = strategy_class()
+        self.warmup_batch_sizes = warmup_batch_sizes
+        self.executor = executor
 
     def load(self, path: Union[str, pathlib.Path]):
         """Load the model by the given path."""
+        if self.executor is not None and self.executor.remote:
+            m = self.executor.load(str(path))
+            self.logger.debug("Model loaded from path %s by workers", path)
+            return m
+
         with self.strategy.scope():
-            m = tf.keras.experimental.load_from_saved_model(str(path))
+            m = load_model(path)
             self.logger.debug("Model loaded from path %s", path)
             return m
 
+    def warmup_inputs(self, m, path: Union[str, pathlib.Path]):
+        """Return inputs used to warm up the model."""
+        samples_path = pathlib.Path(path).joinpath(self.warmup_path)
+        if samples_path.exists():
+            return [numpy.load(str(samples_path), allow_pickle=False)]
+
+        # Inputs could be generated only for models with a single input
+        # of the defined shape.
+        input_shape = getattr(m, "input_shape", None)
+        if not isinstance(input_shape, tuple):
+            return []
+
+        _, *dims = input_shape
+        if not all(dims):
+            return []
+
+        return [numpy.zeros([batch_size] + dims, dtype=numpy.float32)
+                for batch_size in self.warmup_batch_sizes]
+
+    def warmup(self, m, path: Union[str, pathlib.Path]) -> float:
+        """Warm up the loaded model.
+
+        Returns:
+            Duration of the warm-up in seconds.
+        """
+        started_at = time.monotonic()
+        inputs = self.warmup_inputs(m, path)
+
+        if isinstance(m, ProcessModel):
+            m.warmup(inputs)
+        else:
+            for x in inputs:
+                m.predict(x)
+
+        duration = time.monotonic() - started_at
+        if inputs:
+            self.logger.info("Model from path %s warmed up in %.3fs "
+                             "with %d batches", path, duration, len(inputs))
+        return duration
+
 
 class Model:
     """Machine-leaning model.
@@ -80,6 +157,8 @@ class Model:
         tag -- the tag of the model
         path -- the location of the model on file system
         loader -- the model loader
+        size -- estimated size of the loaded model in bytes
+        warmup_time -- duration of the model warm-up in seconds
     """
 
     @classmethod
@@ -114,10 +193,27 @@ class Model:
         self.loader = loader
         self.path = path
         self.model = None
+        self.size = 0
+        self.warmup_time = 0.0
+
+        self.refs = 0
+        self.released = False
 
     def copy(self):
         return copy.copy(self)
 
+    def alias(self, tag: str):
+        """Return the model under another tag sharing the execution model.
+
+        Usage of the alias is tracked separately, so the release of the alias
+        does not unload the model used through the original.
+        """
+        m = self.copy()
+        m.tag = tag
+        m.refs = 0
+        m.released = False
+        return m
+
     @property
     def key(self):
         return (self.name, self.tag)
@@ -129,14 +225,58 @@ class Model:
 
     def load(self):
         """Load the execution model."""
-        self.model = self.loader.load(self.path)
+        with metrics.model_load_duration.time():
+            with tracing.span("loader.load"):
+                model = self.loader.load(self.path)
+            with tracing.span("loader.warmup"):
+                self.warmup_time = self.loader.warmup(model, self.path)
+        metrics.model_warmup_duration.observe(self.warmup_time)
+
+        self.model = model
+        self.size = self.estimate_size()
+        self.released = False
         return self
 
-    def predict(self, x):
+    def estimate_size(self) -> int:
+        """Estimate the memory size of the model.
+
+        Size is estimated as a size of the variables of the SavedModel,
+        or as a size of the whole model directory, when variables are missing.
+        """
+        path = pathlib.Path(self.path)
+        variables_path = path.joinpath("variables")
+        if variables_path.is_dir():
+            path = variables_path
+
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+    @contextlib.contextmanager
+    def using(self):
+        """Prevent unloading of the model until it's used."""
+        self.refs += 1
+        try:
+            yield self
+        finally:
+            self.refs -= 1
+            if self.released and not self.refs:
+                self.unload()
+
+    def release(self):
+        """Unload the model once it's not used anymore."""
+        self.released = True
+        if not self.refs:
+            self.unload()
+
+    def unload(self):
+        """Release the execution model."""
+        self.model = None
+
+    def validate(self, x) -> numpy.ndarray:
+        """Convert the input into an array and validate its shape."""
         if not self.model:
             raise errors.NotLoadedError(self.name, self.tag)
 
-        x = numpy.array(x)
+        x = numpy.asarray(x)
 
         # This check make sense only for models with defined input shapes
         # (for example, when the layer is Dense).
@@ -150,12 +290,464 @@ class Model:
             if expected_dims != actual_dims:
                 raise errors.InputShapeError(expected_dims, actual_dims)
 
-        return self.model.predict(x).tolist()
+        return x
+
+    def predict(self, x) -> numpy.ndarray:
+        return self.model.predict(self.validate(x))
 
     def __str__(self):
         return "{0}:{1}".format(self.name, self.tag)
 
 
+class ExecutorKind(enum.Enum):
+    """Kind of the inference executor."""
+
+    Thread = "thread"
+    Process = "process"
+
+
+# Models loaded within the worker process of the process pool executor.
+_process_models = {}
+
+
+def _process_load(path: str, live: frozenset):
+    """Load the model within the worker process, return its input shape.
+
+    Models unloaded by the parent process (missing in the live paths) are
+    released, so the worker does not keep all versions ever predicted.
+    """
+    for unused in set(_process_models) - live:
+        del _process_models[unused]
+
+    if path not in _process_models:
+        _process_models[path] = load_model(path)
+    return getattr(_process_models[path], "input_shape", None)
+
+
+def _process_warmup(path: str, inputs: Sequence[numpy.ndarray],
+                    live: frozenset, barrier, timeout: float) -> None:
+    """Load and warm up the model within the worker process.
+
+    Worker waits on the barrier until all workers are warming up the model,
+    so each worker of the pool runs exactly one warm-up.
+    """
+    _process_load(path, live)
+    for x in inputs:
+        _process_models[path].predict(x)
+
+    try:
+        barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+
+
+def _process_predict(path: str, x: numpy.ndarray,
+                     live: frozenset) -> numpy.ndarray:
+    """Calculate predictions within the worker process.
+
+    Model is loaded on the first call and kept in the memory of the process
+    until the parent process unloads it.
+    """
+    _process_load(path, live)
+    return _process_models[path].predict(x)
+
+
+class ProcessModel:
+    """Model loaded within the worker processes of the executor.
+
+    Parent process keeps only the input shape of the model to validate
+    inputs, so the model itself is not loaded into the parent memory.
+
+    Attributes:
+        path -- the location of the model on file system
+        input_shape -- input shape of the model, when it is defined
+    """
+
+    def __init__(self, executor: "Executor", path: str, input_shape=None):
+        self.executor = executor
+        self.path = path
+        if input_shape is not None:
+            self.input_shape = input_shape
+
+    def predict(self, x: numpy.ndarray) -> numpy.ndarray:
+        return self.executor.submit(self.path, x).result()
+
+    def warmup(self, inputs: Sequence[numpy.ndarray]) -> None:
+        self.executor.warmup(self.path, inputs)
+
+
+class Executor:
+    """Bounded executor of the model inference.
+
+    Inference is executed outside of the event loop, so the long predictions
+    do not block handling of other requests.
+
+    Attributes:
+        kind -- kind of the executor (thread or process pool)
+        max_workers -- number of workers in the pool
+        max_concurrency -- maximum number of concurrent predictions of
+                           a single model, unlimited when zero
+        max_queue -- maximum number of pending predictions, predictions
+                     above the limit are rejected, unlimited when zero;
+                     merged batch is a single prediction of the executor
+        models -- models loaded within the worker processes by their paths,
+                  workers release models that are not referenced anymore
+    """
+
+    # Maximum time (in seconds) a worker waits for the rest of workers to
+    # start the warm-up, e.g. while they finish long predictions.
+    warmup_timeout = 60.0
+
+    def __init__(self, kind: str = ExecutorKind.Thread.value,
+                 max_workers: int = None,
+                 max_concurrency: int = 0,
+                 max_queue: int = 0,
+                 logger: logging.Logger = internal_logger):
+        self.kind = ExecutorKind(kind)
+        if self.kind == ExecutorKind.Process:
+            # TensorFlow is not fork-safe, so workers are spawned as fresh
+            # processes rather than forked from the running server.
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers)
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.logger = logger
+
+        self.pending = 0
+        self.semaphores = {}
+
+        self.models = weakref.WeakValueDictionary()
+        self.lock = threading.Lock()
+
+        # Manager of the barriers shared by workers, started on the first
+        # warm-up of the model.
+        self.manager = None
+
+        logger.info("Using %s pool inference executor", self.kind.value)
+
+    async def close(self) -> None:
+        self.pool.shutdown(wait=False)
+        if self.manager is not None:
+            self.manager.shutdown()
+
+    @property
+    def remote(self) -> bool:
+        """True when models are executed outside of the current process."""
+        return self.kind == ExecutorKind.Process
+
+    def live(self) -> frozenset:
+        """Return paths of the models still referenced by the server."""
+        with self.lock:
+            return frozenset(self.models.keys())
+
+    def load(self, path: str) -> ProcessModel:
+        """Load the model within a worker process.
+
+        The rest of workers load the model on the warm-up, see
+        :meth:`warmup`.
+        """
+        with self.lock:
+            m = self.models.get(path)
+        if m is not None:
+            return m
+
+        future = self.pool.submit(_process_load, path, self.live() | {path})
+        m = ProcessModel(self, path, future.result())
+        with self.lock:
+            self.models[path] = m
+        return m
+
+    def warmup(self, path: str, inputs: Sequence[numpy.ndarray]) -> None:
+        """Load and warm up the model within every worker process.
+
+        The warm-up task is submitted once per worker, tasks wait on the
+        shared barrier, so none of workers runs two of them.
+        """
+        with self.lock:
+            if self.manager is None:
+                context = multiprocessing.get_context("spawn")
+                self.manager = context.Manager()
+
+        barrier = self.manager.Barrier(self.max_workers)
+        live = self.live() | {path}
+
+        futures = [self.pool.submit(_process_warmup, path, inputs, live,
+                                    barrier, self.warmup_timeout)
+                   for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, path: str,
+               x: numpy.ndarray) -> concurrent.futures.Future:
+        """Submit the prediction of the model to the worker processes."""
+        return self.pool.submit(_process_predict, path, x,
+                                self.live() | {path})
+
+    @contextlib.contextmanager
+    def enqueued(self, m: Model):
+        """Account the pending prediction of the model.
+
+        Raises QueueFullError when the queue is saturated.
+        """
+        if self.max_queue and self.pending >= self.max_queue:
+            raise errors.QueueFullError(m.name, m.tag)
+
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    @asynclib.asynccontextmanager
+    async def acquired(self, m: Model):
+        """Limit the count of concurrent predictions of the model."""
+        if not self.max_concurrency:
+            yield
+            return
+
+        semaphore, holders = self.semaphores.get(m.id, (None, 0))
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.semaphores[m.id] = (semaphore, holders + 1)
+
+        try:
+            async with semaphore:
+                yield
+        finally:
+            semaphore, holders = self.semaphores[m.id]
+            if holders > 1:
+                self.semaphores[m.id] = (semaphore, holders - 1)
+            else:
+                del self.semaphores[m.id]
+
+    async def predict(self, m: Model, x: numpy.ndarray) -> numpy.ndarray:
+        """Calculate predictions of the model within the executor."""
+        loop = asyncio.get_event_loop()
+
+        # Time spent on waiting for the concurrency slot is the difference
+        # between the executor span and the enclosed predict span.
+        with self.enqueued(m), tracing.span("executor.predict"):
+            async with self.acquired(m):
+                with tracing.span("model.predict"):
+                    if self.remote:
+                        return await asyncio.wrap_future(
+                            self.submit(str(m.path), x))
+                    return await loop.run_in_executor(
+                        self.pool, m.predict, x)
+
+
+class BatchStats:
+    """Statistics of the merged predictions.
+
+    Attributes:
+        batches -- number of executed batches
+        requests -- number of merged prediction requests
+        samples -- number of predicted samples
+        max_size -- the largest executed batch (in samples)
+        total_delay -- cumulative time requests spent in the queue
+        max_delay -- the longest time request spent in the queue
+    """
+
+    def __init__(self):
+        self.batches = 0
+        self.requests = 0
+        self.samples = 0
+        self.max_size = 0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+
+    def observe(self, size: int, delays: Sequence[float]) -> None:
+        """Account the batch of the given size and queue delays."""
+        self.batches += 1
+        self.requests += len(delays)
+        self.samples += size
+        self.max_size = max(self.max_size, size)
+        self.total_delay += sum(delays)
+        self.max_delay = max(self.max_delay, *delays)
+
+    def to_dict(self):
+        batches = self.batches or 1
+        requests = self.requests or 1
+
+        return dict(batches=self.batches,
+                    requests=self.requests,
+                    samples=self.samples,
+                    avg_batch_size=self.samples / batches,
+                    max_batch_size=self.max_size,
+                    avg_queue_delay=self.total_delay / requests,
+                    max_queue_delay=self.max_delay)
+
+
+class BatchQueue:
+    """Queue of predictions of a single model.
+
+    Concurrent predictions are merged into a single batch, which is executed
+    when either the batch is full or the oldest request waits longer than
+    the configured delay.
+    """
+
+    def __init__(self, m: Model, executor: Executor,
+                 max_batch_size: int, max_delay: float,
+                 stats: BatchStats, on_empty=None,
+                 tasks: asynclib.TaskSet = None):
+        self.model = m
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.stats = stats
+        self.on_empty = on_empty
+        self.tasks = tasks or asynclib.TaskSet(internal_logger)
+
+        self.pending = []
+        self.size = 0
+        self.timer = None
+
+    def __len__(self):
+        return len(self.pending)
+
+    async def predict(self, x: numpy.ndarray) -> numpy.ndarray:
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        # Requests of other tags of the model (e.g. "latest") are executed
+        # by the model of the queue, so it is kept loaded until they are
+        # done, even when the requests of its own tag are cancelled.
+        with self.model.using():
+            self.pending.append((x, future, loop.time()))
+            self.size += len(x)
+
+            if self.size >= self.max_batch_size:
+                self.flush()
+            elif self.timer is None:
+                self.timer = loop.call_later(self.max_delay, self.flush, True)
+
+            return await future
+
+    def take(self):
+        """Take the requests from the queue that fit into a single batch.
+
+        Request larger than the batch size is executed as a batch on its own.
+        """
+        batch, size = [], 0
+        for x, future, enqueued_at in self.pending:
+            if batch and size + len(x) > self.max_batch_size:
+                break
+            batch.append((x, future, enqueued_at))
+            size += len(x)
+
+        self.pending = self.pending[len(batch):]
+        self.size -= size
+        return batch
+
+    def flush(self, expired: bool = False) -> None:
+        """Execute full batches, or all pending requests when expired."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        # Batch is shared by several requests, so it is executed out of
+        # the trace of the request that triggered the execution.
+        while self.pending and (expired or self.size >= self.max_batch_size):
+            tracing.detached(self.tasks.spawn, self.run(self.take()))
+
+        if self.pending:
+            # Schedule the execution of the remaining requests, so the oldest
+            # of them does not wait longer than the maximum delay.
+            loop = asyncio.get_event_loop()
+            _, _, enqueued_at = self.pending[0]
+
+            delay = max(0, enqueued_at + self.max_delay - loop.time())
+            self.timer = loop.call_later(delay, self.flush, True)
+        elif self.on_empty is not None:
+            self.on_empty(self)
+
+    async def run(self, batch) -> None:
+        xs, futures, enqueued_at = zip(*batch)
+
+        now = asyncio.get_event_loop().time()
+        self.stats.observe(sum(map(len, xs)),
+                           [now - t for t in enqueued_at])
+        metrics.batch_size.observe(sum(map(len, xs)))
+
+        try:
+            x = numpy.concatenate(xs)
+            y = await self.executor.predict(self.model, x)
+            ys = numpy.split(y, numpy.cumsum([len(x) for x in xs[:-1]]))
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, y in zip(futures, ys):
+            if not future.done():
+                future.set_result(y)
+
+
+class Batching:
+    """Merge concurrent predictions of the same model into batches.
+
+    Inputs are batched only with inputs of the same model, that have the same
+    sample shape and data type.
+
+    Attributes:
+        max_batch_size -- maximum number of samples in a batch, batching is
+                          disabled when it is less or equal to one
+        max_delay -- maximum time (in seconds) request waits in the queue
+    """
+
+    def __init__(self, executor: Executor = None,
+                 max_batch_size: int = 1, max_delay: float = 0.005,
+                 logger: logging.Logger = internal_logger):
+        self.executor = executor or Executor(logger=logger)
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.logger = logger
+
+        self.stats = BatchStats()
+        self.queues = {}
+        self.tasks = asynclib.TaskSet(logger)
+
+        if self.enabled:
+            logger.info("Using batching up to %d samples within %.1fms",
+                        max_batch_size, max_delay * 1000)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1
+
+    async def predict(self, m: Model, x) -> numpy.ndarray:
+        """Calculate predictions of the model within a shared batch."""
+        with m.using(), tracing.span("batching.predict"):
+            return await self.unsafe_predict(m, x)
+
+    async def unsafe_predict(self, m: Model, x) -> numpy.ndarray:
+        """Calculate predictions without preventing the model unloading."""
+        x = m.validate(x)
+        if not self.enabled:
+            return await self.executor.predict(m, x)
+
+        key = (m.id, x.shape[1:], x.dtype)
+        if key not in self.queues:
+            def on_empty(queue):
+                if self.queues.get(key) is queue:
+                    del self.queues[key]
+
+            self.queues[key] = BatchQueue(m, self.executor,
+                                          self.max_batch_size,
+                                          self.max_delay, self.stats,
+                                          on_empty=on_empty,
+                                          tasks=self.tasks)
+
+        return await self.queues[key].predict(x)
+
+
 class AbstractStorage(metaclass=ABCMeta):
     """Storage used to persist model (a TAR archive)."""
 
@@ -231,6 +823,29 @@ class AbstractStorage(metaclass=ABCMeta):
             tag (str): Model tag.
         """
 
+    @abstractmethod
+    async def load_from_meta(self, name: str, tag: str) -> Model:
+        """Return the model without loading it.
+
+        Args:
+            name (str): Model name.
+            tag (str): Model tag.
+
+        Returns:
+            Not loaded :class:`Model`.
+        """
+
+    @abstractmethod
+    async def load_model(self, m: Model) -> Model:
+        """Load the execution model of the given model.
+
+        Args:
+            m (Model): Model returned by :meth:`load_from_meta`.
+
+        Returns:
+            Loaded :class:`Model`.
+        """
+
     @abstractmethod
     async def load(self, name: str, tag: str) -> Model:
         """Load the model.
@@ -256,28 +871,112 @@ class AbstractStorage(metaclass=ABCMeta):
         Args:
             name (str): Model name
             tag (str): Model tag
-            writer (io.IOBase): Destination writer instance.
+            writer (io.IOBase): Destination writer instance with
+                asynchronous "write" method.
         """
 
 
+class EvictionPolicy(enum.Enum):
+    """Policy of models eviction from the cache."""
+
+    LRU = "lru"
+    LFU = "lfu"
+
+
+class LRU:
+    """Evict least recently used models first."""
+
+    def __init__(self):
+        self.keys = collections.OrderedDict()
+
+    def touch(self, key) -> None:
+        self.keys[key] = None
+        self.keys.move_to_end(key)
+
+    def discard(self, key) -> None:
+        self.keys.pop(key, None)
+
+    def victims(self) -> Sequence:
+        return list(self.keys)
+
+
+class LFU:
+    """Evict least frequently used models first."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    def touch(self, key) -> None:
+        self.counts[key] += 1
+
+    def discard(self, key) -> None:
+        self.counts.pop(key, None)
+
+    def victims(self) -> Sequence:
+        return sorted(self.counts, key=self.counts.get)
+
+
 class Cache:
     """Cache of models used to speeds up models loading time.
 
     Cache saves models into the in-memory cache and delegates calls
     to the parent storage when the model is not found locally.
+
+    The number of loaded models could be bounded either by the count of
+    models or by their estimated size. When the cache is full, models are
+    evicted according to the eviction policy, except the pinned models.
+
+    When hot swap is enabled, a new version of the "latest" model is loaded
+    in background, while the previous version keeps serving predictions.
+    The previous version is released once it's not used by predictions.
     """
 
+    policies = {
+        EvictionPolicy.LRU: LRU,
+        EvictionPolicy.LFU: LFU,
+    }
+
     @classmethod
     async def new(cls,
                   storage: AbstractStorage,
                   preload: bool = False,
+                  capacity: int = 0,
+                  memory: int = 0,
+                  policy: str = EvictionPolicy.LRU.value,
+                  pinned: Sequence[str] = (),
+                  swap: bool = False,
                   logger: logging.Logger = internal_logger):
+        """Create a new cache.
+
+        Args:
+            storage -- parent storage of models
+            preload -- load all models on creation
+            capacity -- maximum count of loaded models, unlimited when zero
+            memory -- maximum size of loaded models, unlimited when zero
+            policy -- eviction policy of models
+            pinned -- models in "name:tag" format that are never evicted
+            swap -- load new versions of the "latest" model in background
+        """
         self = cls()
         self.logger = logger
         self.storage = storage
-        self.lock = aiorwlock.RWLock()
+        self.loads = asynclib.SingleFlight()
+        self.tasks = asynclib.TaskSet(logger)
         self.models = {}
 
+        self.capacity = capacity
+        self.memory = memory
+        self.policy = cls.policies[EvictionPolicy(policy)]()
+        self.pinned = frozenset(tuple(p.split(":", 1)) for p in pinned)
+
+        self.swap = swap
+        self.swapping = {}
+
+        if capacity or memory:
+            logger.info("Using %s cache of %s models and %s bytes",
+                        policy, capacity or "unlimited",
+                        memory or "unlimited")
+
         self.storage.on_save.append(self.save_to_cache)
         self.storage.on_delete.append(self.delete_from_cache)
 
@@ -300,11 +999,10 @@ class Cache:
         The call puts all retrieved models into the cache. All that models are
         not loaded. So before using them, they must be loaded.
         """
-        async with self.lock.reader_lock:
-            async for m in self.storage.all():
-                if m.key not in self.models:
-                    self.models[m.key] = m
-                yield m
+        async for m in self.storage.all():
+            if m.key not in self.models:
+                self.models[m.key] = m
+            yield m
 
     async def save(self, name: str, tag: str, model: io.IOBase) -> Model:
         """Save the model and load it into the memory.
@@ -316,9 +1014,69 @@ class Cache:
         await self.save_to_cache(m)
         return m
 
+    async def save_manifest(self, name: str, tag: str, manifest) -> Model:
+        """Save the model assembled from the blobs of the storage.
+
+        Storage is required to support content-addressed blobs.
+        """
+        m = await self.storage.save_manifest(name, tag, manifest)
+        await self.save_to_cache(m)
+        return m
+
     async def save_to_cache(self, m: Model) -> None:
-        async with self.lock.writer_lock:
-            self.models[(m.name, m.tag)] = m
+        if m.tag == Tag.Latest.value and self.swap:
+            return self.swap_latest(m)
+
+        self.models[(m.name, m.tag)] = m
+        if m.loaded:
+            self.touch(m.key)
+
+    def swap_latest(self, m: Model) -> None:
+        """Replace the "latest" model without interruption of predictions.
+
+        Loaded model replaces the previous version immediately, otherwise
+        the model is loaded in background and the previous version serves
+        predictions until the new one is ready.
+        """
+        previous = self.models.get(m.key)
+        self.swapping[m.key] = m.id
+
+        if m.loaded:
+            return self.swapped(m)
+        if previous is None or not previous.loaded:
+            self.models[m.key] = m
+
+        self.logger.info("Loading model %s in background", m)
+        self.tasks.spawn(self.swap_load(m))
+
+    async def swap_load(self, m: Model) -> None:
+        # Requests to the missing model join the background loading.
+        try:
+            loaded = await self.loads.do(m.id, self.load_model, m)
+        except Exception as e:
+            self.logger.error("Failed to load model %s in background, %s",
+                              m, e)
+            self.swapping.pop(m.key, None)
+            return
+
+        if loaded.loaded:
+            self.swapped(loaded if loaded.key == m.key else
+                         loaded.alias(m.tag))
+
+    def swapped(self, m: Model) -> None:
+        """Point the model key to the loaded model and release the previous
+        model, unless a newer version is already being loaded."""
+        if self.swapping.get(m.key) != m.id:
+            return
+        del self.swapping[m.key]
+
+        previous = self.models.get(m.key)
+        self.models[m.key] = m
+        self.touch(m.key)
+
+        if previous is not None and previous is not m:
+            self.logger.info("Model %s switched to %s", m, m.id.hex)
+            previous.release()
 
     async def delete(self, name: str, tag: str) -> None:
         # This is totally fine to loose the data from the cache but
@@ -327,23 +1085,130 @@ class Cache:
         await self.storage.delete(name, tag)
 
     async def delete_from_cache(self, name: str, tag: str) -> None:
-        async with self.lock.writer_lock:
-            key = (name, tag)
-            if key in self.models:
-                del self.models[key]
+        self.models.pop((name, tag), None)
+        self.policy.discard((name, tag))
+
+    async def resolve(self, name: str, tag: str) -> Model:
+        """Return the model from the cache or from the storage metadata.
+
+        The returned model is not necessary loaded.
+        """
+        m = self.models.get((name, tag))
+        if m is not None:
+            return m
+        return await self.storage.load_from_meta(name, tag)
+
+    async def load_model(self, m: Model) -> Model:
+        """Load the execution model, unless it is loaded under another tag.
+
+        Models with the same identifier (e.g. the "latest" tag and the
+        explicit tag) share the loaded execution model.
+        """
+        loaded = self.loaded_models().get(m.id)
+        if loaded is not None:
+            return loaded
+        return await self.storage.load_model(m)
+
+    def put_loaded(self, key, loaded: Model) -> Model:
+        """Put the loaded model into the cache under the given key."""
+        m = self.models.get(key)
+        if m is None or not m.loaded:
+            m = loaded if loaded.key == key else loaded.alias(key[1])
+            self.models[key] = m
+        self.touch(key)
+        return m
 
     async def unsafe_load(self, name: str, tag: str) -> Model:
-        """Load the model into the internal cache without acquiring a lock."""
-        key = (name, tag)
-        if ((key not in self.models) or not self.models[key].loaded):
-            self.models[key] = await self.storage.load(name, tag)
-        return self.models[key]
+        """Load the model into the internal cache.
+
+        Concurrent calls for the same model load it multiple times, use
+        :meth:`load` to load the model only once.
+        """
+        m = await self.resolve(name, tag)
+        if not m.loaded:
+            m = await self.load_model(m)
+        return self.put_loaded((name, tag), m)
 
     async def load(self, name: str, tag: str) -> Model:
-        # Load the model from the parent storage when
-        # it is missing in the cache.
-        async with self.lock.writer_lock:
-            return await self.unsafe_load(name, tag)
+        # Already loaded models are returned without acquiring any lock,
+        # since the lookup does not yield control to the event loop.
+        m = self.models.get((name, tag))
+        if m is not None and m.loaded:
+            metrics.cache_hits.inc()
+            self.policy.touch(m.key)
+            return m
+
+        metrics.cache_misses.inc()
+
+        # Load the model from the parent storage when it is missing in the
+        # cache. Concurrent requests of the same model, including requests
+        # of its other tags (e.g. "latest"), await the load started by the
+        # first request, so only one copy of the model is loaded. Loading of
+        # one model does not block predictions of others.
+        with tracing.span("cache.load"):
+            m = await self.resolve(name, tag)
+            if not m.loaded:
+                m = await self.loads.do(m.id, self.load_model, m)
+            return self.put_loaded((name, tag), m)
 
     async def export(self, name: str, tag: str, writer: io.IOBase) -> None:
         return await self.storage.export(name, tag, writer)
+
+    def touch(self, key) -> None:
+        """Mark the model as used and evict models that exceed the budget."""
+        self.policy.touch(key)
+        self.evict(keep=key)
+
+    def loaded_models(self) -> Dict[uuid.UUID, Model]:
+        """Return loaded models by their identifiers."""
+        return {m.id: m for m in self.models.values() if m.loaded}
+
+    def resident_models(self) -> Sequence[Model]:
+        """Return cached models with distinct execution models.
+
+        Tags of the model loaded through the cache (e.g. "latest" and the
+        explicit tag) share the execution model, so they are accounted once,
+        while separately loaded copies are accounted each.
+        """
+        models = {id(m.model): m for m in self.models.values() if m.loaded}
+        return list(models.values())
+
+    def overflows(self) -> bool:
+        """True when loaded models exceed the budget of the cache."""
+        models = self.resident_models()
+        if self.capacity and len(models) > self.capacity:
+            return True
+        if self.memory and sum(m.size for m in models) > self.memory:
+            return True
+        return False
+
+    def evict(self, keep=None) -> None:
+        """Evict models until they fit into the cache budget.
+
+        Args:
+            keep -- key of the model that should not be evicted
+        """
+        while self.overflows():
+            # Model with the same identifier could be referenced by a few
+            # keys, never evict the model if any of these keys is pinned.
+            protected = {self.models[k].id for k in self.pinned | {keep}
+                         if k in self.models}
+
+            for key in self.policy.victims():
+                m = self.models.get(key)
+                if m is not None and m.loaded and m.id not in protected:
+                    metrics.cache_evictions.inc()
+                    self.unload(m.id)
+                    break
+            else:
+                return
+
+    def unload(self, uid: uuid.UUID) -> None:
+        """Remove the model from the cache and release it."""
+        for key, m in list(self.models.items()):
+            if m.id == uid:
+                del self.models[key]
+                self.policy.discard(key)
+
+                self.logger.info("Evicting model %s", m)
+                m.release()
@@ -1,96 +1,389 @@
 import aiorwlock
 import asyncio
+import bisect
 import concurrent.futures
+import contextlib
+import contextvars
+import copy
+import enum
+import functools
+import hashlib
 import io
+import json
 import logging
-import operator
+import os
 import pathlib
+import sqlite3
+import tempfile
 import tinydb
 import uuid
 
 import tensorcraft.logging
 
-from typing import Dict, Coroutine, Sequence, Union
+from abc import ABCMeta, abstractmethod
+from typing import AsyncIterable, Callable, Dict, Coroutine, Iterable
+from typing import Sequence, Union
 
 from tensorcraft import arglib
 from tensorcraft import asynclib
 from tensorcraft import errors
+from tensorcraft import metrics
 from tensorcraft import signal
+from tensorcraft import tarlib
+from tensorcraft import tracing
+from tensorcraft.backend import blobs
 from tensorcraft.backend import model
 from tensorcraft.backend import experiment
 
 
-def query_by_name_and_tag(name: str, tag: str):
+class Query:
+    """Condition matching documents with the given field values.
+
+    Query could be used directly as TinyDB condition, and translated into
+    the SQL expression.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def __call__(self, document: Dict) -> bool:
+        return all(document.get(k) == v for k, v in self.fields.items())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Query) and self.fields == other.fields
+
+    def __hash__(self) -> int:
+        return hash(tuple(sorted(self.fields.items())))
+
+    def __repr__(self) -> str:
+        return f"<Query {self.fields}>"
+
+
+def query_by_name_and_tag(name: str, tag: str) -> Query:
     """Query documents by name and tag."""
-    q = tinydb.Query()
-    return (q.name == name) & (q.tag == tag)
+    return Query(name=name, tag=tag)
 
 
-def query_by_name(name: str):
+def query_by_name(name: str) -> Query:
     """Query documents by name."""
-    return tinydb.Query().name == name
+    return Query(name=name)
 
 
-def query_by_id(uid: uuid.UUID):
+def query_by_id(uid: uuid.UUID) -> Query:
     """Query the document by unique identifier."""
-    return tinydb.Query().id == uid
+    return Query(id=uuid.UUID(str(uid)).hex)
 
 
-class FsModelsMetadata:
-    """A file-based database with JSON encoding for models metadata."""
+class StorageBackend(enum.Enum):
+    """Backend of the models storage."""
 
-    @classmethod
-    def new(cls, path: pathlib.Path):
-        self = cls()
+    FS = "fs"
+    ContentAddressed = "cas"
+
+
+class MetadataBackend(enum.Enum):
+    """Backend of the models metadata database."""
+
+    JSON = "json"
+    SQLite = "sqlite"
+
+
+class VersionIndex:
+    """In-memory index of models versions ordered by the creation time.
+
+    Versions are kept in sorted lists, new versions are created later than
+    the existing ones, so they are appended to the end of the list without
+    shifting the rest of versions.
+    """
+
+    def __init__(self):
+        self.versions = {}
+        self.documents = {}
+
+    def names(self) -> Sequence[str]:
+        return list(self.versions)
+
+    def add(self, document: Dict) -> None:
+        versions = self.versions.setdefault(document["name"], [])
+        bisect.insort(versions, (document["created_at"], document["id"]))
+        self.documents[document["id"]] = document
+
+    def extend(self, documents: Iterable[Dict]) -> None:
+        """Add documents in arbitrary order, lists are sorted once."""
+        names = set()
+        for document in documents:
+            versions = self.versions.setdefault(document["name"], [])
+            versions.append((document["created_at"], document["id"]))
+            self.documents[document["id"]] = document
+            names.add(document["name"])
+
+        for name in names:
+            self.versions[name].sort()
+
+    def discard(self, document: Dict) -> None:
+        versions = self.versions.get(document["name"], [])
+        version = (document["created_at"], document["id"])
+
+        i = bisect.bisect_left(versions, version)
+        if i < len(versions) and versions[i] == version:
+            del versions[i]
+            del self.documents[document["id"]]
+        if not versions:
+            self.versions.pop(document["name"], None)
+
+    def latest(self, name: str) -> Union[Dict, None]:
+        """Return the most recently created version of the model."""
+        versions = self.versions.get(name)
+        if not versions:
+            return None
+        _, uid = versions[-1]
+        return self.documents[uid]
+
+
+class AbstractModelsMetadata(metaclass=ABCMeta):
+    """Database of models metadata.
+
+    Documents are also indexed in memory by name and creation time, so the
+    "latest" tag is resolved to the most recent version of the model without
+    persisting a separate document.
+    """
+
+    def __init__(self):
         self._rw_lock = aiorwlock.RWLock()
-        self._db = tinydb.TinyDB(path=path.joinpath("metadata.json"),
-                                 default_table="metadata")
-        return self
+        self._index = VersionIndex()
+
+    def build_index(self) -> None:
+        # Previous versions persisted the "latest" tag as a separate
+        # document, remove them in favor of the in-memory index.
+        self._remove(Query(tag=model.Tag.Latest.value))
+        self._index.extend(self._all())
+
+    def aliases(self, cond: Query) -> Sequence[Dict]:
+        """Return the "latest" documents that match the condition."""
+        tag = cond.fields.get("tag", model.Tag.Latest.value)
+        if tag != model.Tag.Latest.value:
+            return []
+
+        names = self._index.names()
+        if "name" in cond.fields:
+            names = [cond.fields["name"]]
+
+        documents = [self._index.latest(name) for name in names]
+        documents = [dict(d, tag=model.Tag.Latest.value)
+                     for d in documents if d is not None]
+        return [d for d in documents if cond(d)]
+
+    def is_alias(self, cond: Query) -> bool:
+        return cond.fields.get("tag") == model.Tag.Latest.value
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Close the database."""
+
+    @abstractmethod
+    def _search(self, cond: Query) -> Sequence[Dict]:
+        """Return persisted documents that match the condition."""
+
+    @abstractmethod
+    def _all(self) -> Sequence[Dict]:
+        """Return all persisted documents."""
+
+    @abstractmethod
+    def _insert(self, document: Dict) -> None:
+        """Persist the document."""
+
+    @abstractmethod
+    def _remove(self, cond: Query) -> None:
+        """Remove persisted documents that match the condition."""
 
     async def close(self) -> None:
         async with self._rw_lock.writer_lock:
-            self._db.close()
+            self._close()
 
-    async def get(self, cond) -> Dict:
-        async with self._rw_lock.reader_lock:
-            return self._db.get(cond)
+    async def get(self, cond: Query) -> Union[Dict, None]:
+        documents = await self.search(cond)
+        return documents[0] if documents else None
 
-    async def search(self, cond) -> Dict:
+    async def search(self, cond: Query) -> Sequence[Dict]:
         async with self._rw_lock.reader_lock:
-            return self._db.search(cond)
+            with self.timed("search"):
+                documents = [] if self.is_alias(cond) else self._search(cond)
+            return documents + self.aliases(cond)
 
     async def all(self) -> Sequence[Dict]:
         async with self._rw_lock.reader_lock:
-            return self._db.all()
+            with self.timed("all"):
+                documents = self._all()
+            return documents + self.aliases(Query())
 
     async def insert(self, document: Dict) -> None:
-        async with self._rw_lock.writer_lock:
-            self._db.insert(document)
+        if document["tag"] == model.Tag.Latest.value:
+            raise ValueError("latest tag cannot be persisted")
 
-    async def upsert(self, document: Dict, cond) -> None:
         async with self._rw_lock.writer_lock:
-            self._db.upsert(document, cond)
+            with self.timed("insert"):
+                self._insert(document)
+            self._index.add(document)
 
-    async def remove(self, cond) -> None:
+    async def remove(self, cond: Query) -> None:
         async with self._rw_lock.writer_lock:
-            self._db.remove(cond)
+            with self.timed("remove"):
+                documents = self._search(cond)
+                self._remove(cond)
 
-    async def latest(self, cond, key) -> Union[Dict, None]:
+            for document in documents:
+                self._index.discard(document)
+
+    async def latest(self, name: str) -> Union[Dict, None]:
+        """Return the most recently created version of the model."""
         async with self._rw_lock.reader_lock:
-            documents = self._db.search(cond)
+            return self._index.latest(name)
 
-            sorted(documents, key=key)
-            return documents.pop() if documents else None
+    def timed(self, operation: str):
+        """Observe the duration of the database operation."""
+        return metrics.metadata_operation_duration.labels(operation).time()
 
     @asynclib.asynccontextmanager
     async def write_locked(self):
         async with self._rw_lock.writer_lock:
-            db = FsModelsMetadata()
-            db._db = self._db
+            db = copy.copy(self)
             db._rw_lock = aiorwlock.RWLock(fast=True)
             yield db
 
 
+class FsModelsMetadata(AbstractModelsMetadata):
+    """A file-based database with JSON encoding for models metadata."""
+
+    @classmethod
+    def new(cls, path: pathlib.Path):
+        self = cls()
+        self._db = tinydb.TinyDB(path=path.joinpath("metadata.json"),
+                                 default_table="metadata")
+        self.build_index()
+        return self
+
+    def _close(self) -> None:
+        self._db.close()
+
+    def _search(self, cond: Query) -> Sequence[Dict]:
+        return self._db.search(cond)
+
+    def _all(self) -> Sequence[Dict]:
+        return self._db.all()
+
+    def _insert(self, document: Dict) -> None:
+        self._db.insert(document)
+
+    def _remove(self, cond: Query) -> None:
+        self._db.remove(cond)
+
+
+class SqliteModelsMetadata(AbstractModelsMetadata):
+    """SQLite database for models metadata.
+
+    Database is used in write-ahead logging mode, documents are indexed by
+    identifier, name and tag, name and creation time. On creation, models
+    metadata is migrated from the JSON database, when it exists.
+    """
+
+    columns = ("id", "name", "tag", "created_at")
+
+    schema = [
+        """CREATE TABLE IF NOT EXISTS metadata (
+            id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            document TEXT NOT NULL)""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS metadata_name_tag
+            ON metadata (name, tag)""",
+        """CREATE INDEX IF NOT EXISTS metadata_id
+            ON metadata (id)""",
+        """CREATE INDEX IF NOT EXISTS metadata_name_created_at
+            ON metadata (name, created_at)""",
+    ]
+
+    @classmethod
+    def new(cls, path: pathlib.Path,
+            logger: logging.Logger = tensorcraft.logging.internal_logger):
+        self = cls()
+        self._db = sqlite3.connect(str(path.joinpath("metadata.db")),
+                                   isolation_level=None,
+                                   check_same_thread=False)
+
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.schema:
+            self._db.execute(statement)
+
+        self.migrate(path.joinpath("metadata.json"), logger)
+        self.build_index()
+        return self
+
+    def migrate(self, json_path: pathlib.Path, logger: logging.Logger):
+        """Move documents from the JSON database into the SQLite database.
+
+        The JSON database is renamed after the migration, so the migration
+        is executed only once.
+        """
+        if not json_path.exists():
+            return
+
+        json_db = tinydb.TinyDB(path=json_path, default_table="metadata")
+        documents = json_db.all()
+        json_db.close()
+
+        with self._transaction():
+            for document in documents:
+                self._insert(document, "INSERT OR REPLACE")
+
+        json_path.rename(json_path.with_suffix(".json.migrated"))
+        logger.info("Migrated %d models metadata documents from %s",
+                    len(documents), json_path)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN")
+        try:
+            yield
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        else:
+            self._db.execute("COMMIT")
+
+    def _where(self, cond: Query):
+        for field in cond.fields:
+            if field not in self.columns:
+                raise ValueError(f"unknown metadata field {field}")
+
+        clause = " AND ".join(f"{f} = ?" for f in cond.fields)
+        return f"WHERE {clause}" if clause else "", tuple(cond.fields.values())
+
+    def _close(self) -> None:
+        self._db.close()
+
+    def _search(self, cond: Query) -> Sequence[Dict]:
+        clause, params = self._where(cond)
+        rows = self._db.execute(
+            f"SELECT document FROM metadata {clause}", params)
+        return [json.loads(document) for document, in rows]
+
+    def _all(self) -> Sequence[Dict]:
+        return self._search(Query())
+
+    def _insert(self, document: Dict, statement: str = "INSERT") -> None:
+        values = tuple(document[c] for c in self.columns)
+        self._db.execute(
+            f"{statement} INTO metadata "
+            f"(id, name, tag, created_at, document) VALUES (?, ?, ?, ?, ?)",
+            values + (json.dumps(document),))
+
+    def _remove(self, cond: Query) -> None:
+        clause, params = self._where(cond)
+        self._db.execute(f"DELETE FROM metadata {clause}", params)
+
+
 class FsModelsStorage(model.AbstractStorage):
     """Storage of models based on ordinary file system.
 
@@ -98,18 +391,27 @@ class FsModelsStorage(model.AbstractStorage):
     under the data root path.
     """
 
+    metadata_backends = {
+        MetadataBackend.JSON: FsModelsMetadata,
+        MetadataBackend.SQLite: SqliteModelsMetadata,
+    }
+
     @classmethod
     def new(cls,
             path: pathlib.Path,
             loader: model.Loader,
+            metadata: str = MetadataBackend.JSON.value,
+            archive_workers: int = tarlib.WORKERS,
             logger: logging.Logger = tensorcraft.logging.internal_logger):
 
         self = cls()
         logger.info("Using file storage backing engine")
+        logger.info("Using %s models metadata database", metadata)
 
         self.logger = logger
         self.loader = loader
-        self.meta = FsModelsMetadata.new(path)
+        self.archive_workers = archive_workers
+        self.meta = cls.metadata_backends[MetadataBackend(metadata)].new(path)
         self.models_path = path.joinpath("models")
 
         self._on_delete = signal.Signal()
@@ -144,7 +446,12 @@ class FsModelsStorage(model.AbstractStorage):
     def await_in_thread(self, coro: Coroutine):
         """Run the given function within an instance executor."""
         loop = asyncio.get_event_loop()
-        return loop.run_in_executor(self.executor, asynclib.run, coro)
+
+        # Copy the context, so the spans of the coroutine are recorded
+        # within the trace of the caller.
+        context = contextvars.copy_context()
+        return loop.run_in_executor(self.executor, context.run,
+                                    asynclib.run, coro)
 
     async def all(self) -> Sequence[model.Model]:
         """List available models and their tags.
@@ -162,19 +469,14 @@ class FsModelsStorage(model.AbstractStorage):
 
                 raise errors.DuplicateError(m.name, m.tag)
 
-            # Insert the model metadata, and update the latest model link.
+            # Insert the model metadata, the latest model link is resolved
+            # by the metadata database.
             await meta.insert(m.to_dict())
             await self.on_save.send(m)
 
             # Since the saving is happening right now, the latest model
             # will obviously be the current one.
-            latest = m.copy()
-
-            latest.tag = model.Tag.Latest.value
-            latest.id = m.id
-
-            latest_query = query_by_name_and_tag(latest.name, latest.tag)
-            await meta.upsert(latest.to_dict(), latest_query)
+            latest = m.alias(model.Tag.Latest.value)
             await self.on_save.send(latest)
 
     async def save(self, name: str, tag: str,
@@ -183,6 +485,17 @@ class FsModelsStorage(model.AbstractStorage):
 
         Extracts the TAR archive into the data directory.
         """
+        return await self.save_with(name, tag,
+                                    functools.partial(self.extract,
+                                                      stream=stream))
+
+    async def save_with(self, name: str, tag: str,
+                        populate: Callable[[model.Model], Coroutine]):
+        """Save the model with the files created by the given function.
+
+        The coroutine returned by the function is executed within the
+        instance executor.
+        """
         # Raise error on attempt to save model with the latest tag.
         if tag == model.Tag.Latest.value:
             raise errors.LatestTagError(name, tag)
@@ -190,8 +503,7 @@ class FsModelsStorage(model.AbstractStorage):
         m = model.Model.new(name, tag, self.models_path, self.loader)
 
         try:
-            coro = asynclib.extract_tar(fileobj=stream, dest=m.path)
-            await self.await_in_thread(coro)
+            await self.await_in_thread(populate(m))
 
             # Now load the model into the memory, to pass all validations.
             self.logger.debug("Ensuring model has correct format")
@@ -213,72 +525,198 @@ class FsModelsStorage(model.AbstractStorage):
             # The caller have to ensure atomicity of this operation.
             await self.meta.remove(query_by_id(m.id))
 
-            coro = asynclib.remove_dir(m.path, ignore_errors=True)
+            coro = self.remove_files(m, ignore_errors=True)
             await self.await_in_thread(coro)
             raise e
 
+    async def extract(self, m: model.Model, stream: io.IOBase) -> None:
+        """Extract the TAR archive of the model into the model directory."""
+        if self.archive_workers <= 1:
+            await asynclib.extract_tar(fileobj=stream, dest=m.path)
+            return
+        await tarlib.extract_tar(fileobj=stream, dest=m.path,
+                                 workers=self.archive_workers)
+
+    async def remove_files(self, m: model.Model,
+                           ignore_errors: bool = False) -> None:
+        """Remove the model directory."""
+        await asynclib.remove_dir(m.path, ignore_errors=ignore_errors)
+
     async def delete_from_meta(self, name: str, tag: str) -> model.Model:
-        # Model found, remove metadata from the database.
         async with self.meta.write_locked() as meta:
-            m = await self.load_from_meta(name, tag)
+            document = await meta.get(query_by_name_and_tag(name, tag))
+            if not document:
+                raise errors.NotFoundError(name, tag)
+
+            # Model found, remove metadata from the database.
+            m = self.build_model_from_document(document)
+            latest = await meta.latest(m.name)
 
             await meta.remove(query_by_id(m.id))
             await self.on_delete.send(m.name, m.tag)
 
-            # Remove the "latest" model link.
-            query = query_by_name_and_tag(m.name, model.Tag.Latest.value)
-            await meta.remove(query)
+            # The "latest" model link changes only when the latest model
+            # is removed, otherwise the loaded link keeps serving.
+            if latest["id"] != m.id.hex:
+                return m
+            await self.on_delete.send(m.name, model.Tag.Latest.value)
 
-            # Retrieve a new "latest" model.
-            key = operator.itemgetter("created_at")
-            document = await meta.latest(query_by_name(m.name), key)
+            # Retrieve a new "latest" model, if any version is left.
+            document = await meta.latest(m.name)
+            if document is None:
+                return m
 
             latest = self.build_model_from_document(document)
             latest.tag = model.Tag.Latest.value
-
-            await meta.insert(latest.to_dict())
-            await self.on_delete.send(m.name, model.Tag.Latest.value)
             await self.on_save.send(latest)
         return m
 
     async def delete(self, name: str, tag: str) -> None:
         """Remove model with the given name and tag."""
         if tag == model.Tag.Latest.value:
-            raise model.NotFoundError(name, tag)
+            raise errors.LatestTagError(name, tag)
 
         try:
             # Remove the model from the metadata database.
             m = await self.delete_from_meta(name, tag)
 
             # Remove the model data from the file system.
-            await self.await_in_thread(asynclib.remove_dir(m.path))
+            await self.await_in_thread(self.remove_files(m))
 
             self.logger.info("Removed model %s:%s", name, tag)
         except FileNotFoundError:
             raise errors.NotFoundError(name, tag)
 
     async def load_from_meta(self, name: str, tag: str):
-        document = await self.meta.get(query_by_name_and_tag(name, tag))
+        with tracing.span("storage.load_from_meta"):
+            document = await self.meta.get(query_by_name_and_tag(name, tag))
         if not document:
             raise errors.NotFoundError(name, tag)
         return self.build_model_from_document(document)
 
+    async def load_model(self, m: model.Model) -> model.Model:
+        with tracing.span("storage.load"):
+            return await self.await_in_thread(asyncio.coroutine(m.load)())
+
     async def load(self, name: str, tag: str) -> model.Model:
         """Load model with the given name and tag."""
-        m = await self.load_from_meta(name, tag)
-        return await self.await_in_thread(asyncio.coroutine(m.load)())
+        return await self.load_model(await self.load_from_meta(name, tag))
 
     async def export(self, name: str, tag: str, writer: io.IOBase) -> None:
         """Export serialized model.
 
-        Method writes a serialized TAR to the stream.
+        Method writes a serialized TAR to the stream as it's created.
         """
         m = await self.load_from_meta(name, tag)
 
-        coro = asynclib.create_tar(fileobj=writer, path=m.path)
+        fileobj = asynclib.SyncWriter(writer, asyncio.get_event_loop())
+        if self.archive_workers <= 1:
+            coro = asynclib.create_tar(fileobj=fileobj, path=m.path)
+        else:
+            coro = tarlib.create_tar(fileobj=fileobj, path=m.path,
+                                     workers=self.archive_workers)
         await self.await_in_thread(coro)
 
 
+class ContentAddressedModelsStorage(FsModelsStorage):
+    """Storage of models with deduplicated content.
+
+    Files of the models are stored once in the content-addressed store,
+    model directories consist of hard links to the stored blobs. So the
+    same model pushed under several tags, or the models with partially
+    changed content (e.g. only variables changed between epochs), share
+    the disk space.
+    """
+
+    @classmethod
+    def new(cls,
+            path: pathlib.Path,
+            loader: model.Loader,
+            metadata: str = MetadataBackend.JSON.value,
+            archive_workers: int = tarlib.WORKERS,
+            logger: logging.Logger = tensorcraft.logging.internal_logger):
+
+        self = super().new(path, loader, metadata, archive_workers, logger)
+        logger.info("Using content-addressed blob store")
+
+        self.blobs = blobs.BlobStore.new(path.joinpath("blobs"))
+        return self
+
+    async def extract(self, m: model.Model, stream: io.IOBase) -> None:
+        # Manifest is saved even when the extraction fails, so the blobs
+        # are collected on removal of the partially extracted model.
+        manifest = blobs.Manifest()
+        try:
+            self.blobs.extract_tar(stream, m.path, manifest)
+        finally:
+            self.blobs.save_manifest(m.id.hex, manifest)
+
+        self.logger.debug("Model %s references %d blobs of %d bytes",
+                          m, len(manifest.digests()), manifest.size())
+
+    async def assemble(self, m: model.Model,
+                       manifest: blobs.Manifest) -> None:
+        missing = self.blobs.missing(manifest.digests())
+        if missing:
+            raise errors.BlobsNotFoundError(missing)
+
+        try:
+            self.blobs.assemble(manifest, m.path)
+        finally:
+            self.blobs.save_manifest(m.id.hex, manifest)
+
+    async def save_manifest(self, name: str, tag: str,
+                            manifest: blobs.Manifest) -> model.Model:
+        """Save the model assembled from the stored blobs.
+
+        Raises BlobsNotFoundError when any blob of the manifest is missing.
+        """
+        return await self.save_with(name, tag,
+                                    functools.partial(self.assemble,
+                                                      manifest=manifest))
+
+    async def missing(self, digests: Sequence[str]) -> Sequence[str]:
+        """Return digests of blobs absent in the storage."""
+        return self.blobs.missing(digests)
+
+    async def save_blob(self, digest: str,
+                        chunks: AsyncIterable[bytes]) -> None:
+        """Save the blob with the given digest.
+
+        Raises ValueError when the content does not match the digest.
+        """
+        h = hashlib.new(blobs.HASH_NAME)
+        with tempfile.NamedTemporaryFile(dir=self.blobs.tmp_path,
+                                         delete=False) as tmp:
+            try:
+                await asynclib.spool(chunks, tmp, h)
+                if h.hexdigest() != digest:
+                    raise ValueError(f"digest mismatch, blob {blobs.HASH_NAME}"
+                                     f" is {h.hexdigest()}")
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self.executor, self.blobs.commit,
+                                   tmp.name, digest)
+
+    async def remove_files(self, m: model.Model,
+                           ignore_errors: bool = False) -> None:
+        # Links to blobs are released with the model directory, so unused
+        # blobs could be removed after that.
+        try:
+            await super().remove_files(m, ignore_errors=ignore_errors)
+        finally:
+            self.blobs.remove_manifest(m.id.hex)
+
+
+storage_backends = {
+    StorageBackend.FS: FsModelsStorage,
+    StorageBackend.ContentAddressed: ContentAddressedModelsStorage,
+}
+
+
 class FsExperimentsStorage(experiment.AbstractStorage):
 
     @classmethod
@@ -1,13 +1,11 @@
 import asyncio
 import pathlib
 import semver
-import tarfile
 import tempfile
 
 from tensorflow import keras
 from tensorflow.keras import callbacks
 
-from tensorcraft import asynclib
 from tensorcraft import client
 
 
@@ -90,12 +88,6 @@ class ModelCheckpoint(_RemoteCallback):
             model = keras.models.load_model(h5path)
             keras.experimental.export_saved_model(model, str(modelpath))
 
-            tarpath = modelpath.with_suffix(".tar")
-            with tarfile.open(str(tarpath), mode="w") as tar:
-                tar.add(str(modelpath), arcname="")
-
-            asyncreader = asynclib.reader(tarpath)
-
             # Use explicit name when set, use generated model name instead.
             name = self.name or self.model.name
             tag = semver.bump_build(self.tag)
@@ -104,7 +96,8 @@ class ModelCheckpoint(_RemoteCallback):
                 print("\nEpoch {0:5d}: pushing model {1}:{2}".
                       format(epoch + 1, name, tag))
 
-            task = self.models.push(name, tag, asyncreader)
+            # Only files changed since the previous epoch are uploaded.
+            task = self.models.push_delta(name, tag, modelpath)
             self.loop.run_until_complete(task)
 
         # Update tag after successful model publish.
@@ -1,27 +1,56 @@
 import aiohttp
 import aiohttp.web
+import asyncio
+import base64
+import collections
+import itertools
 import numpy
+import pathlib
 import ssl
+import tempfile
 
 import tensorcraft
 import tensorcraft.asynclib
 
 from tensorcraft import arglib
+from tensorcraft import compression
 from tensorcraft import errors
+from tensorcraft import tensorlib
 from tensorcraft import tlslib
+from tensorcraft.backend import blobs
 
 from types import TracebackType
-from typing import Dict, IO, NamedTuple, Optional, Sequence, Union, Type
+from typing import AsyncIterator, Dict, IO, Iterable, NamedTuple
+from typing import Optional, Sequence, Union, Type
 from urllib.parse import urlparse, urlunparse
 
 
 class Session:
+    """Long-lived pool of connections to the remote server.
+
+    The underlying HTTP session is created on the first request and reused
+    by all subsequent requests, so keep-alive connections (and TLS sessions)
+    are shared by concurrent calls until the session is closed.
+
+    Attributes:
+        service_url -- endpoint to the server
+        max_connections -- maximum number of open connections, unlimited
+                           when zero
+        max_connections_per_host -- maximum number of open connections to
+                                    a single host, unlimited when zero
+        keepalive_timeout -- time in seconds idle connections are kept open
+        dns_cache_ttl -- time in seconds resolved addresses are cached
+    """
 
     default_headers = {"Accept-Version":
                        ">={0}".format(tensorcraft.__apiversion__)}
 
     def __init__(self, service_url: str,
-                 ssl_context: Union[ssl.SSLContext, None] = None):
+                 ssl_context: Union[ssl.SSLContext, None] = None,
+                 max_connections: int = 100,
+                 max_connections_per_host: int = 0,
+                 keepalive_timeout: float = 30,
+                 dns_cache_ttl: int = 300):
 
         # Change the protocol to "HTTPS" if SSL context is given.
         if ssl_context:
@@ -30,30 +59,62 @@ class Session:
             service_url = urlunparse(["https"]+parts)
 
         self.service_url = service_url
-        self.session = aiohttp.ClientSession(
-            connector=aiohttp.TCPConnector(ssl_context=ssl_context),
-            headers=self.default_headers,
-        )
+        self.ssl_context = ssl_context
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+        self._session = None
 
     @property
     def default_headers(self) -> Dict:
         return {"Accept-Version": f">={tensorcraft.__apiversion__}"}
 
-    async def __aenter__(self) -> aiohttp.ClientSession:
-        return await self.session.__aenter__()
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """HTTP session, created again when the previous one is closed."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                ssl_context=self.ssl_context,
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl)
+
+            # Compressed models are written as is, so responses are not
+            # decompressed automatically.
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=self.default_headers,
+                auto_decompress=False)
+        return self._session
+
+    async def __aenter__(self) -> "Session":
+        return self
 
     async def __aexit__(self,
                         exc_type: Optional[Type[BaseException]],
                         exc_val: Optional[BaseException],
                         exc_tb: Optional[TracebackType]) -> None:
-        await self.session.__aexit__(exc_type, exc_val, exc_tb)
+        await self.close()
 
     def url(self, path: str) -> str:
         return f"{self.service_url}/{path}"
 
+    def request(self, method: str, path: str, **kwargs):
+        """Send the request to the server using pooled connections.
+
+        The response has to be used as an asynchronous context manager,
+        so the connection is released back to the pool.
+        """
+        return self.session.request(method, self.url(path), **kwargs)
+
     async def close(self) -> None:
         """Close the session and interrupt communication with remote server."""
-        await self.session.close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     @classmethod
     async def new(cls, **kwargs):
@@ -61,10 +122,35 @@ class Session:
             tlslib.create_client_ssl_context, **kwargs)
 
         ssl_context = tlslib.create_client_ssl_context(**ssl_args)
-        self = cls(kwargs.get("service_url"), ssl_context)
+
+        pool_args = arglib.filter_callable_arguments(cls, **kwargs)
+        pool_args.pop("ssl_context", None)
+        pool_args.pop("service_url", None)
+
+        self = cls(kwargs.get("service_url"), ssl_context, **pool_args)
         return self
 
 
+def batches(x: Union[numpy.ndarray, Iterable],
+            batch_size: int) -> Iterable[numpy.ndarray]:
+    """Split the features into batches of the given size.
+
+    Arrays (including memory-mapped) are sliced without copying, so only
+    the sent batches are read into the memory. Feature vectors from other
+    iterables are stacked into batches.
+    """
+    if isinstance(x, numpy.ndarray):
+        for i in range(0, len(x), batch_size):
+            yield x[i:i+batch_size]
+        return
+
+    iterator = iter(x)
+    batch = list(itertools.islice(iterator, batch_size))
+    while batch:
+        yield numpy.asarray(batch)
+        batch = list(itertools.islice(iterator, batch_size))
+
+
 class Model:
     """A client to do basic model operations remotely
 
@@ -75,6 +161,8 @@ class Model:
         session -- connection to remote server
     """
 
+    # Size of the chunks used to stream models.
+    chunk_size = 64 * 1024
 
     def __init__(self, session: Session) -> None:
         self.session = session
@@ -100,67 +188,197 @@ class Model:
             return errors.ModelError.from_error_code(error_code)
         return None
 
-    async def push(self, name: str, tag: str, reader: IO) -> None:
+    async def push(self, name: str, tag: str, reader: IO,
+                   digest: bytes = None,
+                   encoding: str = "identity") -> None:
         """Push the model to the server.
 
         The model is expected to be a tarball with in a SaveModel
-        format.
+        format, compressed with the given encoding. When SHA-256 digest
+        of the (uncompressed) tarball is given, server verifies the
+        integrity of the uploaded model.
+        """
+        headers = {}
+        encoding = compression.Encoding(encoding)
+        if encoding != compression.Encoding.Identity:
+            headers["Content-Encoding"] = encoding.value
+        if digest is not None:
+            headers["Digest"] = "sha-256={0}".format(
+                base64.b64encode(digest).decode())
+
+        path = f"models/{name}/{tag}"
+        async with self.session.request("PUT", path, data=reader,
+                                        headers=headers) as resp:
+            error_class = self.make_error_from_response(resp,
+                                                        success_status=201)
+            if error_class:
+                raise error_class(name, tag)
+
+    async def push_delta(self, name: str, tag: str, path: pathlib.Path,
+                         concurrency: int = 4) -> None:
+        """Push the model directory uploading only files missing on server.
+
+        The manifest of file digests is sent to the server first, then only
+        missing files are uploaded, and the model is assembled from them
+        and the files stored on the server. When the server does not support
+        delta pushes, the whole model is pushed as a tarball.
         """
-        async with self.session as session:
-            url = self.session.url(f"models/{name}/{tag}")
-            resp = await session.put(url, data=reader)
+        loop = asyncio.get_event_loop()
+        path = pathlib.Path(path)
+        manifest = await loop.run_in_executor(None, blobs.Manifest.from_dir,
+                                              path)
 
+        digests = dict(digests=manifest.digests())
+        async with self.session.request("POST", "blobs/missing",
+                                        json=digests) as resp:
+            if resp.status == 404:
+                return await self.push_dir(name, tag, path)
+
+            error_class = self.make_error_from_response(resp)
+            if error_class:
+                raise error_class(name, tag)
+            missing = set((await resp.json())["missing"])
+
+        # Any file with the given content is uploaded as the blob.
+        files = {f["digest"]: filename
+                 for filename, f in manifest.files.items()
+                 if f["digest"] in missing}
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(digest, filename):
+            async with semaphore:
+                reader = tensorcraft.asynclib.reader(path.joinpath(filename))
+                async with self.session.request("PUT", f"blobs/{digest}",
+                                                data=reader) as resp:
+                    error_class = self.make_error_from_response(
+                        resp, success_status=201)
+                    if error_class:
+                        raise error_class(name, tag)
+
+        await asyncio.gather(*[upload(d, f) for d, f in files.items()])
+
+        manifest_path = f"models/{name}/{tag}/manifest"
+        async with self.session.request("PUT", manifest_path,
+                                        json=manifest.asdict()) as resp:
             error_class = self.make_error_from_response(resp,
                                                         success_status=201)
             if error_class:
                 raise error_class(name, tag)
 
+    async def push_dir(self, name: str, tag: str, path: pathlib.Path) -> None:
+        """Push the model directory packed into the tarball."""
+        loop = asyncio.get_event_loop()
+
+        with tempfile.TemporaryDirectory() as td:
+            tarpath = pathlib.Path(td, "model.tar")
+            with open(str(tarpath), "wb") as fileobj:
+                coro = tensorcraft.asynclib.create_tar(fileobj, str(path))
+                await loop.run_in_executor(None, tensorcraft.asynclib.run,
+                                           coro)
+
+            reader = tensorcraft.asynclib.reader(tarpath)
+            await self.push(name, tag, reader)
+
     async def remove(self, name: str, tag: str) -> None:
         """Remove the model from the server.
 
         Method raises error when the model is missing.
         """
-        async with self.session as session:
-            url = self.session.url(f"models/{name}/{tag}")
-            resp = await session.delete(url)
-
+        path = f"models/{name}/{tag}"
+        async with self.session.request("DELETE", path) as resp:
             error_class = self.make_error_from_response(resp)
             if error_class:
                 raise error_class(name, tag)
 
     async def list(self):
         """List available models on the server."""
-        async with self.session as session:
-            async with session.get(self.session.url("models")) as resp:
-                return await resp.json()
+        async with self.session.request("GET", "models") as resp:
+            return await resp.json()
 
-    async def export(self, name: str, tag: str, writer: IO) -> None:
-        """Export the model from the server."""
-        async with self.session as session:
-            resp = await session.get(self.session.url(f"models/{name}/{tag}"))
+    async def export(self, name: str, tag: str, writer: IO,
+                     encoding: str = "identity",
+                     level: int = None) -> None:
+        """Export the model from the server.
 
+        The model is compressed by the server with the given encoding, when
+        the server does not support the encoding, the model is compressed
+        by the client with the given level.
+        """
+        encoding = compression.Encoding(encoding)
+        headers = {"Accept-Encoding": encoding.value}
+
+        path = f"models/{name}/{tag}"
+        async with self.session.request("GET", path,
+                                        headers=headers) as resp:
             error_class = self.make_error_from_response(resp)
             if error_class:
                 raise error_class(name, tag)
 
-            await writer.write(await resp.read())
+            chunks = resp.content.iter_chunked(self.chunk_size)
+            content_encoding = resp.headers.get("Content-Encoding",
+                                                "identity")
+            if content_encoding != encoding.value:
+                chunks = compression.compress(
+                    compression.decompress(chunks), encoding, level)
+
+            async for chunk in chunks:
+                await writer.write(chunk)
 
     async def predict(self, name: str, tag: str,
                       x_pred: Union[numpy.array, list]) -> numpy.array:
-        """Feed X array to the given model and retrieve prediction."""
-        async with self.session as session:
-            url = self.session.url(f"models/{name}/{tag}/predict")
-            async with session.post(url, json=dict(x=x_pred)) as resp:
-                error_class = self.make_error_from_response(resp)
-                if error_class:
-                    raise error_class(name, tag)
+        """Feed X array to the given model and retrieve prediction.
+
+        NumPy arrays are sent to the server in binary format, lists are
+        encoded as JSON document.
+        """
+        kwargs = dict(json=dict(x=x_pred))
+        if isinstance(x_pred, numpy.ndarray):
+            content_type = tensorlib.NPY_CONTENT_TYPE
+            kwargs = dict(data=tensorlib.dumps(x_pred),
+                          headers={"Content-Type": content_type,
+                                   "Accept": content_type})
+
+        path = f"models/{name}/{tag}/predict"
+        async with self.session.request("POST", path, **kwargs) as resp:
+            error_class = self.make_error_from_response(resp)
+            if error_class:
+                raise error_class(name, tag)
+
+            if resp.content_type == tensorlib.NPY_CONTENT_TYPE:
+                return tensorlib.loads(await resp.read())
+
+            resp_data = await resp.json()
+            return numpy.array(resp_data.get("y"))
+
+    async def predict_many(self, name: str, tag: str,
+                           x_pred: Union[numpy.ndarray, Iterable],
+                           batch_size: int = 1024,
+                           concurrency: int = 4) -> AsyncIterator:
+        """Feed features to the model in batches and retrieve predictions.
+
+        Batches are sent concurrently, at most the given number at once,
+        and predictions of the batches are yielded in order of the features.
+        """
+        loop = asyncio.get_event_loop()
+        pending = collections.deque()
+
+        try:
+            for x in batches(x_pred, batch_size):
+                if len(pending) >= concurrency:
+                    yield await pending.popleft()
+
+                x = numpy.asarray(x)
+                pending.append(loop.create_task(self.predict(name, tag, x)))
 
-                resp_data = await resp.json()
-                return numpy.array(resp_data.get("y"))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def status(self) -> Dict[str, str]:
-        async with self.session as session:
-            resp = await session.get(self.session.url("status"))
+        async with self.session.request("GET", "status") as resp:
             return await resp.json()
 
 
@@ -182,13 +400,14 @@ class Experiment:
         self.session = session
 
     async def create(self, name: str) -> None:
-        async with self.session as session:
-            await session.post(self.session.url("experiments"),
-                               json=dict(name=name))
+        async with self.session.request("POST", "experiments",
+                                        json=dict(name=name)):
+            pass
 
     async def trace(self,
                     experiment_name: str,
                     metrics: Sequence[_Metric]) -> None:
-        async with self.session as session:
-            url = self.session.url(f"experiments/{experiment_name}/epochs")
-            await session.post(url, json=dict(metrics=metrics))
+        path = f"experiments/{experiment_name}/epochs"
+        async with self.session.request("POST", path,
+                                        json=dict(metrics=metrics)):
+            pass
@@ -0,0 +1,293 @@
+import asyncio
+import enum
+import zlib
+
+from tensorcraft import asynclib
+from typing import AsyncIterable, AsyncIterator, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Encoding(enum.Enum):
+    """Content encoding of the model archive."""
+
+    Identity = "identity"
+    GZip = "gzip"
+    Zstd = "zstd"
+
+
+# Default compression levels of the encodings.
+default_levels = {
+    Encoding.GZip: 6,
+    Encoding.Zstd: 3,
+}
+
+# Maximum size of the output produced by a single decompression step, so
+# a small crafted input is not expanded into gigabytes at once.
+MAX_OUTPUT_SIZE = 1024 * 1024
+
+# Chunks below the size are compressed within the event loop, larger ones
+# are compressed by the executor, so the loop is not stalled. Writer
+# buffers small writes up to the size.
+_INLINE_SIZE = 64 * 1024
+
+_magic_numbers = {
+    Encoding.GZip: b"\x1f\x8b",
+    Encoding.Zstd: b"\x28\xb5\x2f\xfd",
+}
+
+
+class DecompressionError(Exception):
+    """Exception raised when the compressed content is malformed."""
+
+
+_decompression_errors = (zlib.error,)
+if zstandard is not None:
+    _decompression_errors += (zstandard.ZstdError,)
+
+
+def available() -> list:
+    """Return the encodings supported by the installed libraries.
+
+    Zstandard is supported only when "zstandard" package is installed.
+    """
+    encodings = [Encoding.Zstd] if zstandard is not None else []
+    return encodings + [Encoding.GZip, Encoding.Identity]
+
+
+def sniff(head: bytes) -> Encoding:
+    """Detect the encoding of the content by its magic number."""
+    for encoding, magic in _magic_numbers.items():
+        if head.startswith(magic):
+            return encoding
+    return Encoding.Identity
+
+
+def negotiate(accept_encoding: str) -> Encoding:
+    """Choose the preferred available encoding of the "Accept-Encoding".
+
+    Encodings are chosen by the quality value, and then by the order of
+    available encodings, so zstd is preferred over gzip.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        param, _, value = params.strip().partition("=")
+        if param.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+
+    candidates = [e for e in available()
+                  if accepted.get(e.value, accepted.get("*", 0)) > 0]
+    if not candidates:
+        return Encoding.Identity
+
+    return max(candidates, key=lambda e: accepted.get(e.value,
+                                                      accepted.get("*", 0)))
+
+
+class _Identity:
+
+    def compress(self, b: bytes) -> bytes:
+        return b
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def compressor(encoding: Encoding, level: int = None):
+    """Return the object with "compress" and "flush" methods.
+
+    Levels above the maximum level of gzip (9) are lowered to the maximum.
+    """
+    encoding = Encoding(encoding)
+    level = default_levels.get(encoding) if level is None else level
+
+    if encoding == Encoding.GZip:
+        return zlib.compressobj(min(level, 9), zlib.DEFLATED,
+                                16 + zlib.MAX_WBITS)
+    if encoding == Encoding.Zstd:
+        if zstandard is None:
+            raise ValueError("zstd compression requires zstandard package")
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    return _Identity()
+
+
+class _GZipDecompressor:
+    """Decompressor of the gzip stream with the bounded output.
+
+    Stream might consist of several members (e.g. concatenated archives),
+    each member is decompressed by the new decompressor.
+    """
+
+    def __init__(self):
+        self.decompressobj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def pieces(self, b: bytes) -> Iterator[bytes]:
+        """Decompress the chunk into pieces of at most MAX_OUTPUT_SIZE."""
+        while True:
+            if self.decompressobj.eof:
+                b = self.decompressobj.unused_data + b
+                if not b:
+                    return
+                self.decompressobj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+            piece = self.decompressobj.decompress(b, MAX_OUTPUT_SIZE)
+            if piece:
+                yield piece
+
+            # Output of the full piece might be continued even when the
+            # input is consumed.
+            b = self.decompressobj.unconsumed_tail
+            if not self.decompressobj.eof and not b and (
+                    len(piece) < MAX_OUTPUT_SIZE):
+                return
+
+    def flush(self) -> None:
+        if not self.decompressobj.eof:
+            raise zlib.error("gzip stream is truncated")
+
+
+async def _prepend(head: bytes,
+                   chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    if head:
+        yield head
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _identity_pieces(chunks: AsyncIterator[bytes]) -> bytes:
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _gzip_pieces(chunks: AsyncIterator[bytes]) -> bytes:
+    d = _GZipDecompressor()
+    async for chunk in chunks:
+        for piece in d.pieces(chunk):
+            yield piece
+    d.flush()
+
+
+async def _zstd_pieces(chunks: AsyncIterator[bytes]) -> bytes:
+    """Decompress the zstd stream by the executor.
+
+    Streaming decompressor of zstandard does not limit the output of the
+    input chunk, so the stream is decompressed by the reader that returns
+    at most the requested size, and pulls input chunks from the event loop
+    as needed.
+    """
+    if zstandard is None:
+        raise ValueError("zstd decompression requires zstandard package")
+
+    loop = asyncio.get_event_loop()
+    source = asynclib.SyncReader(chunks, loop)
+    reader = zstandard.ZstdDecompressor().stream_reader(
+        source, read_across_frames=True)
+
+    while True:
+        piece = await loop.run_in_executor(None, reader.read,
+                                           MAX_OUTPUT_SIZE)
+        if not piece:
+            return
+        yield piece
+
+
+_decompressors = {
+    Encoding.Identity: _identity_pieces,
+    Encoding.GZip: _gzip_pieces,
+    Encoding.Zstd: _zstd_pieces,
+}
+
+
+async def _compress(c, b: bytes) -> bytes:
+    """Compress the chunk, large chunks are compressed by the executor."""
+    if len(b) < _INLINE_SIZE:
+        return c.compress(b)
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, c.compress, b)
+
+
+async def compress(chunks: AsyncIterable[bytes],
+                   encoding: Encoding, level: int = None) -> bytes:
+    """Compress the stream of chunks."""
+    c = compressor(encoding, level)
+    async for chunk in chunks:
+        chunk = await _compress(c, chunk)
+        if chunk:
+            yield chunk
+
+    chunk = c.flush()
+    if chunk:
+        yield chunk
+
+
+async def decompress(chunks: AsyncIterable[bytes]) -> bytes:
+    """Decompress the stream of chunks.
+
+    Encoding is detected by the magic number of the content, so the content
+    already decoded by the HTTP layer passes as is. Chunks are decompressed
+    into pieces of at most MAX_OUTPUT_SIZE bytes.
+
+    Raises:
+        DecompressionError -- when the content is malformed
+        ValueError -- when the encoding is not supported
+    """
+    chunks, head = chunks.__aiter__(), b""
+    while len(head) < max(map(len, _magic_numbers.values())):
+        try:
+            head += await chunks.__anext__()
+        except StopAsyncIteration:
+            break
+
+    encoding = sniff(head)
+    pieces = _decompressors[encoding](_prepend(head, chunks))
+    try:
+        async for piece in pieces:
+            yield piece
+    except _decompression_errors as e:
+        raise DecompressionError(f"invalid {encoding.value} content, {e}")
+
+
+class CompressWriter:
+    """Writer that compresses data written to the asynchronous writer.
+
+    Small writes (e.g. records of the TAR archive) are buffered, and the
+    buffer is compressed by the executor, so the event loop keeps serving
+    other requests.
+    """
+
+    def __init__(self, writer, encoding: Encoding, level: int = None):
+        self.writer = writer
+        self.compressor = compressor(encoding, level)
+        self.buffer = bytearray()
+
+    async def write(self, b: bytes) -> None:
+        self.buffer += b
+        if len(self.buffer) >= _INLINE_SIZE:
+            await self.drain()
+
+    async def drain(self) -> None:
+        """Compress the buffered data and write it to the writer."""
+        if not self.buffer:
+            return
+
+        b, self.buffer = bytes(self.buffer), bytearray()
+        loop = asyncio.get_event_loop()
+        b = await loop.run_in_executor(None, self.compressor.compress, b)
+        if b:
+            await self.writer.write(b)
+
+    async def close(self) -> None:
+        await self.drain()
+        b = self.compressor.flush()
+        if b:
+            await self.writer.write(b)
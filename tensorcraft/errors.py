@@ -72,3 +72,32 @@ class LatestTagError(ModelError):
 
     def __str__(self):
         return f"Model {self.name}:{self.tag} cannot be latest"
+
+
+class QueueFullError(ModelError):
+    """Exception raised when inference queue of the model is saturated."""
+
+    error_code = "Model Queue Full"
+
+    def __str__(self):
+        return f"Model {self.name}:{self.tag} inference queue is full"
+
+
+class JobNotFoundError(Exception):
+    """Exception raised on missing scoring job."""
+
+    def __init__(self, uid):
+        self.uid = uid
+
+    def __str__(self):
+        return f"Job {self.uid} not found"
+
+
+class BlobsNotFoundError(Exception):
+    """Exception raised on attempt to assemble model from missing blobs."""
+
+    def __init__(self, digests):
+        self.digests = digests
+
+    def __str__(self):
+        return f"Blobs {', '.join(self.digests)} not found"
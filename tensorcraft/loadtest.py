@@ -0,0 +1,201 @@
+import asyncio
+import collections
+import numpy
+import time
+
+from typing import Dict, Sequence
+
+from tensorcraft import client
+from tensorcraft import tensorlib
+
+
+def parse_shape(s: str) -> Sequence[int]:
+    """Parse comma-separated shape of the tensor, e.g. "8,28,28"."""
+    try:
+        shape = tuple(int(d) for d in s.split(","))
+    except ValueError:
+        raise ValueError(f"invalid shape {s}")
+    if not shape or any(d <= 0 for d in shape):
+        raise ValueError(f"invalid shape {s}")
+    return shape
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, float]:
+    """Return latency percentiles in milliseconds."""
+    if not len(values):
+        return {}
+
+    values = numpy.asarray(values) * 1000
+    points = dict(p50=50, p90=90, p99=99, p999=99.9)
+    result = {k: float(numpy.percentile(values, p))
+              for k, p in points.items()}
+    return dict(result, mean=float(values.mean()), max=float(values.max()))
+
+
+class Recorder:
+    """Latencies and errors of the load test requests.
+
+    Latency measured from the moment the request was sent hides the time
+    the request was delayed by the slow responses before it (coordinated
+    omission). Corrected latencies account this delay.
+
+    Attributes:
+        latencies -- latencies measured from the request sending
+        corrected -- latencies corrected for the coordinated omission
+        errors -- count of errors by reason
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.corrected = []
+        self.errors = collections.Counter()
+
+    def record(self, latency: float, corrected: float = None) -> None:
+        self.latencies.append(latency)
+        self.corrected.append(latency if corrected is None else corrected)
+
+    def record_error(self, reason: str) -> None:
+        self.errors[reason] += 1
+
+    def backfill(self, expected_interval: float) -> None:
+        """Correct latencies of the closed-loop load.
+
+        Each request slower than the expected interval delayed requests
+        that would have been sent in the meantime, so latencies of these
+        missing requests are added, like in HdrHistogram.
+        """
+        if expected_interval <= 0:
+            return
+
+        corrected = []
+        for latency in self.latencies:
+            corrected.append(latency)
+
+            missing = latency - expected_interval
+            while missing > 0:
+                corrected.append(missing)
+                missing -= expected_interval
+        self.corrected = corrected
+
+    def report(self, elapsed: float) -> Dict:
+        requests = len(self.latencies) + sum(self.errors.values())
+        errors = sum(self.errors.values())
+
+        return dict(requests=requests,
+                    errors=dict(self.errors),
+                    error_rate=errors / requests if requests else 0.0,
+                    elapsed=elapsed,
+                    throughput=requests / elapsed if elapsed else 0.0,
+                    latency=percentiles(self.latencies),
+                    corrected_latency=percentiles(self.corrected))
+
+
+class LoadTest:
+    """Generator of the predictions load.
+
+    Load is generated either at the fixed rate of requests (open loop) or
+    by the fixed number of concurrent clients (closed loop).
+
+    Attributes:
+        session -- pooled connection to the server
+        name -- name of the model
+        tag -- tag of the model
+        shape -- shape of the features tensor sent in each request
+        rate -- number of requests per second, closed loop when zero
+        concurrency -- number of concurrent clients of the closed loop
+        duration -- duration of the load test in seconds
+        expected_interval -- expected interval between requests of a single
+                             client of the closed loop, used to correct
+                             latencies, median latency when not given
+    """
+
+    def __init__(self, session: client.Session, name: str, tag: str,
+                 shape: Sequence[int] = (1, 1), dtype: str = "float32",
+                 rate: float = 0, concurrency: int = 1,
+                 duration: float = 10,
+                 expected_interval: float = None):
+        self.session = session
+        self.name = name
+        self.tag = tag
+        self.rate = rate
+        self.concurrency = concurrency
+        self.duration = duration
+        self.expected_interval = expected_interval
+
+        x = numpy.random.uniform(size=shape).astype(dtype)
+        self.body = tensorlib.dumps(x)
+        self.headers = {"Content-Type": tensorlib.NPY_CONTENT_TYPE,
+                        "Accept": tensorlib.NPY_CONTENT_TYPE}
+
+        self.recorder = Recorder()
+
+    @property
+    def path(self) -> str:
+        return f"models/{self.name}/{self.tag}/predict"
+
+    async def send(self, intended_at: float = None) -> None:
+        started_at = time.perf_counter()
+        try:
+            async with self.session.request("POST", self.path,
+                                            data=self.body,
+                                            headers=self.headers) as resp:
+                await resp.read()
+        except Exception as e:
+            self.recorder.record_error(type(e).__name__)
+            return
+
+        finished_at = time.perf_counter()
+        if resp.status != 200:
+            self.recorder.record_error(str(resp.status))
+            return
+
+        corrected = None
+        if intended_at is not None:
+            corrected = finished_at - intended_at
+        self.recorder.record(finished_at - started_at, corrected)
+
+    async def run_rate(self) -> None:
+        """Send requests on schedule regardless of the responses."""
+        loop = asyncio.get_event_loop()
+        started_at = time.perf_counter()
+        tasks = []
+
+        for i in range(int(self.rate * self.duration)):
+            # Latency is measured from the scheduled time, so the delay of
+            # the overloaded client is accounted as well.
+            intended_at = started_at + i / self.rate
+            delay = intended_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(loop.create_task(self.send(intended_at)))
+
+        await asyncio.gather(*tasks)
+
+    async def run_concurrency(self) -> None:
+        """Send requests from concurrent clients one after another."""
+        deadline = time.perf_counter() + self.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self.send()
+
+        await asyncio.gather(*[worker() for _ in range(self.concurrency)])
+
+        expected_interval = self.expected_interval
+        if expected_interval is None and self.recorder.latencies:
+            expected_interval = float(numpy.median(self.recorder.latencies))
+        if expected_interval:
+            self.recorder.backfill(expected_interval)
+
+    async def run(self) -> Dict:
+        started_at = time.perf_counter()
+        if self.rate:
+            await self.run_rate()
+        else:
+            await self.run_concurrency()
+        elapsed = time.perf_counter() - started_at
+
+        report = self.recorder.report(elapsed)
+        return dict(report, model=f"{self.name}:{self.tag}",
+                    rate=self.rate,
+                    concurrency=None if self.rate else self.concurrency)
@@ -0,0 +1,292 @@
+import contextlib
+import math
+import threading
+import time
+
+from typing import Callable, Dict, Sequence, Tuple
+
+
+# Media type of the metrics exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return (str(value).replace("\\", r"\\")
+            .replace("\n", r"\n")
+            .replace('"', r'\"'))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """Metric with a set of children, one child per labels values."""
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self.lock = threading.Lock()
+        self.children = {}
+
+        (registry or default_registry).register(self)
+
+    def labels(self, *labelvalues, **labelkwargs):
+        if labelkwargs:
+            labelvalues = tuple(labelkwargs[n] for n in self.labelnames)
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        labelvalues = tuple(str(v) for v in labelvalues)
+        with self.lock:
+            if labelvalues not in self.children:
+                self.children[labelvalues] = self.new_child()
+            return self.children[labelvalues]
+
+    def new_child(self):
+        raise NotImplementedError()
+
+    def samples(self) -> Sequence[Tuple[str, Dict[str, str], float]]:
+        with self.lock:
+            children = list(self.children.items())
+
+        samples = []
+        for labelvalues, child in children:
+            labels = dict(zip(self.labelnames, labelvalues))
+            samples.extend(child.samples(self.name, labels))
+        return samples
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append("{0}{1} {2}".format(
+                name, _format_labels(labels), _format_value(value)))
+        return "\n".join(lines)
+
+
+class _CounterChild:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("counter can only be incremented")
+        with self.lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        return [(name + "_total", labels, self.value)]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float) -> None:
+        with self.lock:
+            self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Calculate the value of the gauge on each exposition."""
+        self.function = function
+
+    def samples(self, name, labels):
+        value = self.function() if self.function else self.value
+        return [(name, labels, value)]
+
+
+class Gauge(_Metric):
+    """Value that could go up and down."""
+
+    kind = "gauge"
+
+    def new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.labels().set_function(function)
+
+
+class _HistogramChild:
+
+    def __init__(self, buckets: Sequence[float]):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        with self.lock:
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextlib.contextmanager
+    def time(self):
+        """Observe the duration of the block in seconds."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at)
+
+    def samples(self, name, labels):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            bucket_labels = dict(labels, le=_format_value(bound))
+            samples.append((name + "_bucket", bucket_labels, cumulative))
+
+        samples.append((name + "_sum", labels, total))
+        samples.append((name + "_count", labels, cumulative))
+        return samples
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: "Registry" = None):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+
+class Registry:
+    """Collection of metrics exposed together."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: _Metric) -> None:
+        self.metrics.append(metric)
+
+    def expose(self) -> str:
+        """Render metrics in Prometheus text exposition format."""
+        return "\n".join(m.expose() for m in self.metrics) + "\n"
+
+
+default_registry = Registry()
+
+
+http_requests = Counter(
+    "tensorcraft_http_requests",
+    "Count of handled HTTP requests.",
+    ["route", "method", "model", "status"])
+
+http_request_duration = Histogram(
+    "tensorcraft_http_request_duration_seconds",
+    "Duration of HTTP requests handling.",
+    ["route", "method", "model"])
+
+predict_decode_duration = Histogram(
+    "tensorcraft_predict_decode_duration_seconds",
+    "Duration of features decoding.",
+    ["model"])
+
+predict_inference_duration = Histogram(
+    "tensorcraft_predict_inference_duration_seconds",
+    "Duration of predictions calculation including the queue time.",
+    ["model"])
+
+predict_encode_duration = Histogram(
+    "tensorcraft_predict_encode_duration_seconds",
+    "Duration of predictions encoding.",
+    ["model"])
+
+batch_size = Histogram(
+    "tensorcraft_batch_size",
+    "Count of samples in executed batches.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+
+cache_hits = Counter(
+    "tensorcraft_cache_hits",
+    "Count of model lookups served by loaded models.")
+
+cache_misses = Counter(
+    "tensorcraft_cache_misses",
+    "Count of model lookups that required model loading.")
+
+cache_evictions = Counter(
+    "tensorcraft_cache_evictions",
+    "Count of models evicted from the cache.")
+
+model_load_duration = Histogram(
+    "tensorcraft_model_load_duration_seconds",
+    "Duration of model loading including the warm-up.")
+
+model_warmup_duration = Histogram(
+    "tensorcraft_model_warmup_duration_seconds",
+    "Duration of model warm-up.")
+
+inference_queue_depth = Gauge(
+    "tensorcraft_inference_queue_depth",
+    "Count of predictions (or batches) pending in the inference executor.")
+
+metadata_operation_duration = Histogram(
+    "tensorcraft_metadata_operation_duration_seconds",
+    "Duration of models metadata database operations.",
+    ["operation"])
@@ -5,16 +5,21 @@ import logging
 import pathlib
 import pid
 import semver
+import time
 
 import tensorcraft
 
 from aiojobs.aiohttp import atomic, setup
 from functools import partial
-from typing import Awaitable
+from typing import Awaitable, Sequence
 
 from tensorcraft import arglib
+from tensorcraft import metrics
 from tensorcraft import tlslib
+from tensorcraft import tracing
 from tensorcraft.backend import httpapi
+from tensorcraft.backend.httpapi import routing
+from tensorcraft.backend import jobs
 from tensorcraft.backend import model
 from tensorcraft.backend import saving
 from tensorcraft.logging import internal_logger
@@ -27,8 +32,28 @@ class Server:
     async def new(cls, data_root: str, pidfile: str,
                   host: str = None, port: str = None,
                   preload: bool = False,
+                  cache_size: int = 0,
+                  cache_memory: int = 0,
+                  cache_policy: str = model.EvictionPolicy.LRU.value,
+                  cache_pin: Sequence[str] = None,
+                  hot_swap: bool = False,
                   close_timeout: int = 10,
                   strategy: str = model.Strategy.No.value,
+                  storage_backend: str = saving.StorageBackend.FS.value,
+                  metadata_backend: str = saving.MetadataBackend.JSON.value,
+                  archive_workers: int = 1,
+                  warmup_batch_size: Sequence[int] = None,
+                  max_batch_size: int = 1,
+                  max_batch_delay: float = 5,
+                  inference_executor: str = model.ExecutorKind.Thread.value,
+                  inference_workers: int = None,
+                  inference_concurrency: int = 0,
+                  inference_queue: int = 1024,
+                  trace_sample_rate: float = 0.0,
+                  job_workers: int = 1,
+                  job_queue: int = 100,
+                  job_batch_size: int = 1024,
+                  export_compression_level: int = None,
                   logger: logging.Logger = internal_logger):
         """Create new instance of the server."""
 
@@ -41,12 +66,60 @@ class Server:
         data_root = pathlib.Path(data_root)
         data_root.mkdir(parents=True, exist_ok=True)
 
+        # Run the inference outside of the event loop, so the slow models
+        # do not block the handling of other requests. Process pool workers
+        # load models on their own, so the loader delegates to them.
+        executor = model.Executor(kind=inference_executor,
+                                  max_workers=inference_workers,
+                                  max_concurrency=int(inference_concurrency),
+                                  max_queue=int(inference_queue),
+                                  logger=logger)
+
         # TODO: use different execution strategies for models and
         # fallback to the server-default execution strategy.
-        loader = model.Loader(strategy=strategy, logger=logger)
-
-        storage = saving.FsModelsStorage.new(path=data_root, loader=loader)
-        models = await model.Cache.new(storage=storage, preload=preload)
+        loader = model.Loader(strategy=strategy,
+                              warmup_batch_sizes=warmup_batch_size or [],
+                              executor=executor,
+                              logger=logger)
+
+        storage_class = saving.storage_backends[
+            saving.StorageBackend(storage_backend)]
+        storage = storage_class.new(path=data_root, loader=loader,
+                                    metadata=metadata_backend,
+                                    archive_workers=archive_workers,
+                                    logger=logger)
+
+        # Memory budget of the cache is given in megabytes.
+        models = await model.Cache.new(storage=storage, preload=preload,
+                                       capacity=int(cache_size),
+                                       memory=int(cache_memory) * 1024**2,
+                                       policy=cache_policy,
+                                       pinned=cache_pin or [],
+                                       swap=hot_swap,
+                                       logger=logger)
+
+        # Merge concurrent predictions into batches, delay is in milliseconds.
+        batching = model.Batching(executor=executor,
+                                  max_batch_size=int(max_batch_size),
+                                  max_delay=float(max_batch_delay) / 1000,
+                                  logger=logger)
+
+        metrics.inference_queue_depth.set_function(lambda: executor.pending)
+
+        # Trace the given fraction of requests, traces are logged and
+        # available through the debug endpoint.
+        tracer = tracing.Tracer(sample_rate=float(trace_sample_rate),
+                                logger=logger)
+
+        # Offline scoring jobs are executed by the bounded pool of workers,
+        # so they take only a limited share of the inference executor.
+        job_manager = await jobs.JobManager.new(
+            path=data_root.joinpath("jobs"),
+            models=models, batching=batching,
+            max_workers=int(job_workers),
+            max_pending=int(job_queue),
+            batch_size=int(job_batch_size),
+            logger=logger)
 
         # Experiments storage based on regular file system.
         experiments = saving.FsExperimentsStorage.new(path=data_root)
@@ -55,15 +128,20 @@ class Server:
 
         self.app.on_startup.append(cls.app_callback(self.pid.create))
         self.app.on_response_prepare.append(self._prepare_response)
+        self.app.on_shutdown.append(cls.app_callback(job_manager.close))
         self.app.on_shutdown.append(cls.app_callback(storage.close))
+        self.app.on_shutdown.append(cls.app_callback(executor.close))
         self.app.on_shutdown.append(cls.app_callback(experiments.close))
         self.app.on_shutdown.append(cls.app_callback(self.pid.close))
 
-        route = partial(route_to, api_version=tensorcraft.__apiversion__)
+        route = partial(route_to, api_version=tensorcraft.__apiversion__,
+                        tracer=tracer)
 
-        models_view = httpapi.ModelView(models)
-        server_view = httpapi.ServerView(models)
+        models_view = httpapi.ModelView(models, batching,
+                                        export_compression_level)
+        server_view = httpapi.ServerView(models, batching, tracer)
         experiments_view = httpapi.ExperimentView(experiments)
+        jobs_view = httpapi.JobView(job_manager, models)
 
         self.app.add_routes([
             # Model-related endpoints.
@@ -74,6 +152,13 @@ class Server:
                                route(models_view.delete)),
             aiohttp.web.post(models_view.predict.url,
                              route(models_view.predict)),
+            aiohttp.web.post(models_view.predict_stream.url,
+                             route(models_view.predict_stream)),
+
+            # Job-related endpoints.
+            aiohttp.web.post(jobs_view.create.url, route(jobs_view.create)),
+            aiohttp.web.get(jobs_view.get.url, route(jobs_view.get)),
+            aiohttp.web.get(jobs_view.result.url, route(jobs_view.result)),
 
             # Experiment-related endpoints.
             aiohttp.web.post(experiments_view.create.url,
@@ -87,9 +172,25 @@ class Server:
 
             # Server-related endpoints.
             aiohttp.web.get(server_view.status.url, route(server_view.status)),
+            aiohttp.web.get(server_view.metrics.url,
+                            route(server_view.metrics)),
+            aiohttp.web.get(server_view.traces.url, route(server_view.traces)),
             # aiohttp.web.static("/ui", "static"),
         ])
 
+        # Delta pushes are available only with the content-addressed
+        # storage, clients fall back to the push of the whole archive.
+        if isinstance(storage, saving.ContentAddressedModelsStorage):
+            blobs_view = httpapi.BlobView(storage, models)
+
+            self.app.add_routes([
+                aiohttp.web.post(blobs_view.missing.url,
+                                 route(blobs_view.missing)),
+                aiohttp.web.put(blobs_view.save.url, route(blobs_view.save)),
+                aiohttp.web.put(blobs_view.save_manifest.url,
+                                route(blobs_view.save_manifest)),
+            ])
+
         setup(self.app)
         logger.info("Server initialization completed")
 
@@ -100,6 +201,10 @@ class Server:
         response.headers["Server"] = server
         response.headers["Access-Control-Allow-Origin"] = "*"
 
+        request_id = request.get("request_id")
+        if request_id is not None:
+            response.headers[tracing.REQUEST_ID_HEADER] = request_id
+
     @classmethod
     def start(cls, **kwargs):
         """Start serving the models.
@@ -147,14 +252,57 @@ def handle_accept_version(req: aiohttp.web.Request, api_version: str):
 
 def accept_version(handler: Awaitable, api_version: str) -> Awaitable:
     async def _f(req: aiohttp.web.Request) -> aiohttp.web.Response:
-        handle_accept_version(req, api_version)
+        with tracing.span("accept_version"):
+            handle_accept_version(req, api_version)
         return await handler(req)
     return _f
 
 
-def route_to(handler: Awaitable, api_version: str) -> Awaitable:
+def traced(handler: Awaitable, tracer: tracing.Tracer,
+           route: str = None) -> Awaitable:
+    async def _f(req: aiohttp.web.Request) -> aiohttp.web.Response:
+        # Identifier given by the client is preserved, so the request
+        # could be correlated with the client logs.
+        request_id = req.headers.get(tracing.REQUEST_ID_HEADER, "")[:128]
+
+        with tracer.trace(request_id or None) as trace:
+            req["request_id"] = trace.request_id
+            with tracing.span(route or req.path):
+                return await handler(req)
+    return _f
+
+
+def instrument(handler: Awaitable, route: str = None) -> Awaitable:
+    async def _f(req: aiohttp.web.Request) -> aiohttp.web.Response:
+        started_at = time.monotonic()
+        status = 500
+
+        try:
+            resp = await handler(req)
+            status = resp.status
+            return resp
+        except aiohttp.web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            # Model is labeled once the handler resolved it, so requests
+            # to the missing models share the same label.
+            labels = dict(route=route or req.path, method=req.method,
+                          model=routing.model_label(req))
+
+            duration = time.monotonic() - started_at
+            metrics.http_request_duration.labels(**labels).observe(duration)
+            metrics.http_requests.labels(status=status, **labels).inc()
+    return _f
+
+
+def route_to(handler: Awaitable, api_version: str,
+             tracer: tracing.Tracer = None) -> Awaitable:
     """Create a route with the API version validation.
 
-    Returns handler decorated with API version check.
+    Returns handler decorated with API version check, request metrics
+    and tracing.
     """
-    return atomic(accept_version(handler, api_version))
+    route = getattr(handler, "url", None)
+    handler = instrument(accept_version(handler, api_version), route)
+    return atomic(traced(handler, tracer or tracing.Tracer(), route))
@@ -1,15 +1,21 @@
 import aiofiles
 import argparse
 import flagparse
+import hashlib
 import importlib
+import numpy
 import pathlib
 import tarfile
 import yaml
 
+from numpy.lib import format as npyformat
+
 import tensorcraft.errors
 
 from tensorcraft import asynclib
 from tensorcraft import client
+from tensorcraft import compression
+from tensorcraft import loadtest
 from tensorcraft.shell import termlib
 
 
@@ -53,10 +59,112 @@ class Server(flagparse.SubCommand):
               choices=["mirrored", "multi_worker_mirrored", "no"],
               default="mirrored",
               help="model execution strategy")),
+        (["--warmup-batch-size"],
+         dict(metavar="SIZE",
+              type=int,
+              action="append",
+              default=[],
+              help="warm up loaded models with a batch of SIZE")),
+        (["--storage-backend"],
+         dict(metavar="BACKEND",
+              choices=["fs", "cas"],
+              default="fs",
+              help="storage of models, cas deduplicates content")),
+        (["--archive-workers"],
+         dict(metavar="COUNT",
+              type=int,
+              default=1,
+              help="number of threads writing and reading models files, "
+                   "models are archived sequentially by default")),
+        (["--metadata-backend"],
+         dict(metavar="BACKEND",
+              choices=["json", "sqlite"],
+              default="json",
+              help="database of models metadata")),
+        (["--max-batch-size"],
+         dict(metavar="SIZE",
+              type=int,
+              default=1,
+              help="merge concurrent predictions into batches of SIZE")),
+        (["--max-batch-delay"],
+         dict(metavar="MILLISECONDS",
+              type=float,
+              default=5,
+              help="maximum time prediction waits for a batch")),
+        (["--inference-executor"],
+         dict(metavar="EXECUTOR",
+              choices=["thread", "process"],
+              default="thread",
+              help="pool used to execute the inference")),
+        (["--inference-workers"],
+         dict(metavar="COUNT",
+              type=int,
+              default=None,
+              help="number of inference workers")),
+        (["--inference-concurrency"],
+         dict(metavar="COUNT",
+              type=int,
+              default=0,
+              help="maximum concurrent predictions of a single model")),
+        (["--inference-queue"],
+         dict(metavar="COUNT",
+              type=int,
+              default=1024,
+              help=("maximum pending predictions before rejecting "
+                    "requests, a batch counts as a single prediction"))),
+        (["--job-workers"],
+         dict(metavar="COUNT",
+              type=int,
+              default=1,
+              help="number of concurrently running scoring jobs")),
+        (["--job-queue"],
+         dict(metavar="COUNT",
+              type=int,
+              default=100,
+              help="maximum scoring jobs waiting for a worker")),
+        (["--job-batch-size"],
+         dict(metavar="SIZE",
+              type=int,
+              default=1024,
+              help="number of feature vectors predicted at once by a job")),
+        (["--export-compression-level"],
+         dict(metavar="LEVEL",
+              type=int,
+              default=None,
+              help="compression level of exported models")),
+        (["--trace-sample-rate"],
+         dict(metavar="RATE",
+              type=float,
+              default=0.0,
+              help="fraction of requests to trace, from 0 to 1")),
         (["--preload"],
          dict(action="store_true",
               default=False,
-              help="preload all models into the memory before start"))]
+              help="preload all models into the memory before start")),
+        (["--cache-size"],
+         dict(metavar="COUNT",
+              type=int,
+              default=0,
+              help="maximum number of models loaded into the memory")),
+        (["--cache-memory"],
+         dict(metavar="MEGABYTES",
+              type=int,
+              default=0,
+              help="maximum estimated size of models loaded into the memory")),
+        (["--cache-policy"],
+         dict(metavar="POLICY",
+              choices=["lru", "lfu"],
+              default="lru",
+              help="eviction policy of loaded models")),
+        (["--cache-pin"],
+         dict(metavar="NAME:TAG",
+              action="append",
+              default=[],
+              help="model that is never evicted from the memory")),
+        (["--hot-swap"],
+         dict(action="store_true",
+              default=False,
+              help="load new latest models in background"))]
 
     def handle(self, args: flagparse.Namespace) -> None:
         try:
@@ -88,11 +196,21 @@ class Push(AsyncSubCommand):
               required=True,
               default=argparse.SUPPRESS,
               help="model tag")),
+        (["--compress"],
+         dict(metavar="ENCODING",
+              choices=["gzip", "zstd"],
+              default=None,
+              help="compress the model archive during the upload")),
+        (["--compress-level"],
+         dict(metavar="LEVEL",
+              type=int,
+              default=None,
+              help="compression level")),
         (["path"],
          dict(metavar="PATH",
               type=pathlib.Path,
               default=argparse.SUPPRESS,
-              help="model location"))]
+              help="model location, tarball or SavedModel directory"))]
 
     async def async_handle(self, args: flagparse.Namespace) -> None:
         print(f"loading model {args.name}:{args.tag}")
@@ -100,15 +218,42 @@ class Push(AsyncSubCommand):
         try:
             if not args.path.exists():
                 raise ValueError(f"{args.path} does not exist")
-            if not tarfile.is_tarfile(str(args.path)):
-                raise ValueError(f"{args.path} is not a tar file")
+
+            # Directories are pushed with delta, only files missing on the
+            # server are uploaded.
+            if args.path.is_dir():
+                models_client = await client.Model.new(**args.__dict__)
+                async with models_client as models:
+                    await models.push_delta(args.name, args.tag, args.path)
+                return
+
+            # Compressed archives are uploaded as is.
+            with open(str(args.path), "rb") as f:
+                encoding = compression.sniff(f.read(4))
+
+            if encoding == compression.Encoding.Identity:
+                if not tarfile.is_tarfile(str(args.path)):
+                    raise ValueError(f"{args.path} is not a tar file")
+
+            # Calculate the checksum of the uncompressed model, so the server
+            # could verify the integrity of the upload.
+            digest = hashlib.sha256()
+            chunks = compression.decompress(asynclib.reader(args.path))
+            async for chunk in chunks:
+                digest.update(chunk)
 
             asyncreader = asynclib.reader(args.path)
             reader = termlib.async_progress(args.path, asyncreader)
 
+            if encoding == compression.Encoding.Identity and args.compress:
+                encoding = compression.Encoding(args.compress)
+                reader = compression.compress(reader, encoding,
+                                              args.compress_level)
+
             models_client = await client.Model.new(**args.__dict__)
             async with models_client as models:
-                await models.push(args.name, args.tag, reader)
+                await models.push(args.name, args.tag, reader,
+                                  digest=digest.digest(), encoding=encoding)
         except Exception as e:
             raise flagparse.ExitError(1, f"Failed to push model. {e}")
 
@@ -190,6 +335,16 @@ class Export(AsyncSubCommand):
               required=True,
               default=argparse.SUPPRESS,
               help="model tag")),
+        (["--compress"],
+         dict(metavar="ENCODING",
+              choices=["gzip", "zstd"],
+              default="identity",
+              help="compress the model archive")),
+        (["--compress-level"],
+         dict(metavar="LEVEL",
+              type=int,
+              default=None,
+              help="compression level, when compressed by client")),
         (["path"],
          dict(metavar="PATH",
               type=pathlib.Path,
@@ -201,7 +356,9 @@ class Export(AsyncSubCommand):
             async with aiofiles.open(args.path, "wb+") as writer:
                 models_client = await client.Model.new(**args.__dict__)
                 async with models_client as models:
-                    await models.export(args.name, args.tag, writer)
+                    await models.export(args.name, args.tag, writer,
+                                        encoding=args.compress,
+                                        level=args.compress_level)
         except Exception as e:
             raise flagparse.ExitError(1, f"Failed to export model. {e}")
 
@@ -225,3 +382,154 @@ class Status(AsyncSubCommand):
                 print(yaml.dump(status), end="")
         except Exception as e:
             raise flagparse.ExitError(1, f"Failed to export model. {e}")
+
+
+class Predict(AsyncSubCommand):
+    """Shell command to calculate predictions of the features file."""
+
+    name = "predict"
+    aliases = []
+    help = "predict features"
+
+    description = ("Calculate predictions of the features stored in NumPy "
+                   "binary file, predictions are written in the same format.")
+
+    arguments = [
+        (["-n", "--name"],
+         dict(metavar="NAME",
+              type=str,
+              required=True,
+              default=argparse.SUPPRESS,
+              help="model name")),
+        (["-t", "--tag"],
+         dict(metavar="TAG",
+              type=str,
+              required=True,
+              default=argparse.SUPPRESS,
+              help="model tag")),
+        (["--batch-size"],
+         dict(metavar="SIZE",
+              type=int,
+              default=1024,
+              help="number of feature vectors sent in a single request")),
+        (["-c", "--concurrency"],
+         dict(metavar="COUNT",
+              type=int,
+              default=4,
+              help="number of concurrent requests")),
+        (["input"],
+         dict(metavar="INPUT",
+              type=pathlib.Path,
+              default=argparse.SUPPRESS,
+              help="location of the features .npy file")),
+        (["output"],
+         dict(metavar="OUTPUT",
+              type=pathlib.Path,
+              default=argparse.SUPPRESS,
+              help="location of the predictions .npy file"))]
+
+    async def async_handle(self, args: flagparse.Namespace) -> None:
+        try:
+            # Features are memory-mapped, so files larger than the memory
+            # are read by batches.
+            x = numpy.load(str(args.input), mmap_mode="r")
+            y, offset = None, 0
+
+            models_client = await client.Model.new(**args.__dict__)
+            async with models_client as models:
+                async for y_batch in models.predict_many(
+                        args.name, args.tag, x,
+                        batch_size=args.batch_size,
+                        concurrency=args.concurrency):
+
+                    # Shape of the predictions is known only after the
+                    # first batch is predicted.
+                    if y is None:
+                        y = npyformat.open_memmap(
+                            str(args.output), mode="w+", dtype=y_batch.dtype,
+                            shape=(len(x),) + y_batch.shape[1:])
+
+                    y[offset:offset+len(y_batch)] = y_batch
+                    offset += len(y_batch)
+
+            if y is None:
+                raise ValueError(f"{args.input} has no features")
+            y.flush()
+        except Exception as e:
+            raise flagparse.ExitError(1, f"Failed to predict features. {e}")
+
+
+class LoadTest(AsyncSubCommand):
+    """Shell command to generate the predictions load."""
+
+    name = "loadtest"
+    aliases = []
+    help = "generate predictions load"
+
+    description = ("Send predictions to the model at a fixed rate or from "
+                   "a fixed number of concurrent clients, and report "
+                   "latency percentiles and errors.")
+
+    arguments = [
+        (["-n", "--name"],
+         dict(metavar="NAME",
+              type=str,
+              required=True,
+              default=argparse.SUPPRESS,
+              help="model name")),
+        (["-t", "--tag"],
+         dict(metavar="TAG",
+              type=str,
+              required=True,
+              default=argparse.SUPPRESS,
+              help="model tag")),
+        (["--shape"],
+         dict(metavar="SHAPE",
+              type=loadtest.parse_shape,
+              default=(1, 1),
+              help="comma-separated shape of the request features")),
+        (["--dtype"],
+         dict(metavar="DTYPE",
+              default="float32",
+              help="data type of the request features")),
+        (["--rate"],
+         dict(metavar="RPS",
+              type=float,
+              default=0,
+              help="requests per second, overrides concurrency")),
+        (["-c", "--concurrency"],
+         dict(metavar="COUNT",
+              type=int,
+              default=1,
+              help="number of concurrent clients")),
+        (["-d", "--duration"],
+         dict(metavar="SECONDS",
+              type=float,
+              default=10,
+              help="duration of the load test")),
+        (["--expected-interval"],
+         dict(metavar="SECONDS",
+              type=float,
+              default=None,
+              help="expected interval between requests of a client"))]
+
+    async def async_handle(self, args: flagparse.Namespace) -> None:
+        try:
+            # Connections are not limited, so the client does not queue
+            # requests on its own and the load is not distorted.
+            session = await client.Session.new(max_connections=0,
+                                               **args.__dict__)
+            try:
+                test = loadtest.LoadTest(
+                    session, args.name, args.tag,
+                    shape=args.shape, dtype=args.dtype,
+                    rate=args.rate, concurrency=args.concurrency,
+                    duration=args.duration,
+                    expected_interval=args.expected_interval)
+                report = await test.run()
+            finally:
+                await session.close()
+
+            print(yaml.dump(report), end="")
+        except Exception as e:
+            raise flagparse.ExitError(1, f"Failed to run load test. {e}")
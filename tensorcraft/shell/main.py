@@ -48,7 +48,9 @@ def main():
              commands.Remove,
              commands.List,
              commands.Export,
-             commands.Status]).parse(trace=True)
+             commands.Status,
+             commands.Predict,
+             commands.LoadTest]).parse(trace=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,279 @@
+"""Parallel extraction and creation of TAR archives.
+
+TAR archive is read (and written) sequentially, but the content of the
+files is written to (and read from) the disk by the pool of workers, so
+the archives of many files, e.g. variable shards of the model, are not
+bound by the latency of a single disk operation.
+
+The memory is bounded by the number of chunks in flight.
+"""
+import collections
+import concurrent.futures
+import io
+import os
+import pathlib
+import tarfile
+import threading
+
+from typing import Callable, IO, Iterator, Tuple
+
+
+# Default size of the chunk written (or read) by a single worker.
+CHUNK_SIZE = 4 * 1024**2
+
+# Default number of workers, a single worker means the sequential
+# extraction and creation of archives (see "asynclib"): parallel I/O pays
+# off only on disks with the latency-bound operations.
+WORKERS = 1
+
+
+class _OpenFile:
+    """File written by the workers, closed after the last chunk write."""
+
+    def __init__(self, path: pathlib.Path, member: tarfile.TarInfo):
+        self.fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                          0o600)
+        self.path = path
+        self.member = member
+        self.lock = threading.Lock()
+        self.pending = 1
+
+    def acquire(self) -> None:
+        with self.lock:
+            self.pending += 1
+
+    def release(self) -> None:
+        with self.lock:
+            self.pending -= 1
+            if self.pending:
+                return
+
+        os.close(self.fd)
+        os.chmod(str(self.path), self.member.mode & 0o7777)
+        os.utime(str(self.path), (self.member.mtime, self.member.mtime))
+
+
+class _Writer:
+    """Pool of workers writing chunks of files."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.futures = set()
+        self.error = None
+
+    def write(self, f: _OpenFile, b: bytes, offset: int) -> None:
+        # Block the reader of the archive until the chunk could be written,
+        # so the memory consumption does not depend on the archive size.
+        self.slots.acquire()
+        if self.error is not None:
+            self.slots.release()
+            raise self.error
+
+        f.acquire()
+        future = self.executor.submit(os.pwrite, f.fd, b, offset)
+        self.futures.add(future)
+
+        def done(future):
+            self.futures.discard(future)
+            self.slots.release()
+            if future.exception() is not None and self.error is None:
+                self.error = future.exception()
+            f.release()
+        future.add_done_callback(done)
+
+    def wait(self) -> None:
+        """Wait until all submitted chunks are written."""
+        concurrent.futures.wait(list(self.futures))
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+def _member_path(root: pathlib.Path, name: str) -> pathlib.Path:
+    path = root.joinpath(name).resolve()
+    if path != root and root not in path.parents:
+        raise ValueError(f"{name} is outside of the archive")
+    return path
+
+
+def extract(fileobj: IO, dest: pathlib.Path,
+            workers: int = WORKERS,
+            chunk_size: int = CHUNK_SIZE,
+            max_pending: int = None) -> None:
+    """Extract content of the TAR archive into the given directory.
+
+    Args:
+        fileobj -- file object of the archive
+        dest -- destination directory
+        workers -- number of workers writing files
+        chunk_size -- size of the chunk written by a worker at once
+        max_pending -- maximum number of chunks in flight, twice the number
+                       of workers by default
+    """
+    dest = pathlib.Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    root = dest.resolve()
+
+    writer = _Writer(workers, max_pending or workers * 2)
+    directories = []
+
+    try:
+        # Archive is read as a stream, unless the file is seekable.
+        seekable = getattr(fileobj, "seekable", lambda: False)()
+        mode = "r:*" if seekable else "r|*"
+
+        with tarfile.open(fileobj=fileobj, mode=mode) as tf:
+            for member in tf:
+                path = _member_path(root, member.name)
+
+                if member.isdir():
+                    path.mkdir(parents=True, exist_ok=True)
+                    directories.append((path, member))
+                    continue
+
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if not member.isfile():
+                    # Links could reference files that are being written.
+                    writer.wait()
+                    tf.extract(member, str(dest))
+                    continue
+
+                f = _OpenFile(path, member)
+                try:
+                    reader = tf.extractfile(member)
+                    for offset in range(0, member.size, chunk_size):
+                        writer.write(f, reader.read(chunk_size), offset)
+                finally:
+                    f.release()
+
+            writer.wait()
+    finally:
+        writer.close()
+
+    # Set attributes of directories after all files are extracted, like
+    # the "extractall" method does.
+    for path, member in reversed(directories):
+        os.chmod(str(path), member.mode & 0o7777)
+        os.utime(str(path), (member.mtime, member.mtime))
+
+
+def _walk(path: pathlib.Path) -> Iterator[Tuple[pathlib.Path, str]]:
+    """Walk the directory in the same order as tarfile does."""
+    for name in sorted(os.listdir(str(path))):
+        child = path.joinpath(name)
+        yield child, child.name
+        if child.is_dir() and not child.is_symlink():
+            for grandchild, arcname in _walk(child):
+                yield grandchild, f"{name}/{arcname}"
+
+
+class _ChunkReader(io.RawIOBase):
+    """Reader of the file content from the chunks read ahead.
+
+    Each consumed chunk schedules reading of the next chunks.
+    """
+
+    def __init__(self, chunks: collections.deque,
+                 read_ahead: Callable[[], None]):
+        self.chunks = chunks
+        self.read_ahead = read_ahead
+        self.buf = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int) -> bytes:
+        """Read exactly the given number of bytes, unless chunks are over.
+
+        Caller must not read more bytes than the size of the file, so the
+        chunks of the next file are kept in the queue.
+        """
+        parts = []
+        while size > 0:
+            if not self.buf:
+                if not self.chunks:
+                    break
+                self.buf = memoryview(self.chunks.popleft().result())
+                self.read_ahead()
+
+            # Slices of the memory view do not copy the rest of the chunk.
+            parts.append(self.buf[:size])
+            self.buf = self.buf[size:]
+            size -= len(parts[-1])
+        return b"".join(parts)
+
+
+def _pread(path: pathlib.Path, size: int, offset: int) -> bytes:
+    with open(str(path), "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def create(fileobj: IO, path: pathlib.Path,
+           workers: int = WORKERS,
+           chunk_size: int = CHUNK_SIZE,
+           max_pending: int = None) -> None:
+    """Create TAR archive with the content of the directory.
+
+    Files are read ahead by the workers, archive is written as a stream,
+    so the file object is not required to be seekable.
+
+    Args:
+        fileobj -- file object of the archive
+        path -- directory to archive
+        workers -- number of workers reading files
+        chunk_size -- size of the chunk read by a worker at once
+        max_pending -- maximum number of chunks read ahead, twice the number
+                       of workers by default
+    """
+    path = pathlib.Path(path)
+    max_pending = max_pending or workers * 2
+
+    # Content of files is copied by chunks, rather than by small blocks.
+    with tarfile.open(fileobj=fileobj, mode="w|", bufsize=chunk_size,
+                      copybufsize=chunk_size) as tf:
+        # Information of all members is collected first, so hard links
+        # are detected before the content is read.
+        members = [(p, tf.gettarinfo(str(p), arcname))
+                   for p, arcname in [(path, "")] + list(_walk(path))]
+        members = [(p, info) for p, info in members if info is not None]
+        chunks = [(p, min(chunk_size, info.size - offset), offset)
+                  for p, info in members if info.isreg()
+                  for offset in range(0, info.size, chunk_size)]
+
+        pending = collections.deque()
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+        chunks = iter(chunks)
+
+        def read_ahead():
+            while len(pending) < max_pending:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(executor.submit(_pread, *chunk))
+
+        try:
+            for p, info in members:
+                if not info.isreg():
+                    tf.addfile(info)
+                    continue
+
+                read_ahead()
+                tf.addfile(info, _ChunkReader(pending, read_ahead))
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+
+async def extract_tar(fileobj: IO, dest: str, **kwargs) -> None:
+    """Coroutine extracting the TAR archive, see :func:`extract`."""
+    extract(fileobj, pathlib.Path(dest), **kwargs)
+
+
+async def create_tar(fileobj: IO, path: str, **kwargs) -> None:
+    """Coroutine creating the TAR archive, see :func:`create`."""
+    create(fileobj, pathlib.Path(path), **kwargs)
@@ -0,0 +1,121 @@
+import collections
+import io
+import numpy
+import struct
+
+from numpy.lib import format as npyformat
+from typing import Iterator
+
+
+# Media type of the tensors encoded in NumPy binary format.
+NPY_CONTENT_TYPE = "application/x-npy"
+
+# Media type of the stream of NumPy binary tensors, each tensor is prefixed
+# with its length encoded as 8-byte big-endian unsigned integer.
+NPY_FRAMES_CONTENT_TYPE = "application/x-npy-frames"
+
+# Media type of the stream of newline-delimited JSON records.
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+FRAME_HEADER = struct.Struct(">Q")
+
+
+_header_readers = {
+    (1, 0): npyformat.read_array_header_1_0,
+    (2, 0): npyformat.read_array_header_2_0,
+}
+
+
+def dumps(x: numpy.ndarray) -> bytes:
+    """Encode the array into NumPy binary format."""
+    buf = io.BytesIO()
+    npyformat.write_array(buf, numpy.asarray(x), allow_pickle=False)
+    return buf.getvalue()
+
+
+def loads(b: bytes) -> numpy.ndarray:
+    """Decode the array from NumPy binary format.
+
+    The returned array is a read-only view of the given buffer, so the data
+    is not copied.
+    """
+    stream = io.BytesIO(b)
+
+    version = npyformat.read_magic(stream)
+    if version not in _header_readers:
+        raise ValueError(f"unsupported npy format version {version}")
+
+    shape, fortran_order, dtype = _header_readers[version](stream)
+    if dtype.hasobject:
+        raise ValueError("arrays of objects are not supported")
+
+    count = int(numpy.prod(shape, dtype=numpy.int64))
+    x = numpy.frombuffer(b, dtype=dtype, count=count, offset=stream.tell())
+    return x.reshape(shape, order="F" if fortran_order else "C")
+
+
+def accepts(accept: str, content_type: str = NPY_CONTENT_TYPE) -> bool:
+    """Return true when the accept header allows the content type."""
+    media_types = (t.split(";")[0].strip() for t in accept.split(","))
+    return content_type in media_types
+
+
+def dumps_frame(x: numpy.ndarray) -> bytes:
+    """Encode the array into length-prefixed NumPy binary frame."""
+    b = dumps(x)
+    return FRAME_HEADER.pack(len(b)) + b
+
+
+class Rebatcher:
+    """Split and merge arrays of rows into batches of the fixed size.
+
+    Rows are kept in the pushed arrays until they are taken into a batch,
+    so each row is copied at most once, and batches within a single array
+    are views of that array.
+
+    Attributes:
+        batch_size -- number of rows in the batch
+        size -- number of rows pending in the buffer
+    """
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self.chunks = collections.deque()
+        self.offset = 0
+        self.size = 0
+
+    def push(self, x: numpy.ndarray) -> Iterator[numpy.ndarray]:
+        """Add rows to the buffer and yield complete batches.
+
+        Batches are taken lazily, one per iteration, rows that are not
+        taken stay in the buffer for the next push.
+        """
+        if len(x):
+            self.chunks.append(x)
+            self.size += len(x)
+
+        while self.size >= self.batch_size:
+            yield self.take(self.batch_size)
+
+    def take(self, count: int) -> numpy.ndarray:
+        """Take the given number of rows from the head of the buffer."""
+        parts = []
+        while count:
+            head = self.chunks[0]
+            part = head[self.offset:self.offset+count]
+            parts.append(part)
+
+            count -= len(part)
+            self.size -= len(part)
+            self.offset += len(part)
+
+            if self.offset == len(head):
+                self.chunks.popleft()
+                self.offset = 0
+        return parts[0] if len(parts) == 1 else numpy.concatenate(parts)
+
+    def flush(self):
+        """Return the incomplete batch of the remaining rows."""
+        if not self.size:
+            return None
+        return self.take(self.size)
@@ -0,0 +1,158 @@
+import collections
+import contextlib
+import contextvars
+import json
+import logging
+import random
+import time
+import uuid
+
+from typing import Dict, Sequence
+
+from tensorcraft.logging import internal_logger
+
+
+# Header used to propagate the identifier of the request.
+REQUEST_ID_HEADER = "X-Request-Id"
+
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class Span:
+    """Timing of a single operation within the trace.
+
+    Attributes:
+        id -- identifier of the span within the trace
+        name -- name of the traced operation
+        parent_id -- identifier of the enclosing span
+        start -- offset of the span from the start of the trace in seconds
+        duration -- duration of the operation in seconds
+    """
+
+    def __init__(self, id: int, name: str, parent_id: int = None,
+                 start: float = 0.0):
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+        self.start = start
+        self.duration = None
+
+    def to_dict(self) -> Dict:
+        return dict(id=self.id, name=self.name, parent_id=self.parent_id,
+                    start=self.start, duration=self.duration)
+
+
+class Trace:
+    """Spans recorded while handling a single request.
+
+    Attributes:
+        request_id -- identifier of the traced request
+        sampled -- true when spans of the trace are recorded
+        started_at -- wall-clock time of the trace start
+        spans -- list of recorded spans
+    """
+
+    def __init__(self, request_id: str, sampled: bool = True):
+        self.request_id = request_id
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    def new_span(self, name: str, parent_id: int = None) -> Span:
+        # Appending to the list is atomic, so spans could be started
+        # from the worker threads as well.
+        s = Span(len(self.spans), name, parent_id,
+                 start=time.perf_counter() - self.origin)
+        self.spans.append(s)
+        return s
+
+    def to_dict(self) -> Dict:
+        return dict(request_id=self.request_id,
+                    started_at=self.started_at,
+                    spans=[s.to_dict() for s in self.spans])
+
+
+@contextlib.contextmanager
+def span(name: str):
+    """Record the duration of the block within the current trace.
+
+    The block is not timed when there is no trace or the trace is not
+    sampled, so spans are cheap to leave in the hot paths.
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        yield
+        return
+
+    parent = _current_span.get()
+    s = trace.new_span(name, parent.id if parent else None)
+    token = _current_span.set(s)
+
+    started_at = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.duration = time.perf_counter() - started_at
+        _current_span.reset(token)
+
+
+def current_request_id() -> str:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+def detached(func, *args):
+    """Call the function out of the current trace.
+
+    Tasks created within the call do not inherit the trace, this is used
+    for work shared between several requests.
+    """
+    return contextvars.Context().run(func, *args)
+
+
+class Tracer:
+    """Sample requests and keep the most recent traces.
+
+    Attributes:
+        sample_rate -- fraction of the requests to trace, from 0 to 1
+        max_traces -- number of the most recent traces to keep
+    """
+
+    def __init__(self, sample_rate: float = 0.0, max_traces: int = 100,
+                 logger: logging.Logger = internal_logger):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample rate must be between 0 and 1")
+
+        self.sample_rate = sample_rate
+        self.traces = collections.deque(maxlen=max_traces)
+        self.logger = logger
+
+    def sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextlib.contextmanager
+    def trace(self, request_id: str = None):
+        """Start the trace of the request within the block.
+
+        Sampled traces are logged as a JSON line and kept in the memory.
+        """
+        trace = Trace(request_id or new_request_id(), self.sample())
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+
+            if trace.sampled:
+                self.traces.append(trace)
+                self.logger.info("Trace %s", json.dumps(trace.to_dict()))
+
+    def recent(self) -> Sequence[Trace]:
+        return list(self.traces)
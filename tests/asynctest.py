@@ -33,10 +33,24 @@ class AsyncGeneratorMock(unittest.mock.MagicMock):
             raise StopAsyncIteration
 
 
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return current event loop, create a new one when it was closed."""
+    try:
+        loop = asyncio.get_event_loop()
+        if not loop.is_closed():
+            return loop
+    except RuntimeError:
+        pass
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
+
 class AsyncTestCase(unittest.TestCase):
 
     def setUp(self):
-        self.__loop = asyncio.get_event_loop()
+        self.__loop = get_event_loop()
         self.__loop.run_until_complete(self.setUpAsync())
 
     def tearDown(self):
@@ -51,7 +65,7 @@ class AsyncTestCase(unittest.TestCase):
 
 def unittest_run_loop(coroutine):
     def test(*args, **kwargs):
-        loop = asyncio.get_event_loop()
+        loop = get_event_loop()
         return loop.run_until_complete(coroutine(*args, **kwargs))
     return test
 
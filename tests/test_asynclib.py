@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+import unittest.mock
+
+from tensorcraft import asynclib
+from tests import asynctest
+
+
+class TestTaskSet(asynctest.AsyncTestCase):
+
+    @asynctest.unittest_run_loop
+    async def test_spawn(self):
+        logger = unittest.mock.Mock()
+        tasks = asynclib.TaskSet(logger)
+        done = asyncio.Event()
+
+        task = tasks.spawn(done.wait())
+        self.assertEqual(len(tasks), 1)
+
+        done.set()
+        await task
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(tasks), 0)
+        logger.error.assert_not_called()
+
+    @asynctest.unittest_run_loop
+    async def test_spawn_error(self):
+        logger = unittest.mock.Mock()
+        tasks = asynclib.TaskSet(logger)
+
+        async def fail():
+            raise ValueError("failed")
+
+        tasks.spawn(fail())
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(len(tasks), 0)
+        logger.error.assert_called_once()
+
+    @asynctest.unittest_run_loop
+    async def test_spawn_cancelled(self):
+        logger = unittest.mock.Mock()
+        tasks = asynclib.TaskSet(logger)
+
+        task = tasks.spawn(asyncio.sleep(10))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(len(tasks), 0)
+        logger.error.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
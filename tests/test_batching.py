@@ -0,0 +1,101 @@
+import asyncio
+import numpy
+import unittest
+import unittest.mock
+
+from tensorcraft import errors
+from tensorcraft.backend.model import Batching
+from tests import asynctest
+from tests import kerastest
+
+
+class TestBatching(asynctest.AsyncTestCase):
+
+    async def setUpAsync(self) -> None:
+        self.m = kerastest.new_model()
+        self.m.model = unittest.mock.Mock(input_shape=(None, 1))
+        self.m.model.predict.side_effect = lambda x: x * 2
+
+    @asynctest.unittest_run_loop
+    async def test_predict_disabled(self):
+        batching = Batching(max_batch_size=1)
+
+        y = await batching.predict(self.m, [[1.0], [2.0]])
+
+        self.assertTrue(numpy.array_equal(y, [[2.0], [4.0]]))
+        self.assertEqual(batching.stats.batches, 0)
+
+    @asynctest.unittest_run_loop
+    async def test_predict_merged(self):
+        batching = Batching(max_batch_size=4, max_delay=1)
+
+        ys = await asyncio.gather(
+            batching.predict(self.m, [[1.0]]),
+            batching.predict(self.m, [[2.0], [3.0]]),
+            batching.predict(self.m, [[4.0]]))
+
+        self.m.model.predict.assert_called_once()
+        self.assertTrue(numpy.array_equal(ys[0], [[2.0]]))
+        self.assertTrue(numpy.array_equal(ys[1], [[4.0], [6.0]]))
+        self.assertTrue(numpy.array_equal(ys[2], [[8.0]]))
+
+        self.assertEqual(batching.stats.batches, 1)
+        self.assertEqual(batching.stats.requests, 3)
+        self.assertEqual(batching.stats.max_size, 4)
+        self.assertFalse(batching.queues)
+
+    @asynctest.unittest_run_loop
+    async def test_predict_delay_expired(self):
+        batching = Batching(max_batch_size=100, max_delay=0.01)
+
+        ys = await asyncio.gather(
+            batching.predict(self.m, [[1.0]]),
+            batching.predict(self.m, [[2.0]]))
+
+        self.m.model.predict.assert_called_once()
+        self.assertTrue(numpy.array_equal(ys[1], [[4.0]]))
+
+    @asynctest.unittest_run_loop
+    async def test_predict_input_shape(self):
+        batching = Batching(max_batch_size=4)
+
+        with self.assertRaises(errors.InputShapeError):
+            await batching.predict(self.m, [[1.0, 2.0]])
+
+    @asynctest.unittest_run_loop
+    async def test_predict_error(self):
+        self.m.model.predict.side_effect = ValueError("failed")
+        batching = Batching(max_batch_size=2, max_delay=1)
+
+        results = await asyncio.gather(
+            batching.predict(self.m, [[1.0]]),
+            batching.predict(self.m, [[2.0]]),
+            return_exceptions=True)
+
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+
+    @asynctest.unittest_run_loop
+    async def test_predict_alias_released(self):
+        batching = Batching(max_batch_size=4, max_delay=0.01)
+        latest = self.m.alias("latest")
+
+        # The queue of the model is shared by requests of both tags.
+        task = asyncio.ensure_future(batching.predict(self.m, [[1.0]]))
+        await asyncio.sleep(0)
+        latest_task = asyncio.ensure_future(batching.predict(latest, [[2.0]]))
+        await asyncio.sleep(0)
+
+        # Model that created the queue is evicted with its request cancelled.
+        task.cancel()
+        await asyncio.sleep(0)
+        self.m.release()
+        self.assertTrue(self.m.loaded)
+
+        y = await latest_task
+        self.assertTrue(numpy.array_equal(y, [[4.0]]))
+        self.assertFalse(self.m.loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
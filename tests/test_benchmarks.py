@@ -0,0 +1,30 @@
+import argparse
+import unittest
+
+from benchmarks import __main__ as benchmarks
+from benchmarks import cache
+from tests import asynctest
+
+
+class TestCacheBenchmark(asynctest.AsyncTestCase):
+
+    @asynctest.unittest_run_loop
+    async def test_run(self):
+        for cache_class in (cache.GlobalLockCache, cache.model.Cache):
+            result = await cache.run(cache_class, hot=2, cold=2,
+                                     lookups=10, delay=0.01)
+            self.assertEqual(result["cache"], cache_class.__name__)
+            self.assertEqual(result["lookups"], 10)
+
+    @asynctest.unittest_run_loop
+    async def test_run_suites(self):
+        args = argparse.Namespace(suite=["cache"])
+        results = await benchmarks.run_suites(args)
+
+        self.assertEqual([r["cache"] for r in results],
+                         ["GlobalLockCache", "Cache"])
+        self.assertTrue(all(r["benchmark"] == "cache" for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
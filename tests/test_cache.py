@@ -1,6 +1,8 @@
+import asyncio
 import unittest
 import unittest.mock
 
+from tensorcraft import errors
 from tensorcraft.backend.model import Cache, AbstractStorage
 from tests import asynctest
 from tests import kerastest
@@ -74,31 +76,272 @@ class TestCache(asynctest.AsyncTestCase):
         m1 = kerastest.new_model()
         m1.model = unittest.mock.MagicMock()
 
-        self.storage.load = asynctest.AsyncMagicMock()
+        self.storage.load_model = asynctest.AsyncMagicMock()
 
         cache = await Cache.new(storage=self.storage)
         cache.models[m1.key] = m1
 
         m2 = await cache.load(m1.name, m1.tag)
 
-        self.storage.load.assert_not_called()
+        self.storage.load_model.assert_not_called()
         self.assertIn(m1.key, cache.models)
         self.assertEqual(m1, m2)
 
+    @asynctest.unittest_run_loop
+    async def test_load_not_blocked(self):
+        m1 = kerastest.new_model()
+        m1.model = unittest.mock.MagicMock()
+        m2 = kerastest.new_model()
+
+        loading = asyncio.Event()
+
+        async def load_model(m):
+            await loading.wait()
+            m.model = unittest.mock.MagicMock()
+            return m
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            return_value=m2)
+        self.storage.load_model = load_model
+
+        cache = await Cache.new(storage=self.storage)
+        cache.models[m1.key] = m1
+
+        # Start loading of the second model, and ensure loaded model is
+        # returned while the second model is still loading.
+        task = asyncio.ensure_future(cache.load(m2.name, m2.tag))
+        await asyncio.sleep(0)
+
+        self.assertEqual(m1, await cache.load(m1.name, m1.tag))
+        self.assertFalse(task.done())
+
+        loading.set()
+        self.assertEqual(m2, await task)
+        self.assertEqual(len(cache.loads), 0)
+
+    def mock_load_model(self):
+        def load(m):
+            m.model = unittest.mock.MagicMock()
+            return m
+        self.storage.load_model = asynctest.AsyncMagicMock(side_effect=load)
+
+    @asynctest.unittest_run_loop
+    async def test_load_concurrent(self):
+        m1 = kerastest.new_model()
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            return_value=m1)
+        self.mock_load_model()
+
+        cache = await Cache.new(storage=self.storage)
+        models = await asyncio.gather(
+            *[cache.load(m1.name, m1.tag) for _ in range(3)])
+
+        self.storage.load_model.assert_called_once_with(m1)
+        self.assertEqual(models, [m1] * 3)
+
+    @asynctest.unittest_run_loop
+    async def test_load_concurrent_aliases(self):
+        m1 = kerastest.new_model()
+        latest = m1.alias("latest")
+
+        async def load_from_meta(name, tag):
+            return latest if tag == "latest" else m1
+
+        self.storage.load_from_meta = load_from_meta
+        self.mock_load_model()
+
+        cache = await Cache.new(storage=self.storage)
+        models = await asyncio.gather(cache.load(m1.name, "latest"),
+                                      cache.load(m1.name, m1.tag))
+
+        # Tags of the same model share a single loaded execution model.
+        self.storage.load_model.assert_called_once()
+        self.assertEqual([m.tag for m in models], ["latest", m1.tag])
+        self.assertIs(models[0].model, models[1].model)
+        self.assertEqual(len(cache.loaded_models()), 1)
+
+    @asynctest.unittest_run_loop
+    async def test_load_concurrent_error(self):
+        m1 = kerastest.new_model()
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            return_value=m1)
+        self.storage.load_model = asynctest.AsyncMagicMock(
+            side_effect=errors.NotFoundError(m1.name, m1.tag))
+
+        cache = await Cache.new(storage=self.storage)
+        results = await asyncio.gather(
+            *[cache.load(m1.name, m1.tag) for _ in range(3)],
+            return_exceptions=True)
+
+        self.storage.load_model.assert_called_once_with(m1)
+        for result in results:
+            self.assertIsInstance(result, errors.NotFoundError)
+
+        # Ensure the failure is not remembered.
+        self.mock_load_model()
+
+        self.assertEqual(m1, await cache.load(m1.name, m1.tag))
+        self.assertEqual(self.storage.load_model.call_count, 1)
+
     @asynctest.unittest_run_loop
     async def test_load_not_found(self):
         m1 = kerastest.new_model()
 
-        self.storage.load = asynctest.AsyncMagicMock(return_value=m1)
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            side_effect=errors.NotFoundError(m1.name, m1.tag))
+
+        cache = await Cache.new(storage=self.storage)
+        with self.assertRaises(errors.NotFoundError):
+            await cache.load(m1.name, m1.tag)
+
+        self.assertNotIn(m1.key, cache.models)
+
+    @asynctest.unittest_run_loop
+    async def test_load_not_cached(self):
+        m1 = kerastest.new_model()
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            return_value=m1)
+        self.mock_load_model()
 
         cache = await Cache.new(storage=self.storage)
         m2 = await cache.load(m1.name, m1.tag)
 
-        self.storage.load.assert_called()
+        self.storage.load_model.assert_called()
         self.assertIn(m1.key, cache.models)
 
         self.assertEqual(m1, m2)
 
+    def new_loaded_model(self, size: int = 0):
+        m = kerastest.new_model()
+        m.model = unittest.mock.MagicMock()
+        m.size = size
+        return m
+
+    @asynctest.unittest_run_loop
+    async def test_evict_lru(self):
+        m1, m2, m3 = [self.new_loaded_model() for _ in range(3)]
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            side_effect=[m1, m2, m3])
+
+        cache = await Cache.new(storage=self.storage, capacity=2)
+        await cache.load(m1.name, m1.tag)
+        await cache.load(m2.name, m2.tag)
+
+        # Use the first model, so the second becomes least recently used.
+        await cache.load(m1.name, m1.tag)
+        await cache.load(m3.name, m3.tag)
+
+        self.assertIn(m1.key, cache.models)
+        self.assertNotIn(m2.key, cache.models)
+        self.assertIn(m3.key, cache.models)
+        self.assertFalse(m2.loaded)
+
+    @asynctest.unittest_run_loop
+    async def test_evict_lfu_memory(self):
+        m1, m2, m3 = [self.new_loaded_model(size=10) for _ in range(3)]
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            side_effect=[m1, m2, m3])
+
+        cache = await Cache.new(storage=self.storage, memory=25,
+                                policy="lfu")
+        await cache.load(m1.name, m1.tag)
+        await cache.load(m2.name, m2.tag)
+        await cache.load(m2.name, m2.tag)
+        await cache.load(m1.name, m1.tag)
+        await cache.load(m1.name, m1.tag)
+        await cache.load(m3.name, m3.tag)
+
+        self.assertIn(m1.key, cache.models)
+        self.assertNotIn(m2.key, cache.models)
+        self.assertIn(m3.key, cache.models)
+
+    @asynctest.unittest_run_loop
+    async def test_overflows_copies(self):
+        m1 = self.new_loaded_model(size=10)
+        latest = m1.alias("latest")
+
+        cache = await Cache.new(storage=self.storage, memory=15)
+        cache.models[m1.key] = m1
+        cache.models[latest.key] = latest
+
+        # Aliases share the execution model.
+        self.assertFalse(cache.overflows())
+
+        # Separately loaded copy of the same model takes memory as well.
+        latest.model = unittest.mock.MagicMock()
+        self.assertTrue(cache.overflows())
+
+    @asynctest.unittest_run_loop
+    async def test_evict_pinned(self):
+        m1, m2 = [self.new_loaded_model() for _ in range(2)]
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            side_effect=[m1, m2])
+
+        cache = await Cache.new(storage=self.storage, capacity=1,
+                                pinned=[str(m1)])
+        await cache.load(m1.name, m1.tag)
+        await cache.load(m2.name, m2.tag)
+
+        self.assertIn(m1.key, cache.models)
+        self.assertIn(m2.key, cache.models)
+
+    @asynctest.unittest_run_loop
+    async def test_evict_in_use(self):
+        m1, m2 = [self.new_loaded_model() for _ in range(2)]
+
+        self.storage.load_from_meta = asynctest.AsyncMagicMock(
+            side_effect=[m1, m2])
+
+        cache = await Cache.new(storage=self.storage, capacity=1)
+        await cache.load(m1.name, m1.tag)
+
+        # Evicted model must stay loaded until the last user releases it.
+        with m1.using():
+            await cache.load(m2.name, m2.tag)
+            self.assertNotIn(m1.key, cache.models)
+            self.assertTrue(m1.loaded)
+        self.assertFalse(m1.loaded)
+
+    @asynctest.unittest_run_loop
+    async def test_swap_latest(self):
+        m1 = self.new_loaded_model()
+        m1.tag = "latest"
+        m2 = kerastest.new_model(m1.name, "latest")
+
+        loading = asyncio.Event()
+
+        async def load_model(m):
+            await loading.wait()
+            m.model = unittest.mock.MagicMock()
+            return m
+
+        self.storage.load_model = load_model
+
+        cache = await Cache.new(storage=self.storage, swap=True)
+        await cache.save_to_cache(m1)
+
+        with m1.using():
+            # Previous version keeps serving until the new one is loaded.
+            await cache.save_to_cache(m2)
+            self.assertIs(await cache.load(m1.name, m1.tag), m1)
+            self.assertEqual(len(cache.tasks), 1)
+
+            loading.set()
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(cache.tasks), 0)
+
+            self.assertIs(await cache.load(m1.name, m1.tag), m2)
+            self.assertTrue(m1.loaded)
+
+        # Previous version is released after the last prediction.
+        self.assertFalse(m1.loaded)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,13 +1,21 @@
 import aiohttp.test_utils as aiohttptest
 import aiohttp.web
+import asyncio
+import gzip
 import io
 import numpy
 import pathlib
+import tempfile
 import unittest
+import unittest.mock
 
 from tensorcraft import asynclib
 from tensorcraft import errors
 from tensorcraft import client
+from tensorcraft import tensorlib
+from tensorcraft.backend import httpapi
+from tensorcraft.backend import model
+from tensorcraft.backend import saving
 from tests import asynctest
 from tests import cryptotest
 from tests import kerastest
@@ -32,7 +40,8 @@ class TestModelClient(asynctest.AsyncTestCase):
 
         async with aiohttptest.TestServer(app) as server:
             service_url = str(server.make_url(""))
-            yield client.Model(client.Session(service_url))
+            async with client.Model(client.Session(service_url)) as c:
+                yield c
 
         handler_mock.assert_called()
 
@@ -110,6 +119,22 @@ class TestModelClient(asynctest.AsyncTestCase):
 
             self.assertEqual(want_value, writer.getvalue())
 
+    @asynctest.unittest_run_loop
+    async def test_export_compressed(self):
+        m = kerastest.new_model()
+        path = f"/models/{m.name}/{m.tag}"
+
+        # Server does not compress the model, so the client does.
+        want_value = cryptotest.random_bytes()
+        resp = aiohttp.web.Response(body=want_value)
+
+        async with self.handle_request("GET", path, resp) as client:
+            writer = io.BytesIO()
+            await client.export(m.name, m.tag, asynclib.AsyncIO(writer),
+                                encoding="gzip")
+
+            self.assertEqual(want_value, gzip.decompress(writer.getvalue()))
+
     @asynctest.unittest_run_loop
     async def test_predict(self):
         m = kerastest.new_model()
@@ -124,6 +149,21 @@ class TestModelClient(asynctest.AsyncTestCase):
 
             self.assertTrue(numpy.array_equal(y_true, y_pred))
 
+    @asynctest.unittest_run_loop
+    async def test_predict_binary(self):
+        m = kerastest.new_model()
+        path = f"/models/{m.name}/{m.tag}/predict"
+
+        y_true = numpy.array([cryptotest.random_array()])
+        resp = aiohttp.web.Response(body=tensorlib.dumps(y_true),
+                                    content_type=tensorlib.NPY_CONTENT_TYPE)
+
+        async with self.handle_request("POST", path, resp) as client:
+            x_pred = numpy.array([cryptotest.random_array()])
+            y_pred = await client.predict(m.name, m.tag, x_pred)
+
+            self.assertTrue(numpy.array_equal(y_true, y_pred))
+
     @asynctest.unittest_run_loop
     async def test_push(self):
         m = kerastest.new_model()
@@ -160,6 +200,139 @@ class TestModelClient(asynctest.AsyncTestCase):
                 b = cryptotest.random_bytes()
                 await client.push(m.name, m.tag, io.BytesIO(b))
 
+    @asynctest.unittest_run_loop
+    async def test_session_reused(self):
+        async def handler(req):
+            return aiohttp.web.json_response(dict(models=0))
+
+        app = aiohttp.web.Application()
+        app.router.add_get("/status", handler)
+
+        async with aiohttptest.TestServer(app) as server:
+            session = client.Session(str(server.make_url("")),
+                                     max_connections=2)
+
+            async with client.Model(session) as models:
+                await models.status()
+                http_session = session.session
+
+                await asyncio.gather(*[models.status() for _ in range(10)])
+                self.assertIs(session.session, http_session)
+                self.assertFalse(http_session.closed)
+
+            self.assertTrue(http_session.closed)
+
+    @asynctest.unittest_run_loop
+    async def test_predict_many(self):
+        async def handler(req):
+            x = tensorlib.loads(await req.read())
+            return aiohttp.web.Response(
+                body=tensorlib.dumps(x * 2),
+                content_type=tensorlib.NPY_CONTENT_TYPE)
+
+        app = aiohttp.web.Application()
+        app.router.add_post("/models/{name}/{tag}/predict", handler)
+
+        x = numpy.arange(10.0).reshape(10, 1)
+
+        async with aiohttptest.TestServer(app) as server:
+            session = client.Session(str(server.make_url("")))
+            async with client.Model(session) as models:
+                ys = [y async for y in models.predict_many(
+                      "m", "1", x, batch_size=3, concurrency=2)]
+                self.assertEqual([len(y) for y in ys], [3, 3, 3, 1])
+                self.assertTrue(numpy.array_equal(numpy.concatenate(ys),
+                                                  x * 2))
+
+                ys = [y async for y in models.predict_many(
+                      "m", "1", iter(x.tolist()), batch_size=4)]
+                self.assertTrue(numpy.array_equal(numpy.concatenate(ys),
+                                                  x * 2))
+
+
+class TestDeltaPush(asynctest.AsyncTestCase):
+
+    async def setUpAsync(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.workpath = pathlib.Path(self.workdir.name)
+
+        loader = model.Loader("no")
+        self.storage = saving.ContentAddressedModelsStorage.new(
+            path=self.workpath, loader=loader)
+
+        self.saved, self.uploaded = [], []
+        save_blob = self.storage.save_blob
+
+        async def save_blob_spy(digest, chunks):
+            self.uploaded.append(digest)
+            await save_blob(digest, chunks)
+
+        # Assemble models without loading them into the memory.
+        async def save_manifest(name, tag, manifest):
+            m = model.Model.new(name, tag, self.storage.models_path, loader)
+            await self.storage.assemble(m, manifest)
+            self.saved.append(m)
+            return m
+
+        self.storage.save_blob = save_blob_spy
+        self.models = unittest.mock.Mock()
+        self.models.save_manifest = save_manifest
+
+    async def tearDownAsync(self) -> None:
+        await self.storage.close()
+        self.workdir.cleanup()
+
+    @asynclib.asynccontextmanager
+    async def serve(self):
+        view = httpapi.BlobView(self.storage, self.models)
+
+        app = aiohttp.web.Application()
+        app.add_routes([
+            aiohttp.web.post(view.missing.url, view.missing),
+            aiohttp.web.put(view.save.url, view.save),
+            aiohttp.web.put(view.save_manifest.url, view.save_manifest),
+        ])
+
+        async with aiohttptest.TestServer(app) as server:
+            service_url = str(server.make_url(""))
+            async with client.Model(client.Session(service_url)) as c:
+                yield c
+
+    @asynctest.unittest_run_loop
+    async def test_push_delta(self):
+        model_path = self.workpath.joinpath("model")
+        model_path.joinpath("variables").mkdir(parents=True)
+        model_path.joinpath("saved_model.pb").write_bytes(b"graph")
+        model_path.joinpath("variables", "data").write_bytes(b"w1")
+
+        async with self.serve() as c:
+            await c.push_delta("n", "1", model_path)
+            self.assertEqual(len(self.uploaded), 2)
+
+            # Only changed variables are uploaded on the next push.
+            self.uploaded.clear()
+            model_path.joinpath("variables", "data").write_bytes(b"w2")
+            await c.push_delta("n", "2", model_path)
+
+        self.assertEqual(len(self.uploaded), 1)
+
+        m1, m2 = self.saved
+        self.assertEqual(m1.path.joinpath("variables", "data").read_bytes(),
+                         b"w1")
+        self.assertEqual(m2.path.joinpath("variables", "data").read_bytes(),
+                         b"w2")
+        self.assertEqual(m2.path.joinpath("saved_model.pb").read_bytes(),
+                         b"graph")
+
+    @asynctest.unittest_run_loop
+    async def test_save_blob_digest_mismatch(self):
+        digest = "0" * 64
+        async with self.serve() as c:
+            async with c.session.request("PUT", f"blobs/{digest}",
+                                         data=b"blob") as resp:
+                self.assertEqual(resp.status, 400)
+        self.assertEqual(await self.storage.missing([digest]), [digest])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,11 +1,14 @@
 import argparse
 import flagparse
+import numpy
 import pathlib
 import tarfile
 import tempfile
 import unittest
 import unittest.mock
 
+from tensorcraft import client
+from tensorcraft import compression
 from tensorcraft import errors
 from tensorcraft.shell import commands
 from tests import clienttest
@@ -66,10 +69,29 @@ class TestCommand(unittest.TestCase):
             m = kerastest.new_model()
             path = pathlib.Path(tf.name)
 
-            args = flagparse.Namespace(name=m.name, tag=m.tag, path=path)
+            args = flagparse.Namespace(name=m.name, tag=m.tag, path=path,
+                                       compress=None, compress_level=None)
+            command = commands.Push(unittest.mock.Mock())
+            command.handle(args)
+
+    @clienttest.unittest_mock_model_client("push")
+    def test_push_compressed(self, push_mock):
+        with tempfile.NamedTemporaryFile() as tf:
+            with tarfile.open(tf.name, mode="w:gz") as tar:
+                tar.add("tests", arcname="")
+
+            m = kerastest.new_model()
+            path = pathlib.Path(tf.name)
+
+            args = flagparse.Namespace(name=m.name, tag=m.tag, path=path,
+                                       compress="zstd", compress_level=None)
             command = commands.Push(unittest.mock.Mock())
             command.handle(args)
 
+        # Compressed archive is pushed as is.
+        _, kwargs = push_mock.call_args
+        self.assertEqual(kwargs["encoding"], compression.Encoding.GZip)
+
     @clienttest.unittest_mock_model_client("push")
     def test_push_file_not_exists(self, push_mock):
         m = kerastest.new_model()
@@ -87,10 +109,35 @@ class TestCommand(unittest.TestCase):
             m = kerastest.new_model()
             path = pathlib.Path(tf.name)
 
-            args = flagparse.Namespace(name=m.name, tag=m.tag, path=path)
+            args = flagparse.Namespace(name=m.name, tag=m.tag, path=path,
+                                       compress="identity",
+                                       compress_level=None)
             command = commands.Export(unittest.mock.Mock())
             command.handle(args)
 
+    def test_predict(self):
+        async def predict_many(self, name, tag, x, batch_size, concurrency):
+            for i in range(0, len(x), batch_size):
+                yield x[i:i+batch_size] * 2
+
+        with tempfile.TemporaryDirectory() as td:
+            input_path = pathlib.Path(td, "x.npy")
+            output_path = pathlib.Path(td, "y.npy")
+            numpy.save(str(input_path), numpy.arange(10.0).reshape(5, 2))
+
+            args = flagparse.Namespace(name="m", tag="1", batch_size=2,
+                                       concurrency=2, input=input_path,
+                                       output=output_path)
+
+            with unittest.mock.patch.object(client.Model, "predict_many",
+                                            predict_many):
+                command = commands.Predict(unittest.mock.Mock())
+                command.handle(args)
+
+            y = numpy.load(str(output_path))
+            self.assertTrue(numpy.array_equal(
+                y, numpy.arange(10.0).reshape(5, 2) * 2))
+
 
 if __name__ == "__main__":
     unittest.main()
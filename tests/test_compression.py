@@ -0,0 +1,167 @@
+import gzip
+import threading
+import unittest
+import unittest.mock
+
+from tensorcraft import compression
+from tests import asynctest
+
+
+async def chunked(b: bytes, size: int):
+    for i in range(0, len(b), size):
+        yield b[i:i+size]
+
+
+async def join(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestCompression(asynctest.AsyncTestCase):
+
+    def test_sniff(self):
+        self.assertEqual(compression.sniff(gzip.compress(b"data")),
+                         compression.Encoding.GZip)
+        self.assertEqual(compression.sniff(b"\x28\xb5\x2f\xfd\x00"),
+                         compression.Encoding.Zstd)
+        self.assertEqual(compression.sniff(b"model.pb"),
+                         compression.Encoding.Identity)
+
+    def test_negotiate(self):
+        Encoding = compression.Encoding
+        self.assertEqual(compression.negotiate(""), Encoding.Identity)
+        self.assertEqual(compression.negotiate("gzip, deflate"),
+                         Encoding.GZip)
+        self.assertEqual(compression.negotiate("gzip;q=0, identity"),
+                         Encoding.Identity)
+
+        want = Encoding.Zstd if compression.zstandard else Encoding.GZip
+        self.assertEqual(compression.negotiate("gzip;q=0.5, zstd"), want)
+
+    @asynctest.unittest_run_loop
+    async def test_gzip(self):
+        data = bytes(range(256)) * 64
+
+        chunks = compression.compress(chunked(data, 1000), "gzip", 1)
+        compressed = await join(chunks)
+        self.assertEqual(gzip.decompress(compressed), data)
+
+        # Decompression does not depend on the size of chunks.
+        for size in (1, 3, 1000):
+            chunks = compression.decompress(chunked(compressed, size))
+            self.assertEqual(await join(chunks), data)
+
+        chunks = compression.decompress(chunked(data, 1))
+        self.assertEqual(await join(chunks), data)
+
+    @asynctest.unittest_run_loop
+    async def test_gzip_members(self):
+        data = bytes(range(256)) * 64
+        compressed = gzip.compress(data[:1000]) + gzip.compress(data[1000:])
+
+        for size in (1, 3, 1000, len(compressed)):
+            chunks = compression.decompress(chunked(compressed, size))
+            self.assertEqual(await join(chunks), data)
+
+    @asynctest.unittest_run_loop
+    async def test_gzip_truncated(self):
+        compressed = gzip.compress(bytes(range(256)) * 64)
+
+        for data in (compressed[:-4], compressed[:2] + b"\xff" * 100):
+            chunks = compression.decompress(chunked(data, 1000))
+            with self.assertRaises(compression.DecompressionError):
+                await join(chunks)
+
+    @asynctest.unittest_run_loop
+    async def test_decompress_bounded(self):
+        size = 16 * compression.MAX_OUTPUT_SIZE
+        compressed = gzip.compress(bytes(size))
+
+        # Highly compressed content is expanded in the bounded pieces.
+        chunks = compression.decompress(chunked(compressed, len(compressed)))
+        pieces = [len(chunk) async for chunk in chunks]
+        self.assertEqual(sum(pieces), size)
+        self.assertLessEqual(max(pieces), compression.MAX_OUTPUT_SIZE)
+
+    @asynctest.unittest_run_loop
+    async def test_compress_writer(self):
+        data = bytes(range(256)) * 1024
+        writer = asynctest.AsyncMagicMock()
+
+        w = compression.CompressWriter(writer, "gzip", 1)
+        await w.write(data[:100])
+        await w.write(data)
+        await w.close()
+
+        compressed = b"".join(c[0][0] for c in writer.write.call_args_list)
+        self.assertEqual(gzip.decompress(compressed), data[:100] + data)
+
+    @asynctest.unittest_run_loop
+    async def test_compress_writer_small_writes(self):
+        record = bytes(range(256)) * 40
+        writer = asynctest.AsyncMagicMock()
+        threads = []
+
+        c = compression.compressor("gzip", 1)
+        compressor = unittest.mock.Mock(flush=c.flush)
+
+        def compress(b):
+            threads.append(threading.get_ident())
+            return c.compress(b)
+        compressor.compress.side_effect = compress
+
+        # Small records are buffered and compressed outside of the loop.
+        with unittest.mock.patch("tensorcraft.compression.compressor",
+                                 return_value=compressor):
+            w = compression.CompressWriter(writer, "gzip", 1)
+            for _ in range(64):
+                await w.write(record)
+            await w.close()
+
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+        compressed = b"".join(c[0][0] for c in writer.write.call_args_list)
+        self.assertEqual(gzip.decompress(compressed), record * 64)
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is missing")
+    @asynctest.unittest_run_loop
+    async def test_zstd(self):
+        data = bytes(range(256)) * 64
+
+        chunks = compression.compress(chunked(data, 1000), "zstd", 19)
+        chunks = compression.decompress(chunks)
+        self.assertEqual(await join(chunks), data)
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is missing")
+    @asynctest.unittest_run_loop
+    async def test_zstd_frames(self):
+        data = bytes(range(256)) * 64
+        c = compression.zstandard.ZstdCompressor()
+        compressed = c.compress(data[:1000]) + c.compress(data[1000:])
+
+        for size in (1, 1000):
+            chunks = compression.decompress(chunked(compressed, size))
+            self.assertEqual(await join(chunks), data)
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is missing")
+    @asynctest.unittest_run_loop
+    async def test_zstd_bounded(self):
+        size = 16 * compression.MAX_OUTPUT_SIZE
+        c = compression.zstandard.ZstdCompressor()
+        compressed = c.compress(bytes(size))
+
+        chunks = compression.decompress(chunked(compressed, len(compressed)))
+        pieces = [len(chunk) async for chunk in chunks]
+        self.assertEqual(sum(pieces), size)
+        self.assertLessEqual(max(pieces), compression.MAX_OUTPUT_SIZE)
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is missing")
+    @asynctest.unittest_run_loop
+    async def test_zstd_invalid(self):
+        data = b"\x28\xb5\x2f\xfd" + b"\xff" * 100
+        with self.assertRaises(compression.DecompressionError):
+            await join(compression.decompress(chunked(data, 10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import concurrent.futures
+import gc
+import numpy
+import threading
+import unittest
+import unittest.mock
+
+from tensorcraft import errors
+from tensorcraft.backend import model
+from tensorcraft.backend.model import Executor
+from tests import asynctest
+from tests import kerastest
+
+
+class TestExecutor(asynctest.AsyncTestCase):
+
+    async def setUpAsync(self) -> None:
+        self.m = kerastest.new_model()
+        self.m.model = unittest.mock.Mock(input_shape=(None, 1))
+        self.m.model.predict.side_effect = lambda x: x * 2
+
+    @asynctest.unittest_run_loop
+    async def test_predict(self):
+        executor = Executor()
+        self.m.model.predict.side_effect = lambda x: threading.get_ident()
+
+        thread_id = await executor.predict(self.m, numpy.array([[1.0]]))
+
+        self.assertNotEqual(thread_id, threading.get_ident())
+        self.assertEqual(executor.pending, 0)
+        await executor.close()
+
+    @asynctest.unittest_run_loop
+    async def test_predict_queue_full(self):
+        executor = Executor(max_queue=1)
+        event = threading.Event()
+        self.m.model.predict.side_effect = lambda x: event.wait(1)
+
+        x = numpy.array([[1.0]])
+        task = asyncio.ensure_future(executor.predict(self.m, x))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(errors.QueueFullError):
+            await executor.predict(self.m, x)
+
+        event.set()
+        await task
+        await executor.close()
+
+    @asynctest.unittest_run_loop
+    async def test_predict_concurrency(self):
+        executor = Executor(max_workers=4, max_concurrency=1)
+        running, max_running = 0, 0
+        lock = threading.Lock()
+
+        def predict(x):
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(running, max_running)
+            threading.Event().wait(0.01)
+            with lock:
+                running -= 1
+            return x
+
+        self.m.model.predict.side_effect = predict
+
+        x = numpy.array([[1.0]])
+        await asyncio.gather(*[executor.predict(self.m, x) for _ in range(4)])
+
+        self.assertEqual(max_running, 1)
+        self.assertFalse(executor.semaphores)
+        await executor.close()
+
+    @unittest.mock.patch("tensorcraft.backend.model.load_model")
+    def test_process_predict_release(self, load_mock):
+        load_mock.side_effect = lambda path: unittest.mock.Mock(
+            predict=lambda x: x * 2)
+        self.addCleanup(model._process_models.clear)
+
+        x = numpy.array([[1.0]])
+        model._process_predict("a", x, frozenset({"a"}))
+        model._process_predict("b", x, frozenset({"a", "b"}))
+        self.assertEqual(set(model._process_models), {"a", "b"})
+
+        # Model unloaded by the parent is released by the worker.
+        y = model._process_predict("b", x, frozenset({"b"}))
+        self.assertEqual(set(model._process_models), {"b"})
+        self.assertTrue(numpy.array_equal(y, x * 2))
+        self.assertEqual(load_mock.call_count, 2)
+
+    @unittest.mock.patch("tensorcraft.backend.model.load_model")
+    @asynctest.unittest_run_loop
+    async def test_process_load(self, load_mock):
+        load_mock.return_value = unittest.mock.Mock(input_shape=(None, 1))
+        load_mock.return_value.predict.side_effect = lambda x: x * 2
+        self.addCleanup(model._process_models.clear)
+
+        # Run the worker functions in threads, so the model is mocked.
+        executor = Executor(kind="process")
+        executor.pool.shutdown()
+        executor.pool = concurrent.futures.ThreadPoolExecutor()
+
+        loader = model.Loader("no", executor=executor)
+        self.m.model = loader.load(self.m.path)
+
+        # Only the input shape is kept by the server process.
+        self.assertIsInstance(self.m.model, model.ProcessModel)
+        self.assertEqual(self.m.model.input_shape, (None, 1))
+
+        y = await executor.predict(self.m, self.m.validate([[1.0]]))
+        self.assertTrue(numpy.array_equal(y, [[2.0]]))
+        self.assertEqual(executor.live(), {str(self.m.path)})
+
+        self.m.unload()
+        gc.collect()
+        self.assertEqual(executor.live(), frozenset())
+        await executor.close()
+
+    @unittest.mock.patch("tensorcraft.backend.model.load_model")
+    @asynctest.unittest_run_loop
+    async def test_process_warmup(self, load_mock):
+        threads = set()
+
+        def predict(x):
+            threads.add(threading.get_ident())
+            return x * 2
+
+        load_mock.return_value = unittest.mock.Mock(input_shape=(None, 1))
+        load_mock.return_value.predict.side_effect = predict
+        self.addCleanup(model._process_models.clear)
+
+        # Run the worker functions in threads, so the model is mocked.
+        executor = Executor(kind="process", max_workers=3)
+        executor.pool.shutdown()
+        executor.pool = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+
+        loader = model.Loader("no", warmup_batch_sizes=[1, 2],
+                              executor=executor)
+        m = loader.load(self.m.path)
+        loader.warmup(m, self.m.path)
+
+        # Each worker of the pool is warmed up.
+        self.assertEqual(len(threads), 3)
+        self.assertEqual(load_mock.return_value.predict.call_count, 6)
+        await executor.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
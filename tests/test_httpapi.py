@@ -0,0 +1,183 @@
+import aiohttp.test_utils as aiohttptest
+import aiohttp.web
+import gzip
+import io
+import json
+import numpy
+import unittest
+import unittest.mock
+
+from tensorcraft import errors
+from tensorcraft import metrics
+from tensorcraft import server
+from tensorcraft import tensorlib
+from tensorcraft.backend import httpapi
+from tensorcraft.backend import model
+from tests import kerastest
+
+
+class TestModelViewStream(aiohttptest.AioHTTPTestCase):
+
+    async def get_application(self) -> aiohttp.web.Application:
+        self.m = kerastest.new_model("m", "1")
+        self.m.model = unittest.mock.Mock(input_shape=(None, 2))
+        self.m.model.predict.side_effect = lambda x: x.sum(axis=1,
+                                                           keepdims=True)
+
+        async def load(name, tag):
+            if (name, tag) != ("m", "1"):
+                raise errors.NotFoundError(name, tag)
+            return self.m
+
+        models = unittest.mock.Mock()
+        models.load = load
+
+        view = httpapi.ModelView(models, model.Batching())
+
+        handler = server.instrument(view.predict_stream,
+                                    view.predict_stream.url)
+
+        app = aiohttp.web.Application()
+        app.router.add_post(view.predict_stream.url, handler)
+        return app
+
+    def post(self, url, data, content_type):
+        return self.client.post(url, data=data,
+                                headers={"Content-Type": content_type})
+
+    @aiohttptest.unittest_run_loop
+    async def test_predict_metrics_labels(self):
+        records = "[1, 2]\n"
+        for name in ("m", "missing-1", "missing-2"):
+            await self.post(f"/models/{name}/1/predict/stream",
+                            records, tensorlib.NDJSON_CONTENT_TYPE)
+
+        # Requests to missing models do not create label values per URL.
+        labels = {dict(zip(metrics.http_requests.labelnames, values))["model"]
+                  for values in metrics.http_requests.children}
+        self.assertIn("m:1", labels)
+        self.assertIn("unresolved", labels)
+        self.assertFalse({"missing-1:1", "missing-2:1"} & labels)
+
+    @aiohttptest.unittest_run_loop
+    async def test_predict_records(self):
+        records = "".join(json.dumps([i, i]) + "\n" for i in range(5))
+        resp = await self.post("/models/m/1/predict/stream?batch_size=2",
+                               records, tensorlib.NDJSON_CONTENT_TYPE)
+        self.assertEqual(resp.status, 200)
+
+        lines = (await resp.text()).splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [[0], [2], [4], [6], [8]])
+        self.assertEqual(self.m.model.predict.call_count, 3)
+
+    @aiohttptest.unittest_run_loop
+    async def test_predict_frames(self):
+        x = numpy.arange(10.0).reshape(5, 2)
+        data = tensorlib.dumps_frame(x[:1]) + tensorlib.dumps_frame(x[1:])
+
+        resp = await self.post("/models/m/1/predict/stream?batch_size=4",
+                               data, tensorlib.NPY_FRAMES_CONTENT_TYPE)
+        self.assertEqual(resp.status, 200)
+
+        stream = io.BytesIO(await resp.read())
+        ys = []
+        header = stream.read(tensorlib.FRAME_HEADER.size)
+        while header:
+            length, = tensorlib.FRAME_HEADER.unpack(header)
+            ys.append(tensorlib.loads(stream.read(length)))
+            header = stream.read(tensorlib.FRAME_HEADER.size)
+
+        self.assertEqual([len(y) for y in ys], [4, 1])
+        self.assertTrue(numpy.array_equal(numpy.concatenate(ys),
+                                          x.sum(axis=1, keepdims=True)))
+
+    @aiohttptest.unittest_run_loop
+    async def test_predict_invalid_record(self):
+        records = '[1, 2]\n[3, 4]\n{"y": 1}\n'
+        resp = await self.post("/models/m/1/predict/stream?batch_size=1",
+                               records, tensorlib.NDJSON_CONTENT_TYPE)
+        self.assertEqual(resp.status, 200)
+
+        lines = [json.loads(line) for line in (await resp.text()).splitlines()]
+        self.assertEqual(lines[0], [3])
+        self.assertIn("error", lines[-1])
+
+    @aiohttptest.unittest_run_loop
+    async def test_predict_invalid_first_record(self):
+        resp = await self.post("/models/m/1/predict/stream", "[1, 2, 3]\n",
+                               tensorlib.NDJSON_CONTENT_TYPE)
+        self.assertEqual(resp.status, 400)
+
+    @aiohttptest.unittest_run_loop
+    async def test_predict_not_found(self):
+        resp = await self.post("/models/x/y/predict/stream", "[1, 2]\n",
+                               tensorlib.NDJSON_CONTENT_TYPE)
+        self.assertEqual(resp.status, 404)
+
+    @aiohttptest.unittest_run_loop
+    async def test_predict_unsupported_content_type(self):
+        resp = await self.post("/models/m/1/predict/stream", "x=1",
+                               "text/plain")
+        self.assertEqual(resp.status, 415)
+
+
+class TestModelViewArchive(aiohttptest.AioHTTPTestCase):
+
+    async def get_application(self) -> aiohttp.web.Application:
+        self.archive = b"archive" * 1024
+        self.saved = []
+
+        async def save(name, tag, stream):
+            self.saved.append(stream.read())
+
+        async def export(name, tag, writer):
+            await writer.write(self.archive[:100])
+            await writer.write(self.archive[100:])
+
+        models = unittest.mock.Mock(root_path=None)
+        models.save, models.export = save, export
+
+        view = httpapi.ModelView(models, model.Batching())
+
+        app = aiohttp.web.Application()
+        app.router.add_put(view.save.url, view.save)
+        app.router.add_get(view.export.url, view.export)
+        return app
+
+    @aiohttptest.unittest_run_loop
+    async def test_save_compressed(self):
+        data = gzip.compress(self.archive)
+
+        # Body is decompressed either by the HTTP server or by the handler.
+        for headers in ({"Content-Encoding": "gzip"}, {}):
+            resp = await self.client.put("/models/m/1", data=data,
+                                         headers=headers)
+            self.assertEqual(resp.status, 201)
+
+        self.assertEqual(self.saved, [self.archive, self.archive])
+
+    @aiohttptest.unittest_run_loop
+    async def test_save_invalid_compressed(self):
+        data = gzip.compress(self.archive)[:-10]
+
+        resp = await self.client.put("/models/m/1", data=data)
+        self.assertEqual(resp.status, 400)
+        self.assertEqual(self.saved, [])
+
+    @aiohttptest.unittest_run_loop
+    async def test_export_compressed(self):
+        resp = await self.client.get("/models/m/1",
+                                     headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertEqual(await resp.read(), self.archive)
+
+        resp = await self.client.get("/models/m/1",
+                                     headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("Content-Encoding", resp.headers)
+        self.assertEqual(await resp.read(), self.archive)
+
+
+if __name__ == "__main__":
+    unittest.main()
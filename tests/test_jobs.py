@@ -0,0 +1,217 @@
+import asyncio
+import numpy
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+from tensorcraft import errors
+from tensorcraft.backend import jobs
+from tests import asynctest
+from tests import kerastest
+
+
+class TestJobManager(asynctest.AsyncTestCase):
+
+    async def setUpAsync(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.workpath = pathlib.Path(self.workdir.name)
+
+        self.m = kerastest.new_model("m", "1")
+        self.m.model = unittest.mock.Mock(input_shape=(None, 2))
+        self.m.model.predict.side_effect = lambda x: x.sum(axis=1,
+                                                           keepdims=True)
+
+        async def load(name, tag):
+            if (name, tag) != ("m", "1"):
+                raise errors.NotFoundError(name, tag)
+            return self.m
+
+        self.models = unittest.mock.Mock()
+        self.models.load = load
+
+    async def tearDownAsync(self) -> None:
+        self.workdir.cleanup()
+
+    async def new_manager(self, **kwargs):
+        return await jobs.JobManager.new(self.workpath.joinpath("jobs"),
+                                         self.models, batch_size=3, **kwargs)
+
+    async def wait(self, job):
+        while not job.done:
+            await asyncio.sleep(0.01)
+
+    @asynctest.unittest_run_loop
+    async def test_create_uploaded(self):
+        manager = await self.new_manager()
+
+        x = numpy.arange(14.0).reshape(7, 2)
+        input_path = self.workpath.joinpath("x.npy")
+        numpy.save(str(input_path), x)
+
+        async def chunks():
+            yield input_path.read_bytes()
+
+        job = await manager.create("m", "1", chunks=chunks())
+        await self.wait(job)
+
+        self.assertEqual(job.status, jobs.Status.Completed)
+        self.assertEqual((job.processed, job.total), (7, 7))
+        self.assertEqual(self.m.model.predict.call_count, 3)
+
+        y = numpy.load(str(manager.result_path(job)))
+        self.assertTrue(numpy.array_equal(y, x.sum(axis=1, keepdims=True)))
+        await manager.close()
+
+    @asynctest.unittest_run_loop
+    async def test_create_failed(self):
+        manager = await self.new_manager()
+
+        input_path = self.workpath.joinpath("x.npy")
+        numpy.save(str(input_path), numpy.ones((2, 2)))
+
+        job = await manager.create("x", "y", input_path=input_path)
+        await self.wait(job)
+
+        self.assertEqual(job.status, jobs.Status.Failed)
+        self.assertIn("not found", job.error)
+        await manager.close()
+
+    @asynctest.unittest_run_loop
+    async def test_restart(self):
+        manager = await self.new_manager()
+
+        input_path = self.workpath.joinpath("x.npy")
+        numpy.save(str(input_path), numpy.ones((2, 2)))
+
+        job = jobs.Job.new("m", "1", str(input_path))
+        manager.job_path(job).mkdir()
+        manager.save(job)
+
+        restarted = await self.new_manager()
+        job = restarted.get(job.id)
+        await self.wait(job)
+
+        self.assertEqual(job.status, jobs.Status.Completed)
+        await manager.close()
+        await restarted.close()
+
+    @asynctest.unittest_run_loop
+    async def test_predict_queue_full(self):
+        batching = unittest.mock.Mock()
+        batching.predict = asynctest.AsyncMagicMock(side_effect=[
+            errors.QueueFullError("m", "1"),
+            numpy.ones((2, 1)),
+        ])
+
+        manager = await self.new_manager(batching=batching)
+        manager.retry_delay = 0.01
+
+        input_path = self.workpath.joinpath("x.npy")
+        numpy.save(str(input_path), numpy.ones((2, 2)))
+
+        job = await manager.create("m", "1", input_path=input_path)
+        await self.wait(job)
+
+        self.assertEqual(job.status, jobs.Status.Completed)
+        self.assertEqual(batching.predict.call_count, 2)
+        await manager.close()
+
+    @asynctest.unittest_run_loop
+    async def test_restart_resume(self):
+        manager = await self.new_manager()
+
+        x = numpy.arange(14.0).reshape(7, 2)
+        input_path = self.workpath.joinpath("x.npy")
+        numpy.save(str(input_path), x)
+
+        job = jobs.Job.new("m", "1", str(input_path))
+        job.status, job.processed = jobs.Status.Running, 3
+        manager.job_path(job).mkdir()
+        manager.save(job)
+
+        y = x.sum(axis=1, keepdims=True)
+        numpy.save(str(manager.result_path(job)), y)
+
+        restarted = await self.new_manager()
+        job = restarted.get(job.id)
+        await self.wait(job)
+
+        self.assertEqual(job.status, jobs.Status.Completed)
+        self.assertEqual(job.processed, 7)
+        self.assertEqual(self.m.model.predict.call_count, 2)
+
+        y_resumed = numpy.load(str(restarted.result_path(job)))
+        self.assertTrue(numpy.array_equal(y_resumed, y))
+        await manager.close()
+        await restarted.close()
+
+    @asynctest.unittest_run_loop
+    async def test_restart_resume_queue_full(self):
+        manager = await self.new_manager()
+
+        x = numpy.arange(14.0).reshape(7, 2)
+        input_path = self.workpath.joinpath("x.npy")
+        numpy.save(str(input_path), x)
+
+        interrupted = [jobs.Job.new("m", "1", str(input_path))
+                       for _ in range(4)]
+        for job in interrupted:
+            manager.job_path(job).mkdir()
+            manager.save(job)
+
+        loading = asyncio.Event()
+        load = self.models.load
+
+        async def load_blocked(name, tag):
+            await loading.wait()
+            return await load(name, tag)
+
+        self.models.load = load_blocked
+
+        # Resumed jobs overflow the queue, but must not block the start.
+        restarted = await asyncio.wait_for(
+            self.new_manager(max_pending=1), timeout=1)
+
+        loading.set()
+        for job in interrupted:
+            job = restarted.get(job.id)
+            await self.wait(job)
+            self.assertEqual(job.status, jobs.Status.Completed)
+
+        await manager.close()
+        await restarted.close()
+
+    @asynctest.unittest_run_loop
+    async def test_create_queue_full(self):
+        manager = await self.new_manager(max_pending=1)
+        uploading = asyncio.Event()
+
+        async def chunks():
+            uploading.set()
+            await asyncio.sleep(0.05)
+            yield b""
+
+        task = asyncio.ensure_future(manager.create("m", "1",
+                                                    chunks=chunks()))
+        await uploading.wait()
+
+        with self.assertRaises(errors.QueueFullError):
+            await manager.create("m", "1", chunks=chunks())
+
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(manager.creating, 0)
+        await manager.close()
+
+    @asynctest.unittest_run_loop
+    async def test_get_not_found(self):
+        manager = await self.new_manager()
+        with self.assertRaises(errors.JobNotFoundError):
+            manager.get("missing")
+        await manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import aiohttp.test_utils as aiohttptest
+import aiohttp.web
+import unittest
+
+from tensorcraft import client
+from tensorcraft import loadtest
+from tensorcraft import tensorlib
+
+
+class TestRecorder(unittest.TestCase):
+
+    def test_backfill(self):
+        recorder = loadtest.Recorder()
+        recorder.record(0.01)
+        recorder.record(0.035)
+
+        recorder.backfill(0.01)
+        self.assertEqual(len(recorder.corrected), 5)
+        self.assertAlmostEqual(max(recorder.corrected), 0.035)
+        self.assertAlmostEqual(min(recorder.corrected), 0.005)
+
+    def test_report(self):
+        recorder = loadtest.Recorder()
+        recorder.record(0.01)
+        recorder.record_error("503")
+
+        report = recorder.report(elapsed=1.0)
+        self.assertEqual(report["requests"], 2)
+        self.assertEqual(report["errors"], {"503": 1})
+        self.assertEqual(report["error_rate"], 0.5)
+        self.assertAlmostEqual(report["latency"]["p50"], 10.0)
+
+    def test_parse_shape(self):
+        self.assertEqual(loadtest.parse_shape("8,28,28"), (8, 28, 28))
+        with self.assertRaises(ValueError):
+            loadtest.parse_shape("8,x")
+        with self.assertRaises(ValueError):
+            loadtest.parse_shape("0")
+
+
+class TestLoadTest(aiohttptest.AioHTTPTestCase):
+
+    async def get_application(self) -> aiohttp.web.Application:
+        self.requests = 0
+
+        async def predict(req):
+            self.requests += 1
+            if req.match_info["tag"] == "missing":
+                raise aiohttp.web.HTTPNotFound()
+
+            x = tensorlib.loads(await req.read())
+            return aiohttp.web.Response(body=tensorlib.dumps(x),
+                                        content_type=req.content_type)
+
+        app = aiohttp.web.Application()
+        app.router.add_post("/models/{name}/{tag}/predict", predict)
+        return app
+
+    async def setUpAsync(self) -> None:
+        await super().setUpAsync()
+        url = str(self.server.make_url("")).rstrip("/")
+        self.session = client.Session(url)
+
+    async def tearDownAsync(self) -> None:
+        await self.session.close()
+        await super().tearDownAsync()
+
+    async def new_load_test(self, tag, **kwargs):
+        return loadtest.LoadTest(self.session, "m", tag, shape=(2, 3),
+                                 **kwargs)
+
+    @aiohttptest.unittest_run_loop
+    async def test_run_rate(self):
+        test = await self.new_load_test("1", rate=100, duration=0.2)
+        report = await test.run()
+
+        self.assertEqual(report["requests"], 20)
+        self.assertEqual(report["error_rate"], 0.0)
+        self.assertEqual(self.requests, 20)
+
+    @aiohttptest.unittest_run_loop
+    async def test_run_concurrency(self):
+        test = await self.new_load_test("1", concurrency=4, duration=0.1)
+        report = await test.run()
+
+        self.assertGreater(report["requests"], 0)
+        self.assertEqual(report["requests"], self.requests)
+        self.assertIn("p99", report["corrected_latency"])
+
+    @aiohttptest.unittest_run_loop
+    async def test_run_errors(self):
+        test = await self.new_load_test("missing", rate=50, duration=0.1)
+        report = await test.run()
+
+        self.assertEqual(report["errors"], {"404": 5})
+        self.assertEqual(report["error_rate"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from tensorcraft import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.registry = metrics.Registry()
+
+    def test_counter(self):
+        c = metrics.Counter("requests", "Requests.", ["code"],
+                            registry=self.registry)
+        c.labels("200").inc()
+        c.labels(code="200").inc(2)
+
+        self.assertIn('requests_total{code="200"} 3.0',
+                      self.registry.expose())
+
+        with self.assertRaises(ValueError):
+            c.labels("200").inc(-1)
+
+    def test_gauge_function(self):
+        g = metrics.Gauge("depth", "Depth.", registry=self.registry)
+        g.set_function(lambda: 5)
+        self.assertIn("depth 5", self.registry.expose())
+
+    def test_histogram(self):
+        h = metrics.Histogram("latency", "Latency.", buckets=[0.1, 1],
+                              registry=self.registry)
+        h.observe(0.05)
+        h.observe(0.5)
+        h.observe(5)
+
+        text = self.registry.expose()
+        self.assertIn("# TYPE latency histogram", text)
+        self.assertIn('latency_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_bucket{le="1.0"} 2', text)
+        self.assertIn('latency_bucket{le="+Inf"} 3', text)
+        self.assertIn("latency_count 3", text)
+        self.assertIn("latency_sum 5.55", text)
+
+    def test_labels_escaped(self):
+        c = metrics.Counter("errors", "Errors.", ["reason"],
+                            registry=self.registry)
+        c.labels('say "hi"\n').inc()
+        self.assertIn(r'errors_total{reason="say \"hi\"\n"} 1.0',
+                      self.registry.expose())
+
+    def test_labels_mismatch(self):
+        c = metrics.Counter("errors", "Errors.", ["reason"],
+                            registry=self.registry)
+        with self.assertRaises(ValueError):
+            c.labels()
+
+
+if __name__ == "__main__":
+    unittest.main()
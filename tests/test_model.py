@@ -0,0 +1,51 @@
+import numpy
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+from tensorcraft.backend import model
+
+
+class TestLoader(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.workpath = pathlib.Path(self.workdir.name)
+
+    def tearDown(self) -> None:
+        self.workdir.cleanup()
+
+    def test_warmup(self):
+        loader = model.Loader("no", warmup_batch_sizes=[1, 8])
+        m = unittest.mock.Mock(input_shape=(None, 3))
+
+        loader.warmup(m, self.workpath)
+
+        shapes = [args[0].shape for args, _ in m.predict.call_args_list]
+        self.assertEqual(shapes, [(1, 3), (8, 3)])
+
+    def test_warmup_samples(self):
+        loader = model.Loader("no", warmup_batch_sizes=[1, 8])
+        m = unittest.mock.Mock(input_shape=(None, 3))
+
+        samples_path = self.workpath.joinpath(loader.warmup_path)
+        samples_path.parent.mkdir()
+        numpy.save(str(samples_path), numpy.ones((2, 3)))
+
+        loader.warmup(m, self.workpath)
+
+        m.predict.assert_called_once()
+        x, = m.predict.call_args[0]
+        self.assertTrue(numpy.array_equal(x, numpy.ones((2, 3))))
+
+    def test_warmup_undefined_shape(self):
+        loader = model.Loader("no", warmup_batch_sizes=[1])
+        m = unittest.mock.Mock(input_shape=(None, None))
+
+        loader.warmup(m, self.workpath)
+        m.predict.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,13 @@
 import aiofiles
 import io
 import pathlib
+import tarfile
 import tempfile
 import unittest
 import unittest.mock
 
+from tensorcraft import asynclib
+from tensorcraft import tarlib
 from tensorcraft.backend import model
 from tensorcraft.backend import saving
 from tests import asynctest
@@ -36,6 +39,238 @@ class TestModelRuntime(asynctest.AsyncTestCase):
         self.assertEqual(d1["id"], d2["id"])
         self.assertTrue(m.loaded)
 
+    @asynctest.unittest_run_loop
+    async def test_delete_from_meta(self):
+        loader = model.Loader("no")
+        fs = saving.FsModelsStorage.new(path=self.workpath, loader=loader)
+
+        m1 = model.Model.new("n", "t1", fs.models_path, loader)
+        m2 = model.Model.new("n", "t2", fs.models_path, loader)
+        await fs.meta.insert(m1.to_dict())
+        await fs.meta.insert(m2.to_dict())
+
+        saved = []
+
+        async def on_save(m):
+            saved.append(m)
+        fs.on_save.append(on_save)
+
+        await fs.delete_from_meta("n", "t2")
+
+        latest = await fs.meta.get(saving.query_by_name_and_tag("n", "latest"))
+        self.assertEqual(latest["id"], m1.id.hex)
+        self.assertEqual([(m.id, m.tag) for m in saved], [(m1.id, "latest")])
+
+        await fs.delete_from_meta("n", "t1")
+        self.assertEqual(await fs.meta.all(), [])
+
+    @asynctest.unittest_run_loop
+    async def test_export(self):
+        loader = model.Loader("no")
+        fs = saving.FsModelsStorage.new(path=self.workpath, loader=loader)
+
+        # Create the model directory without loading the model.
+        m = model.Model.new("n", "t", fs.models_path, loader)
+        m.path.joinpath("variables").mkdir(parents=True)
+        m.path.joinpath("variables", "data").write_bytes(b"weights")
+        await fs.meta.insert(m.to_dict())
+
+        # Archive is created sequentially, unless workers are configured.
+        for workers, parallel in [(1, False), (2, True)]:
+            fs.archive_workers = workers
+            writer = io.BytesIO()
+
+            with unittest.mock.patch("tensorcraft.tarlib.create",
+                                     wraps=tarlib.create) as create:
+                await fs.export("n", "t", asynclib.AsyncIO(writer))
+            self.assertEqual(create.called, parallel)
+
+            writer.seek(0)
+            with tarfile.open(fileobj=writer) as tar:
+                data = tar.extractfile("variables/data").read()
+            self.assertEqual(data, b"weights")
+
+
+class TestContentAddressedModelsStorage(asynctest.AsyncTestCase):
+
+    async def setUpAsync(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.workpath = pathlib.Path(self.workdir.name)
+
+    async def tearDownAsync(self) -> None:
+        self.workdir.cleanup()
+
+    def model_tar(self, files):
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode="w") as tar:
+            for name, data in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        fileobj.seek(0)
+        return fileobj
+
+    @asynctest.unittest_run_loop
+    async def test_extract(self):
+        loader = model.Loader("no")
+        fs = saving.ContentAddressedModelsStorage.new(path=self.workpath,
+                                                      loader=loader)
+
+        m1 = model.Model.new("n", "t1", fs.models_path, loader)
+        m2 = model.Model.new("n", "t2", fs.models_path, loader)
+
+        await fs.extract(m1, self.model_tar({"saved_model.pb": b"graph",
+                                             "variables/data": b"w1"}))
+        await fs.extract(m2, self.model_tar({"saved_model.pb": b"graph",
+                                             "variables/data": b"w2"}))
+
+        # Unchanged files are shared between models.
+        pb1 = m1.path.joinpath("saved_model.pb").stat()
+        pb2 = m2.path.joinpath("saved_model.pb").stat()
+        self.assertEqual(pb1.st_ino, pb2.st_ino)
+        self.assertEqual(m2.path.joinpath("variables", "data").read_bytes(),
+                         b"w2")
+
+        manifest = fs.blobs.load_manifest(m1.id.hex)
+        self.assertEqual(sorted(manifest.files),
+                         ["saved_model.pb", "variables/data"])
+        self.assertEqual(len(fs.blobs.missing(manifest.digests())), 0)
+
+        await fs.remove_files(m1)
+        self.assertEqual(fs.blobs.missing(manifest.digests()),
+                         [manifest.files["variables/data"]["digest"]])
+
+        await fs.remove_files(m2)
+        self.assertEqual(len(fs.blobs.missing(manifest.digests())), 2)
+        await fs.close()
+
+    @asynctest.unittest_run_loop
+    async def test_extract_no_links(self):
+        loader = model.Loader("no")
+        fs = saving.ContentAddressedModelsStorage.new(path=self.workpath,
+                                                      loader=loader)
+
+        m1 = model.Model.new("n", "t1", fs.models_path, loader)
+        m2 = model.Model.new("n", "t2", fs.models_path, loader)
+
+        # File system without hard links, blobs are copied into models.
+        with unittest.mock.patch("os.link", side_effect=OSError):
+            await fs.extract(m1, self.model_tar({"saved_model.pb": b"g",
+                                                 "variables/data": b"w1"}))
+            await fs.extract(m2, self.model_tar({"saved_model.pb": b"g",
+                                                 "variables/data": b"w2"}))
+
+        manifest = fs.blobs.load_manifest(m1.id.hex)
+        self.assertEqual(len(fs.blobs.missing(manifest.digests())), 0)
+
+        # Blobs of the manifests survive the collection on restart.
+        fs.blobs = fs.blobs.new(fs.blobs.path)
+        self.assertEqual(len(fs.blobs.missing(manifest.digests())), 0)
+
+        await fs.remove_files(m1)
+        self.assertEqual(fs.blobs.missing(manifest.digests()),
+                         [manifest.files["variables/data"]["digest"]])
+        await fs.close()
+
+
+class TestSqliteModelsMetadata(asynctest.AsyncTestCase):
+
+    async def setUpAsync(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.workpath = pathlib.Path(self.workdir.name)
+
+    async def tearDownAsync(self) -> None:
+        self.workdir.cleanup()
+
+    @asynctest.unittest_run_loop
+    async def test_insert(self):
+        meta = saving.SqliteModelsMetadata.new(self.workpath)
+
+        m = kerastest.new_model()
+        await meta.insert(m.to_dict())
+
+        query = saving.query_by_name_and_tag(m.name, m.tag)
+        self.assertEqual(await meta.get(query), m.to_dict())
+        self.assertEqual(await meta.get(saving.query_by_id(m.id)),
+                         m.to_dict())
+        latest = dict(m.to_dict(), tag="latest")
+        self.assertEqual(await meta.all(), [m.to_dict(), latest])
+
+        await meta.remove(saving.query_by_id(m.id))
+        self.assertIsNone(await meta.get(query))
+        await meta.close()
+
+    @asynctest.unittest_run_loop
+    async def test_latest(self):
+        meta = saving.SqliteModelsMetadata.new(self.workpath)
+
+        m1 = kerastest.new_model()
+        m2 = kerastest.new_model(name=m1.name)
+        m1.created_at, m2.created_at = 2.0, 1.0
+
+        await meta.insert(m1.to_dict())
+        await meta.insert(m2.to_dict())
+
+        self.assertEqual(await meta.latest(m1.name), m1.to_dict())
+
+        query = saving.query_by_name_and_tag(m1.name, "latest")
+        latest = dict(m1.to_dict(), tag="latest")
+        self.assertEqual(await meta.get(query), latest)
+
+        # Ensure the latest version is updated after the removal.
+        await meta.remove(saving.query_by_id(m1.id))
+        self.assertEqual(await meta.latest(m1.name), m2.to_dict())
+
+        await meta.remove(saving.query_by_id(m2.id))
+        self.assertIsNone(await meta.get(query))
+        await meta.close()
+
+    @asynctest.unittest_run_loop
+    async def test_migrate(self):
+        json_meta = saving.FsModelsMetadata.new(self.workpath)
+
+        m = kerastest.new_model()
+        await json_meta.insert(m.to_dict())
+        await json_meta.close()
+
+        meta = saving.SqliteModelsMetadata.new(self.workpath)
+        query = saving.query_by_name_and_tag(m.name, m.tag)
+
+        self.assertEqual(await meta.get(query), m.to_dict())
+        self.assertFalse(self.workpath.joinpath("metadata.json").exists())
+        await meta.close()
+
+
+class TestFsModelsMetadata(asynctest.AsyncTestCase):
+
+    async def setUpAsync(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.workpath = pathlib.Path(self.workdir.name)
+
+    async def tearDownAsync(self) -> None:
+        self.workdir.cleanup()
+
+    @asynctest.unittest_run_loop
+    async def test_latest(self):
+        meta = saving.FsModelsMetadata.new(self.workpath)
+
+        m1, m2, m3 = [kerastest.new_model(name="n") for _ in range(3)]
+        m1.created_at, m2.created_at, m3.created_at = 3.0, 1.0, 2.0
+
+        for m in (m1, m2, m3):
+            await meta.insert(m.to_dict())
+
+        await meta.remove(saving.query_by_id(m1.id))
+        self.assertEqual(await meta.latest("n"), m3.to_dict())
+
+        # Latest model must be resolved after the restart.
+        await meta.close()
+        meta = saving.FsModelsMetadata.new(self.workpath)
+
+        self.assertEqual(await meta.latest("n"), m3.to_dict())
+        self.assertEqual(len(await meta.all()), 3)
+        await meta.close()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,12 +1,14 @@
 import aiofiles
 import aiohttp.test_utils as aiohttptest
 import aiohttp.web
+import numpy
 import pathlib
 import tempfile
 import unittest
 
 from tensorcraft import asynclib
 from tensorcraft import server
+from tensorcraft import tensorlib
 from tests import kerastest
 
 
@@ -71,6 +73,50 @@ class TestServer(aiohttptest.AioHTTPTestCase):
             resp = await self.client.post(m.url+"/predict", json=data)
             self.assertEqual(resp.status, 200)
 
+    @aiohttptest.unittest_run_loop
+    async def test_predict_binary(self):
+        async with self.pushed_model() as m:
+            headers = {"Content-Type": tensorlib.NPY_CONTENT_TYPE,
+                       "Accept": tensorlib.NPY_CONTENT_TYPE}
+            data = tensorlib.dumps(numpy.array([[1.0]]))
+
+            resp = await self.client.post(m.url+"/predict",
+                                          data=data, headers=headers)
+            self.assertEqual(resp.status, 200)
+
+            y = tensorlib.loads(await resp.read())
+            self.assertEqual(y.shape, (1, 1))
+
+    @aiohttptest.unittest_run_loop
+    async def test_metrics(self):
+        data = dict(x=[[1.0]])
+        await self.client.post("/models/x/y/predict", json=data)
+
+        resp = await self.client.get("/metrics")
+        self.assertEqual(resp.status, 200)
+
+        text = await resp.text()
+        self.assertIn("tensorcraft_http_request_duration_seconds", text)
+        self.assertIn('model="unresolved",status="404"', text)
+        self.assertIn("tensorcraft_inference_queue_depth 0", text)
+
+    @aiohttptest.unittest_run_loop
+    async def test_request_id(self):
+        headers = {"X-Request-Id": "request-1"}
+        resp = await self.client.get("/status", headers=headers)
+        self.assertEqual(resp.headers.get("X-Request-Id"), "request-1")
+
+        resp = await self.client.get("/status")
+        self.assertTrue(resp.headers.get("X-Request-Id"))
+
+    @aiohttptest.unittest_run_loop
+    async def test_traces(self):
+        resp = await self.client.get("/debug/traces")
+        self.assertEqual(resp.status, 200)
+
+        data = await resp.json()
+        self.assertIn("traces", data)
+
     @aiohttptest.unittest_run_loop
     async def test_predict_not_found(self):
         data = dict(x=[[1.0]])
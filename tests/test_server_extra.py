@@ -1,5 +1,7 @@
 import aiohttp.test_utils as aiohttptest
 import aiohttp.web
+import base64
+import hashlib
 import pathlib
 import tempfile
 import unittest
@@ -42,6 +44,20 @@ class TestServerExtra(aiohttptest.AioHTTPTestCase):
 
         self.assertEqual(resp.status, 406)
 
+    @aiohttptest.unittest_run_loop
+    async def test_push_digest_mismatch(self):
+        headers = {"Digest": "sha-256=" + base64.b64encode(
+            hashlib.sha256(b"model").digest()).decode()}
+
+        resp = await self.client.put("/models/n/t", data=b"modified",
+                                     headers=headers)
+        self.assertEqual(resp.status, 400)
+
+        # Ensure the temporary upload file has been removed.
+        resp = await self.client.get("/status")
+        root_path = pathlib.Path((await resp.json())["root_path"])
+        self.assertEqual(list(root_path.iterdir()), [])
+
 
 if __name__ == "__main__":
     unittest.main()
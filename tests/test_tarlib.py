@@ -0,0 +1,72 @@
+import io
+import os
+import pathlib
+import tarfile
+import tempfile
+import unittest
+
+from tensorcraft import asynclib
+from tensorcraft import tarlib
+
+
+class TestTarlib(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.workpath = pathlib.Path(self.workdir.name)
+
+        self.src = self.workpath.joinpath("src")
+        self.src.joinpath("variables").mkdir(parents=True)
+        self.src.joinpath("saved_model.pb").write_bytes(os.urandom(1000))
+        self.src.joinpath("empty").write_bytes(b"")
+        for i in range(10):
+            self.src.joinpath("variables", f"data-{i}").write_bytes(
+                os.urandom(10000 + i))
+        os.symlink("saved_model.pb", str(self.src.joinpath("link.pb")))
+
+    def tearDown(self) -> None:
+        self.workdir.cleanup()
+
+    def test_create(self):
+        want = io.BytesIO()
+        asynclib.run(asynclib.create_tar(want, str(self.src)))
+
+        # Chunks smaller than files are read ahead by all workers.
+        got = io.BytesIO()
+        tarlib.create(got, self.src, workers=3, chunk_size=4096,
+                      max_pending=2)
+        self.assertEqual(want.getvalue(), got.getvalue())
+
+    def test_extract(self):
+        fileobj = io.BytesIO()
+        asynclib.run(asynclib.create_tar(fileobj, str(self.src)))
+        fileobj.seek(0)
+
+        dest = self.workpath.joinpath("dest")
+        tarlib.extract(fileobj, dest, workers=3, chunk_size=4096,
+                       max_pending=2)
+
+        for path in self.src.rglob("*"):
+            got = dest.joinpath(path.relative_to(self.src))
+            if path.is_symlink():
+                self.assertEqual(os.readlink(str(got)), "saved_model.pb")
+            elif path.is_file():
+                self.assertEqual(path.read_bytes(), got.read_bytes())
+                self.assertEqual(int(path.stat().st_mtime),
+                                 int(got.stat().st_mtime))
+
+    def test_extract_outside(self):
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode="w") as tar:
+            info = tarfile.TarInfo("../outside")
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b"data"))
+        fileobj.seek(0)
+
+        with self.assertRaises(ValueError):
+            tarlib.extract(fileobj, self.workpath.joinpath("dest"))
+        self.assertFalse(self.workpath.joinpath("outside").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
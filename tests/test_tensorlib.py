@@ -0,0 +1,66 @@
+import numpy
+import unittest
+
+from tensorcraft import tensorlib
+
+
+class TestTensorlib(unittest.TestCase):
+
+    def test_loads(self):
+        x = numpy.random.uniform(size=(4, 3)).astype(numpy.float32)
+        y = tensorlib.loads(tensorlib.dumps(x))
+
+        self.assertEqual(y.dtype, numpy.float32)
+        self.assertTrue(numpy.array_equal(x, y))
+
+    def test_loads_fortran_order(self):
+        x = numpy.asfortranarray(numpy.arange(6).reshape(2, 3))
+        y = tensorlib.loads(tensorlib.dumps(x))
+
+        self.assertTrue(numpy.array_equal(x, y))
+
+    def test_loads_invalid(self):
+        with self.assertRaises(ValueError):
+            tensorlib.loads(b"not an array")
+
+    def test_accepts(self):
+        self.assertTrue(tensorlib.accepts("application/x-npy"))
+        self.assertTrue(tensorlib.accepts(
+            "application/json; q=0.5, application/x-npy"))
+        self.assertFalse(tensorlib.accepts("application/json"))
+        self.assertFalse(tensorlib.accepts(""))
+
+    def test_rebatcher(self):
+        rebatcher = tensorlib.Rebatcher(batch_size=3)
+        x = numpy.arange(8).reshape(8, 1)
+
+        self.assertEqual(list(rebatcher.push(x[:2])), [])
+
+        batches = list(rebatcher.push(x[2:7]))
+        self.assertEqual([len(b) for b in batches], [3, 3])
+        self.assertEqual(rebatcher.size, 1)
+
+        self.assertEqual(list(rebatcher.push(x[7:])), [])
+        self.assertTrue(numpy.array_equal(rebatcher.flush(), x[6:]))
+        self.assertIsNone(rebatcher.flush())
+
+        batches.append(x[6:])
+        self.assertTrue(numpy.array_equal(numpy.concatenate(batches), x))
+
+    def test_rebatcher_large_array(self):
+        rebatcher = tensorlib.Rebatcher(batch_size=256)
+        x = numpy.arange(40001 * 2).reshape(40001, 2)
+
+        # Batches are sliced lazily as views of the pushed array.
+        batches = rebatcher.push(x)
+        batch = next(batches)
+        self.assertTrue(numpy.shares_memory(batch, x))
+        self.assertEqual(rebatcher.size, len(x) - 256)
+
+        batches = [batch] + list(batches) + [rebatcher.flush()]
+        self.assertEqual(len(batches), 157)
+        self.assertTrue(numpy.array_equal(numpy.concatenate(batches), x))
+
+
+if __name__ == "__main__":
+    unittest.main()
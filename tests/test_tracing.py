@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+import unittest.mock
+
+from tensorcraft import tracing
+from tests import asynctest
+
+
+class TestTracing(asynctest.AsyncTestCase):
+
+    @asynctest.unittest_run_loop
+    async def test_trace(self):
+        tracer = tracing.Tracer(sample_rate=1.0)
+
+        with tracer.trace("request-1") as trace:
+            with tracing.span("handler"):
+                with tracing.span("load"):
+                    await asyncio.sleep(0)
+            self.assertEqual(tracing.current_request_id(), "request-1")
+
+        self.assertIsNone(tracing.current_request_id())
+        self.assertEqual(tracer.recent(), [trace])
+
+        handler, load = trace.spans
+        self.assertEqual((handler.name, handler.parent_id), ("handler", None))
+        self.assertEqual((load.name, load.parent_id), ("load", handler.id))
+        self.assertGreaterEqual(handler.duration, load.duration)
+
+    @asynctest.unittest_run_loop
+    async def test_trace_not_sampled(self):
+        tracer = tracing.Tracer(sample_rate=0.0)
+
+        with tracer.trace() as trace:
+            with tracing.span("handler"):
+                pass
+
+        self.assertFalse(trace.spans)
+        self.assertFalse(tracer.recent())
+        self.assertTrue(trace.request_id)
+
+    @asynctest.unittest_run_loop
+    async def test_trace_tasks(self):
+        tracer = tracing.Tracer(sample_rate=1.0)
+
+        async def load():
+            with tracing.span("load"):
+                pass
+
+        with tracer.trace() as trace:
+            await asyncio.ensure_future(load())
+            await tracing.detached(asyncio.ensure_future, load())
+
+        self.assertEqual([s.name for s in trace.spans], ["load"])
+
+    def test_sample_rate(self):
+        with self.assertRaises(ValueError):
+            tracing.Tracer(sample_rate=2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()